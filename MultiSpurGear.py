@@ -1,12 +1,22 @@
 # Assuming you have not changed the general structure of the template no modification is needed in this file.
+import time
+_load_start = time.perf_counter()
 from . import commands
+from . import config
 from .lib import fusion360utils as futil
+# Time it took Fusion to import the add-in, see config.LOG_LATENCY.
+_load_seconds = time.perf_counter() - _load_start
 
 def run(context):
     try:
+        started = time.perf_counter()
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.start()
 
+        if config.LOG_LATENCY:
+            futil.log(f'{config.ADDIN_NAME} loaded in {_load_seconds * 1000:.1f} ms, '
+                      f'started in {(time.perf_counter() - started) * 1000:.1f} ms', force_console=True)
+
     except:
         futil.handle_error('run')
 
@@ -0,0 +1,84 @@
+"""An in-process stand-in for the parts of the Fusion 360 API used by the add-in.
+
+Only meant for running the add-in headless in benchmarks. Every access to a
+public attribute or method of an API object from outside of this package is
+recorded in calls, keyed by 'Class.member'. Assignments are recorded as
+'Class.member='.
+"""
+
+import sys
+from collections import Counter
+
+calls = Counter()
+
+
+def reset_calls():
+    """Clears the recorded API calls."""
+    calls.clear()
+
+
+def doEvents():
+    """Delivers the custom events fired so far, and the ones they fire."""
+    from . import core
+    core.Application.get()._process_events()
+    return True
+
+
+def _record(cls_name: str, name: str, depth: int):
+    # Accesses made by the stand-in itself are not API calls of the add-in.
+    caller = sys._getframe(depth).f_globals.get('__name__', '')
+    if not caller.startswith('adsk'):
+        calls[cls_name + '.' + name] += 1
+
+
+class _ApiType(type):
+    def __getattribute__(cls, name):
+        if name[0] != '_':
+            _record(type.__getattribute__(cls, '__name__'), name, 2)
+        return type.__getattribute__(cls, name)
+
+
+class ApiObject(metaclass=_ApiType):
+    """Base class of all API objects of the stand-in."""
+
+    def __getattribute__(self, name):
+        if name[0] != '_':
+            _record(type(self).__name__, name, 2)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if name[0] != '_':
+            _record(type(self).__name__, name + '=', 2)
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+    @property
+    def isValid(self):
+        return not getattr(self, '_deleted', False)
+
+    @property
+    def objectType(self):
+        return f'{type(self).__module__.replace(".", "::")}::{type(self).__name__}'
+
+
+class ApiCollection(ApiObject):
+    """A read-only collection of API objects."""
+
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,781 @@
+"""Stand-in for adsk.core. See the adsk package for how calls are recorded."""
+
+import math
+import os
+from collections import deque
+
+from . import ApiCollection, ApiObject
+
+
+# Enumerations
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class DialogResults:
+    DialogError = -1
+    DialogOK = 0
+    DialogCancel = 1
+    DialogYes = 2
+    DialogNo = 3
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+# Geometry
+
+class Point3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    def copy(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+    def distanceTo(self, other):
+        return math.dist((self.x, self.y, self.z), (other.x, other.y, other.z))
+
+    def transformBy(self, matrix):
+        m = matrix._m
+        x, y, z = self.x, self.y, self.z
+        self.x = m[0] * x + m[1] * y + m[2] * z + m[3]
+        self.y = m[4] * x + m[5] * y + m[6] * z + m[7]
+        self.z = m[8] * x + m[9] * y + m[10] * z + m[11]
+        return True
+
+
+class Vector3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+    @property
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def copy(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+    def normalize(self):
+        length = self.length
+        self.x, self.y, self.z = self.x / length, self.y / length, self.z / length
+        return True
+
+    def dotProduct(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def crossProduct(self, other):
+        return Vector3D(self.y * other.z - self.z * other.y,
+                        self.z * other.x - self.x * other.z,
+                        self.x * other.y - self.y * other.x)
+
+    def transformBy(self, matrix):
+        m = matrix._m
+        x, y, z = self.x, self.y, self.z
+        self.x = m[0] * x + m[1] * y + m[2] * z
+        self.y = m[4] * x + m[5] * y + m[6] * z
+        self.z = m[8] * x + m[9] * y + m[10] * z
+        return True
+
+
+def _multiply(a, b):
+    return [sum(a[r * 4 + k] * b[k * 4 + c] for k in range(4)) for r in range(4) for c in range(4)]
+
+
+_IDENTITY = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+
+class Matrix3D(ApiObject):
+    """A 4x4 transform, stored in row-major order with the translation in the last column."""
+
+    def __init__(self, values=None):
+        self._m = list(values or _IDENTITY)
+
+    @staticmethod
+    def create():
+        return Matrix3D()
+
+    def copy(self):
+        return Matrix3D(self._m)
+
+    def asArray(self):
+        return list(self._m)
+
+    def setWithArray(self, values):
+        if len(values) != 16:
+            return False
+        self._m = [float(v) for v in values]
+        return True
+
+    def setToIdentity(self):
+        self._m = list(_IDENTITY)
+        return True
+
+    def transformBy(self, matrix):
+        self._m = _multiply(matrix._m, self._m)
+        return True
+
+    def setToRotation(self, angle, axis, origin):
+        ax, ay, az = axis.x, axis.y, axis.z
+        length = math.sqrt(ax * ax + ay * ay + az * az)
+        ax, ay, az = ax / length, ay / length, az / length
+        c, s, t = math.cos(angle), math.sin(angle), 1.0 - math.cos(angle)
+        r = [t * ax * ax + c, t * ax * ay - s * az, t * ax * az + s * ay,
+             t * ax * ay + s * az, t * ay * ay + c, t * ay * az - s * ax,
+             t * ax * az - s * ay, t * ay * az + s * ax, t * az * az + c]
+        ox, oy, oz = origin.x, origin.y, origin.z
+        self._m = [r[0], r[1], r[2], ox - (r[0] * ox + r[1] * oy + r[2] * oz),
+                   r[3], r[4], r[5], oy - (r[3] * ox + r[4] * oy + r[5] * oz),
+                   r[6], r[7], r[8], oz - (r[6] * ox + r[7] * oy + r[8] * oz),
+                   0.0, 0.0, 0.0, 1.0]
+        return True
+
+    def setToRotateTo(self, fromVector, toVector, axis=None):
+        f = fromVector.copy()
+        f.normalize()
+        t = toVector.copy()
+        t.normalize()
+        cross = f.crossProduct(t)
+        angle = math.atan2(cross.length, f.dotProduct(t))
+        if cross.length < 1e-12:
+            if angle < 1e-12:
+                return self.setToIdentity()
+            # Antiparallel, turn about any axis perpendicular to the vectors.
+            cross = f.crossProduct(Vector3D(1.0, 0.0, 0.0))
+            if cross.length < 1e-12:
+                cross = f.crossProduct(Vector3D(0.0, 1.0, 0.0))
+        return self.setToRotation(angle, axis or cross, Point3D())
+
+    @property
+    def translation(self):
+        return Vector3D(self._m[3], self._m[7], self._m[11])
+
+    @translation.setter
+    def translation(self, vector):
+        self._m[3], self._m[7], self._m[11] = vector.x, vector.y, vector.z
+
+
+class Line3D(ApiObject):
+    def __init__(self, startPoint, endPoint):
+        self.startPoint, self.endPoint = startPoint, endPoint
+
+    @staticmethod
+    def create(startPoint, endPoint):
+        return Line3D(startPoint.copy(), endPoint.copy())
+
+
+class NurbsCurve3D(ApiObject):
+    def __init__(self, controlPoints, degree, knots, isPeriodic):
+        self.controlPoints, self.degree, self.knots, self.isPeriodic = controlPoints, degree, knots, isPeriodic
+
+    @staticmethod
+    def createNonRational(controlPoints, degree, knots, isPeriodic):
+        return NurbsCurve3D([p.copy() for p in controlPoints], degree, list(knots), isPeriodic)
+
+
+class Circle3D(ApiObject):
+    def __init__(self, center, normal, radius):
+        self.center, self.normal, self.radius = center, normal, radius
+
+    @staticmethod
+    def createByCenter(center, normal, radius):
+        return Circle3D(center.copy(), normal.copy(), radius)
+
+
+class Arc3D(ApiObject):
+    def __init__(self, startPoint, point, endPoint):
+        self.startPoint, self._point, self.endPoint = startPoint, point, endPoint
+
+    @staticmethod
+    def createByThreePoints(startPoint, point, endPoint):
+        return Arc3D(startPoint.copy(), point.copy(), endPoint.copy())
+
+
+class Plane(ApiObject):
+    def __init__(self, origin, normal):
+        self.origin, self.normal = origin, normal
+
+    @staticmethod
+    def create(origin, normal):
+        return Plane(origin.copy(), normal.copy())
+
+
+class Cylinder(ApiObject):
+    def __init__(self, origin, axis, radius):
+        self.origin, self.axis, self.radius = origin, axis, radius
+
+    @staticmethod
+    def create(origin, axis, radius):
+        return Cylinder(origin.copy(), axis.copy(), radius)
+
+
+class NurbsSurfaceProperties:
+    OpenNurbsSurface = 1
+    ClosedNurbsSurface = 2
+    PeriodicNurbsSurface = 4
+    RationalNurbsSurface = 8
+
+
+class NurbsSurface(ApiObject):
+    def __init__(self, degreeU, degreeV, controlPointCountU, controlPointCountV, controlPoints):
+        self.degreeU, self.degreeV = degreeU, degreeV
+        self.controlPointCountU, self.controlPointCountV = controlPointCountU, controlPointCountV
+        self.controlPoints = controlPoints
+
+    @staticmethod
+    def create(degreeU, degreeV, controlPointCountU, controlPointCountV, controlPoints, knotsU, knotsV,
+               weights, propertiesU, propertiesV):
+        return NurbsSurface(degreeU, degreeV, controlPointCountU, controlPointCountV, [p.copy() for p in controlPoints])
+
+
+class Color(ApiObject):
+    def __init__(self, red, green, blue, opacity):
+        self.red, self.green, self.blue, self.opacity = red, green, blue, opacity
+
+    @staticmethod
+    def create(red, green, blue, opacity):
+        return Color(red, green, blue, opacity)
+
+
+# Values and collections
+
+class ValueInput(ApiObject):
+    def __init__(self, realValue=None, stringValue=None):
+        self.realValue, self.stringValue = realValue, stringValue
+
+    @staticmethod
+    def createByReal(realValue):
+        return ValueInput(realValue=realValue)
+
+    @staticmethod
+    def createByString(stringValue):
+        return ValueInput(stringValue=stringValue)
+
+
+class ObjectCollection(ApiCollection):
+    @staticmethod
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    def clear(self):
+        self._items.clear()
+        return True
+
+
+# Events
+
+class CommandCreatedEventHandler:
+    def __init__(self):
+        pass
+
+
+class CommandEventHandler:
+    def __init__(self):
+        pass
+
+
+class InputChangedEventHandler:
+    def __init__(self):
+        pass
+
+
+class ValidateInputsEventHandler:
+    def __init__(self):
+        pass
+
+
+class CustomEventHandler:
+    def __init__(self):
+        pass
+
+
+class SelectionEventHandler:
+    def __init__(self):
+        pass
+
+
+class Event(ApiObject):
+    def __init__(self):
+        self._handlers = []
+
+    def remove(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            return True
+        return False
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class CommandCreatedEvent(Event):
+    def add(self, handler: 'CommandCreatedEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class CommandEvent(Event):
+    def add(self, handler: 'CommandEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class InputChangedEvent(Event):
+    def add(self, handler: 'InputChangedEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class ValidateInputsEvent(Event):
+    def add(self, handler: 'ValidateInputsEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class SelectionEvent(Event):
+    def add(self, handler: 'SelectionEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class CustomEvent(Event):
+    def __init__(self, eventId):
+        super().__init__()
+        self._id = eventId
+
+    def add(self, handler: 'CustomEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+    @property
+    def eventId(self):
+        return self._id
+
+
+class CommandCreatedEventArgs(ApiObject):
+    def __init__(self, command):
+        self.command = command
+
+
+class CommandEventArgs(ApiObject):
+    def __init__(self, command):
+        self.command = command
+        self.isValidResult = False
+
+
+class SelectionEventArgs(ApiObject):
+    def __init__(self, selection):
+        self.selection = selection
+        self.isSelectable = True
+
+
+class InputChangedEventArgs(ApiObject):
+    def __init__(self, input, inputs):
+        self.input, self.inputs = input, inputs
+
+
+class ValidateInputsEventArgs(ApiObject):
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.areInputsValid = True
+
+
+class CustomEventArgs(ApiObject):
+    def __init__(self, additionalInfo=''):
+        self.additionalInfo = additionalInfo
+
+
+# Commands and inputs
+
+class CommandInput(ApiObject):
+    def __init__(self, id, name):
+        self.id, self.name = id, name
+        self.isVisible = True
+        self.isEnabled = True
+        self.tooltip = ''
+
+
+class Selection(ApiObject):
+    def __init__(self, entity):
+        self.entity = entity
+
+
+class SelectionCommandInput(CommandInput):
+    def __init__(self, id, name, commandPrompt):
+        super().__init__(id, name)
+        self.commandPrompt = commandPrompt
+        self.selectionFilters = []
+        self._selections = []
+
+    def setSelectionLimits(self, minimum, maximum=0):
+        return True
+
+    def addSelection(self, entity):
+        self._selections.append(Selection(entity))
+        return True
+
+    def clearSelection(self):
+        self._selections = []
+        return True
+
+    @property
+    def selectionCount(self):
+        return len(self._selections)
+
+    def selection(self, index):
+        return self._selections[index]
+
+
+class ValueCommandInput(CommandInput):
+    def __init__(self, id, name, unitType, initialValue):
+        super().__init__(id, name)
+        self.unitType = unitType
+        self.value = initialValue.realValue
+
+    @property
+    def expression(self):
+        return str(self.value)
+
+
+class BoolValueCommandInput(CommandInput):
+    def __init__(self, id, name, isCheckBox, resourceFolder, initialValue):
+        super().__init__(id, name)
+        self.value = initialValue
+
+
+class IntegerSpinnerCommandInput(CommandInput):
+    def __init__(self, id, name, minValue, maxValue, spinStep, initialValue):
+        super().__init__(id, name)
+        self.minimumValue, self.maximumValue, self.spinStep = minValue, maxValue, spinStep
+        self.value = initialValue
+
+
+class TextBoxCommandInput(CommandInput):
+    def __init__(self, id, name, formattedText, numRows, isReadOnly):
+        super().__init__(id, name)
+        self.formattedText = formattedText
+        self.numRows = numRows
+        self.isReadOnly = isReadOnly
+
+
+class ListItem(ApiObject):
+    def __init__(self, items, name, isSelected):
+        self._items = items
+        self.name = name
+        self._selected = isSelected
+
+    @property
+    def isSelected(self):
+        return self._selected
+
+    @isSelected.setter
+    def isSelected(self, value):
+        if value:
+            for item in self._items._items:
+                item._selected = False
+        self._selected = value
+
+    @property
+    def index(self):
+        return self._items._items.index(self)
+
+
+class ListItems(ApiCollection):
+    def add(self, name, isSelected, icon=''):
+        item = ListItem(self, name, False)
+        self._items.append(item)
+        if isSelected:
+            item.isSelected = True
+        return item
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, id, name, dropDownStyle):
+        super().__init__(id, name)
+        self.dropDownStyle = dropDownStyle
+        self.listItems = ListItems()
+
+    @property
+    def selectedItem(self):
+        for item in self.listItems._items:
+            if item._selected:
+                return item
+        return None
+
+
+class CommandInputs(ApiCollection):
+    def __init__(self, command):
+        super().__init__()
+        self._by_id = {}
+        self.command = command
+
+    def _add(self, command_input):
+        self._items.append(command_input)
+        self._by_id[command_input.id] = command_input
+        return command_input
+
+    def itemById(self, id):
+        return self._by_id.get(id)
+
+    def addSelectionInput(self, id, name, commandPrompt):
+        return self._add(SelectionCommandInput(id, name, commandPrompt))
+
+    def addValueInput(self, id, name, unitType, initialValue):
+        return self._add(ValueCommandInput(id, name, unitType, initialValue))
+
+    def addBoolValueInput(self, id, name, isCheckBox, resourceFolder='', initialValue=False):
+        return self._add(BoolValueCommandInput(id, name, isCheckBox, resourceFolder, initialValue))
+
+    def addIntegerSpinnerCommandInput(self, id, name, minValue, maxValue, spinStep, initialValue):
+        return self._add(IntegerSpinnerCommandInput(id, name, minValue, maxValue, spinStep, initialValue))
+
+    def addDropDownCommandInput(self, id, name, dropDownStyle):
+        return self._add(DropDownCommandInput(id, name, dropDownStyle))
+
+    def addTextBoxCommandInput(self, id, name, formattedText, numRows, isReadOnly):
+        return self._add(TextBoxCommandInput(id, name, formattedText, numRows, isReadOnly))
+
+
+class Command(ApiObject):
+    def __init__(self):
+        self.commandInputs = CommandInputs(self)
+        self.execute = CommandEvent()
+        self.executePreview = CommandEvent()
+        self.inputChanged = InputChangedEvent()
+        self.validateInputs = ValidateInputsEvent()
+        self.preSelect = SelectionEvent()
+        self.destroy = CommandEvent()
+        self.isAutoExecute = False
+        self.isRepeatable = False
+
+
+class CommandDefinition(ApiObject):
+    def __init__(self, id, name, tooltip, resourceFolder):
+        self.id, self.name, self.tooltip, self.resourceFolder = id, name, tooltip, resourceFolder
+        self.commandCreated = CommandCreatedEvent()
+        self._deleted = False
+
+    def execute(self):
+        command = Command()
+        self.commandCreated._fire(CommandCreatedEventArgs(command))
+        return True
+
+    def deleteMe(self):
+        self._deleted = True
+        Application._instance.userInterface.commandDefinitions._items.remove(self)
+        return True
+
+
+class CommandDefinitions(ApiCollection):
+    def addButtonDefinition(self, id, name, tooltip, resourceFolder=''):
+        definition = CommandDefinition(id, name, tooltip, resourceFolder)
+        self._items.append(definition)
+        return definition
+
+    def itemById(self, id):
+        for definition in self._items:
+            if definition.id == id:
+                return definition
+        return None
+
+
+class CommandControl(ApiObject):
+    def __init__(self, controls, commandDefinition):
+        self._controls = controls
+        self.commandDefinition = commandDefinition
+        self.id = commandDefinition.id
+        self.isPromoted = False
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        return True
+
+
+class ToolbarControls(ApiCollection):
+    def addCommand(self, commandDefinition, positionID='', isBefore=True):
+        control = CommandControl(self, commandDefinition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, id):
+        for control in self._items:
+            if control.id == id:
+                return control
+        return None
+
+
+class ToolbarPanel(ApiObject):
+    def __init__(self, id):
+        self.id = id
+        self.controls = ToolbarControls()
+
+
+class ToolbarPanels(ApiCollection):
+    def itemById(self, id):
+        for panel in self._items:
+            if panel.id == id:
+                return panel
+        panel = ToolbarPanel(id)
+        self._items.append(panel)
+        return panel
+
+
+class Workspace(ApiObject):
+    def __init__(self, id):
+        self.id = id
+        self.toolbarPanels = ToolbarPanels()
+
+
+class Workspaces(ApiCollection):
+    def itemById(self, id):
+        for workspace in self._items:
+            if workspace.id == id:
+                return workspace
+        workspace = Workspace(id)
+        self._items.append(workspace)
+        return workspace
+
+
+class FileDialog(ApiObject):
+    def __init__(self, saveFileName):
+        self.title = ''
+        self.filter = ''
+        self.isMultiSelectEnabled = False
+        self.filename = ''
+        self._saveFileName = saveFileName
+
+    def showSave(self):
+        # Answers with the file name set on the user interface, which is the
+        # null device unless a caller wants the output.
+        self.filename = self._saveFileName
+        return DialogResults.DialogOK
+
+
+class ProgressDialog(ApiObject):
+    def __init__(self, cancelAt):
+        self.isCancelButtonShown = False
+        self.cancelButtonText = 'Cancel'
+        self.isShowing = False
+        self.title = ''
+        self.message = ''
+        self.minimumValue = 0
+        self.maximumValue = 100
+        self.progressValue = 0
+        self._cancelAt = cancelAt
+
+    def show(self, title, message, minimumValue, maximumValue, delay=0):
+        self.title, self.message = title, message
+        self.minimumValue, self.maximumValue = minimumValue, maximumValue
+        self.progressValue = minimumValue
+        self.isShowing = True
+        return True
+
+    def hide(self):
+        self.isShowing = False
+        return True
+
+    @property
+    def wasCancelled(self):
+        # The user presses the cancel button once the progress reaches the
+        # value set on the user interface, if any.
+        return self._cancelAt is not None and self.progressValue >= self._cancelAt
+
+
+class UserInterface(ApiObject):
+    def __init__(self):
+        self.commandDefinitions = CommandDefinitions()
+        self.workspaces = Workspaces()
+        self.messages = []
+        self._saveFileName = os.devnull
+        self._cancelProgressAt = None
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self.messages.append(text)
+        return 0
+
+    def createFileDialog(self):
+        return FileDialog(self._saveFileName)
+
+    def createProgressDialog(self):
+        return ProgressDialog(self._cancelProgressAt)
+
+
+class Viewport(ApiObject):
+    def refresh(self):
+        return True
+
+
+class Application(ApiObject):
+    _instance = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.activeProduct = None
+        self.activeViewport = Viewport()
+        self.pointTolerance = 1e-10
+        self.logged = []
+        self._custom_events = {}
+        self._pending_events = deque()
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    def log(self, message, level=LogLevels.InfoLogLevel, type=LogTypes.ConsoleLogType):
+        self.logged.append((message, level, type))
+        return True
+
+    def registerCustomEvent(self, eventId):
+        event = self._custom_events.get(eventId)
+        if event is None:
+            event = self._custom_events[eventId] = CustomEvent(eventId)
+        return event
+
+    def unregisterCustomEvent(self, eventId):
+        return self._custom_events.pop(eventId, None) is not None
+
+    def fireCustomEvent(self, eventId, additionalInfo=''):
+        # Like Fusion, the event is only delivered once the caller returned,
+        # see adsk.doEvents.
+        if eventId not in self._custom_events:
+            return False
+        self._pending_events.append((eventId, additionalInfo))
+        return True
+
+    def _process_events(self):
+        while self._pending_events:
+            eventId, additionalInfo = self._pending_events.popleft()
+            event = self._custom_events.get(eventId)
+            if event is not None:
+                event._fire(CustomEventArgs(additionalInfo))
@@ -0,0 +1,952 @@
+"""Stand-in for adsk.fusion. See the adsk package for how calls are recorded.
+
+Geometry is not modelled beyond what the add-in inspects: sketches keep their
+curves, features keep their inputs, and bodies and faces only exist so the
+add-in can find and pass them on.
+"""
+
+import itertools
+
+from . import ApiCollection, ApiObject
+from . import core
+
+_tokens = itertools.count(1)
+
+
+def _point(point):
+    # Sketch methods accept either a Point3D or a SketchPoint.
+    return point.geometry.copy() if isinstance(point, SketchPoint) else point.copy()
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class PatternComputeOptions:
+    OptimizedPatternCompute = 0
+    IdenticalPatternCompute = 1
+    AdjustPatternCompute = 2
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+# Timeline
+
+class TimelineObject(ApiObject):
+    def __init__(self, timeline, entity):
+        self._timeline = timeline
+        self.index = 0
+        self.entity = entity
+        self.name = ''
+
+    @property
+    def parentGroup(self):
+        for group in self._timeline.timelineGroups._items:
+            if self in group._items:
+                return group
+        return None
+
+    def rollTo(self, rollBefore):
+        self._timeline.markerPosition = self.index if rollBefore else self.index + 1
+        return True
+
+
+class TimelineGroup(ApiCollection):
+    # The objects of a group are kept rather than their indices, which change
+    # as objects are inserted in front of them.
+    def __init__(self, groups, items):
+        super().__init__(items)
+        self._groups = groups
+        self.name = ''
+        self.isCollapsed = True
+
+    def deleteMe(self, deleteGroupAndContents=True):
+        self._groups._items.remove(self)
+        if deleteGroupAndContents:
+            for timeline_object in self._items:
+                timeline_object.entity.deleteMe()
+        return True
+
+
+class TimelineGroups(ApiCollection):
+    def __init__(self, timeline):
+        super().__init__()
+        self._timeline = timeline
+
+    def add(self, startIndex, endIndex):
+        group = TimelineGroup(self, self._timeline._items[startIndex:endIndex + 1])
+        self._items.append(group)
+        return group
+
+
+class Timeline(ApiCollection):
+    def __init__(self):
+        super().__init__()
+        self.timelineGroups = TimelineGroups(self)
+        self.markerPosition = 0
+
+    def moveToEnd(self):
+        self.markerPosition = len(self._items)
+        return True
+
+    def _add(self, entity):
+        # New objects are inserted at the marker, which then moves past them.
+        timeline_object = TimelineObject(self, entity)
+        self._items.insert(self.markerPosition, timeline_object)
+        for index in range(self.markerPosition, len(self._items)):
+            self._items[index].index = index
+        self.markerPosition += 1
+        return timeline_object
+
+    def _remove(self, timeline_object):
+        index = self._items.index(timeline_object)
+        del self._items[index]
+        for group in self.timelineGroups._items:
+            if timeline_object in group._items:
+                group._items.remove(timeline_object)
+        for later in self._items[index:]:
+            later.index -= 1
+        if self.markerPosition > index:
+            self.markerPosition -= 1
+
+
+# Attributes
+
+class Attribute(ApiObject):
+    def __init__(self, groupName, name, value, parent):
+        self.groupName, self.name, self.value, self.parent = groupName, name, value, parent
+
+    def deleteMe(self):
+        self.parent.attributes._items.remove(self)
+        return True
+
+
+class Attributes(ApiCollection):
+    def __init__(self, parent):
+        super().__init__()
+        self._parent = parent
+
+    def add(self, groupName, name, value):
+        for attribute in self._items:
+            if attribute.groupName == groupName and attribute.name == name:
+                attribute.value = value
+                return attribute
+        attribute = Attribute(groupName, name, value, self._parent)
+        self._items.append(attribute)
+        return attribute
+
+    def itemByName(self, groupName, name):
+        for attribute in self._items:
+            if attribute.groupName == groupName and attribute.name == name:
+                return attribute
+        return None
+
+
+class _Entity(ApiObject):
+    """Base of all objects with attributes and an entity token."""
+
+    def __init__(self):
+        self._token = f'token{next(_tokens)}'
+        self._attributes = None
+        self._deleted = False
+
+    @property
+    def entityToken(self):
+        return self._token
+
+    @property
+    def attributes(self):
+        if self._attributes is None:
+            self._attributes = Attributes(self)
+        return self._attributes
+
+
+# Sketches
+
+class SketchPoint(_Entity):
+    def __init__(self, sketch, geometry):
+        super().__init__()
+        self.parentSketch = sketch
+        self.geometry = geometry
+
+    @property
+    def worldGeometry(self):
+        point = self.geometry.copy()
+        point.transformBy(self.parentSketch._transform)
+        return point
+
+    def merge(self, point):
+        point._deleted = True
+        return True
+
+
+class SketchCurve(_Entity):
+    def __init__(self, sketch):
+        super().__init__()
+        self.parentSketch = sketch
+        self.isConstruction = False
+        self.isFixed = False
+
+    def deleteMe(self):
+        self._deleted = True
+        return True
+
+
+class SketchCircle(SketchCurve):
+    def __init__(self, sketch, center, radius):
+        super().__init__(sketch)
+        self.centerSketchPoint = SketchPoint(sketch, center)
+        self.radius = radius
+
+
+class SketchArc(SketchCurve):
+    def __init__(self, sketch, start, point, end):
+        super().__init__(sketch)
+        self.startSketchPoint = SketchPoint(sketch, start)
+        self.endSketchPoint = SketchPoint(sketch, end)
+        self.geometry = core.Arc3D(start, point, end)
+
+
+class SketchLine(SketchCurve):
+    def __init__(self, sketch, start, end):
+        super().__init__(sketch)
+        self.startSketchPoint = SketchPoint(sketch, start)
+        self.endSketchPoint = SketchPoint(sketch, end)
+
+
+class SketchFittedSpline(SketchCurve):
+    def __init__(self, sketch, points):
+        super().__init__(sketch)
+        self.fitPoints = points
+        self.startSketchPoint = SketchPoint(sketch, points[0])
+        self.endSketchPoint = SketchPoint(sketch, points[-1])
+
+
+class SketchFixedSpline(SketchCurve):
+    def __init__(self, sketch, curve):
+        super().__init__(sketch)
+        self.geometry = curve
+        self.isFixed = True
+        self.startSketchPoint = SketchPoint(sketch, curve.controlPoints[0].copy())
+        self.endSketchPoint = SketchPoint(sketch, curve.controlPoints[-1].copy())
+
+
+class SketchCircles(ApiCollection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByCenterRadius(self, centerPoint, radius):
+        circle = SketchCircle(self._sketch, _point(centerPoint), radius)
+        self._items.append(circle)
+        return circle
+
+
+class SketchArcs(ApiCollection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByThreePoints(self, startPoint, point, endPoint):
+        arc = SketchArc(self._sketch, _point(startPoint), _point(point), _point(endPoint))
+        self._items.append(arc)
+        return arc
+
+
+class SketchLines(ApiCollection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByTwoPoints(self, startPoint, endPoint):
+        line = SketchLine(self._sketch, _point(startPoint), _point(endPoint))
+        self._items.append(line)
+        return line
+
+
+class SketchFittedSplines(ApiCollection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def add(self, fitPoints):
+        spline = SketchFittedSpline(self._sketch, [_point(p) for p in fitPoints])
+        self._items.append(spline)
+        return spline
+
+
+class SketchFixedSplines(ApiCollection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByNurbsCurve(self, nurbsCurve):
+        spline = SketchFixedSpline(self._sketch, nurbsCurve)
+        self._items.append(spline)
+        return spline
+
+
+class SketchCurves(ApiObject):
+    def __init__(self, sketch):
+        self.sketchCircles = SketchCircles(sketch)
+        self.sketchArcs = SketchArcs(sketch)
+        self.sketchLines = SketchLines(sketch)
+        self.sketchFittedSplines = SketchFittedSplines(sketch)
+        self.sketchFixedSplines = SketchFixedSplines(sketch)
+
+
+class GeometricConstraint(ApiObject):
+    def __init__(self, kind, entities):
+        self._kind, self._entities = kind, entities
+
+
+class GeometricConstraints(ApiCollection):
+    def addTangent(self, curveOne, curveTwo):
+        constraint = GeometricConstraint('tangent', (curveOne, curveTwo))
+        self._items.append(constraint)
+        return constraint
+
+
+class ProfileLoops(ApiCollection):
+    pass
+
+
+class Profile(ApiObject):
+    def __init__(self, sketch, loopCount):
+        self.parentSketch = sketch
+        self.profileLoops = ProfileLoops([None] * loopCount)
+
+
+class Profiles(ApiCollection):
+    pass
+
+
+class Sketch(_Entity):
+    def __init__(self, component, plane, transform=None):
+        super().__init__()
+        self.parentComponent = component
+        self.referencePlane = plane
+        self.assemblyContext = None
+        self._transform = transform.copy() if transform else core.Matrix3D()
+        self.sketchCurves = SketchCurves(self)
+        self.geometricConstraints = GeometricConstraints()
+        self.isComputeDeferred = False
+        self.isVisible = True
+        self.name = ''
+        self.timelineObject = component._design.timeline._add(self)
+
+    @property
+    def transform(self):
+        return self._transform.copy()
+
+    @transform.setter
+    def transform(self, value):
+        self._transform = value.copy()
+
+    @property
+    def xDirection(self):
+        m = self._transform._m
+        return core.Vector3D(m[0], m[4], m[8])
+
+    @property
+    def yDirection(self):
+        m = self._transform._m
+        return core.Vector3D(m[1], m[5], m[9])
+
+    @property
+    def origin(self):
+        m = self._transform._m
+        return core.Point3D(m[3], m[7], m[11])
+
+    def _outline_curves(self):
+        curves = self.sketchCurves
+        return (curves.sketchLines._items + curves.sketchArcs._items + curves.sketchFittedSplines._items
+                + curves.sketchFixedSplines._items)
+
+    @property
+    def profiles(self):
+        # Circles about the same center are nested, and an outline drawn
+        # with other curves encloses them. So two circles make a ring and a
+        # disk, and an outline with a circle makes the outline with a hole
+        # and a disk.
+        circles = self.sketchCurves.sketchCircles._items
+        closed = [c for c in circles if not c.isConstruction]
+        if self._outline_curves():
+            return Profiles([Profile(self, 1 + len(closed))] + [Profile(self, 1) for _ in closed])
+        if len(closed) == 2:
+            return Profiles([Profile(self, 2), Profile(self, 1)])
+        if not closed:
+            return Profiles()
+        return Profiles([Profile(self, 1)])
+
+    def deleteMe(self):
+        self._deleted = True
+        self.parentComponent.sketches._items.remove(self)
+        self.timelineObject._timeline._remove(self.timelineObject)
+        return True
+
+
+class Sketches(ApiCollection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, planarEntity, occurrenceForCreation=None):
+        sketch = Sketch(self._component, planarEntity)
+        self._items.append(sketch)
+        return sketch
+
+
+class ConstructionPlane(ApiObject):
+    def __init__(self, name):
+        self.name = name
+
+
+# B-rep
+
+class BRepEdge(ApiObject):
+    def __init__(self, geometry):
+        self.geometry = geometry
+
+
+class BRepEdges(ApiCollection):
+    pass
+
+
+class BRepFace(ApiObject):
+    def __init__(self, edges):
+        self.edges = BRepEdges(edges)
+
+
+class BRepFaces(ApiCollection):
+    pass
+
+
+class BRepBody(_Entity):
+    def __init__(self, component=None):
+        super().__init__()
+        self.parentComponent = component
+        self.name = ''
+        self.isVisible = True
+        self._edges = []
+
+    @property
+    def edges(self):
+        return BRepEdges(self._edges)
+
+    def deleteMe(self):
+        self._deleted = True
+        if self.parentComponent is not None:
+            self.parentComponent.bRepBodies._items.remove(self)
+        return True
+
+
+class BRepBodies(ApiCollection):
+    def __init__(self, component=None):
+        super().__init__()
+        self._component = component
+
+    def _add(self):
+        body = BRepBody(self._component)
+        self._items.append(body)
+        return body
+
+    def add(self, body, baseFeature=None):
+        newBody = self._add()
+        newBody._edges = list(body._edges)
+        return newBody
+
+
+class BRepVertexDefinition(ApiObject):
+    def __init__(self, position):
+        self.position = position
+
+
+class BRepEdgeDefinition(ApiObject):
+    def __init__(self, startVertex, endVertex, curve):
+        self.startVertex, self.endVertex, self.modelSpaceCurve = startVertex, endVertex, curve
+
+
+class BRepCoEdgeDefinitions(ApiCollection):
+    def add(self, edgeDefinition, isOpposedToEdge):
+        self._items.append((edgeDefinition, isOpposedToEdge))
+        return edgeDefinition
+
+
+class BRepLoopDefinition(ApiObject):
+    def __init__(self):
+        self.bRepCoEdgeDefinitions = BRepCoEdgeDefinitions()
+
+
+class BRepLoopDefinitions(ApiCollection):
+    def add(self):
+        loop = BRepLoopDefinition()
+        self._items.append(loop)
+        return loop
+
+
+class BRepFaceDefinition(ApiObject):
+    def __init__(self, surface, isParamReversed):
+        self.surfaceGeometry, self.isParamReversed = surface, isParamReversed
+        self.loopDefinitions = BRepLoopDefinitions()
+
+
+class BRepFaceDefinitions(ApiCollection):
+    def add(self, surfaceGeometry, isParamReversed):
+        face = BRepFaceDefinition(surfaceGeometry, isParamReversed)
+        self._items.append(face)
+        return face
+
+
+class BRepShellDefinition(ApiObject):
+    def __init__(self):
+        self.faceDefinitions = BRepFaceDefinitions()
+
+
+class BRepShellDefinitions(ApiCollection):
+    def add(self):
+        shell = BRepShellDefinition()
+        self._items.append(shell)
+        return shell
+
+
+class BRepLumpDefinition(ApiObject):
+    def __init__(self):
+        self.shellDefinitions = BRepShellDefinitions()
+
+
+class BRepLumpDefinitions(ApiCollection):
+    def add(self):
+        lump = BRepLumpDefinition()
+        self._items.append(lump)
+        return lump
+
+
+class BRepBodyDefinition(ApiObject):
+    def __init__(self):
+        self.lumpDefinitions = BRepLumpDefinitions()
+        self.doFullHealing = False
+        self._edges = []
+
+    @staticmethod
+    def create():
+        return BRepBodyDefinition()
+
+    def createVertexDefinition(self, position):
+        return BRepVertexDefinition(position.copy())
+
+    def createEdgeDefinitionByCurve(self, startVertex, endVertex, modelSpaceCurve):
+        edge = BRepEdgeDefinition(startVertex, endVertex, modelSpaceCurve)
+        self._edges.append(edge)
+        return edge
+
+    def createBody(self):
+        # A transient body with the edges that were defined.
+        body = BRepBody()
+        body._edges = [BRepEdge(edge.modelSpaceCurve) for edge in self._edges]
+        return body
+
+
+class TemporaryBRepManager(ApiObject):
+    _instance = None
+
+    @staticmethod
+    def get():
+        if TemporaryBRepManager._instance is None:
+            TemporaryBRepManager._instance = TemporaryBRepManager()
+        return TemporaryBRepManager._instance
+
+    def copy(self, body):
+        newBody = BRepBody()
+        newBody._edges = list(body._edges)
+        return newBody
+
+    def transform(self, body, transform):
+        body._transform = transform.copy()
+        return True
+
+
+# Features
+
+class Feature(_Entity):
+    def __init__(self, component, featureInput=None):
+        super().__init__()
+        self._component = component
+        self._input = featureInput
+        self.name = ''
+        self.timelineObject = component._design.timeline._add(self)
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    def deleteMe(self):
+        self._deleted = True
+        for collection in vars(self._component.features).values():
+            if self in collection._items:
+                collection._items.remove(self)
+        self.timelineObject._timeline._remove(self.timelineObject)
+        return True
+
+
+class ModelParameter(ApiObject):
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def expression(self):
+        return str(self.value)
+
+
+class DistanceExtentDefinition(ApiObject):
+    def __init__(self, distance):
+        self.distance = ModelParameter(distance.realValue)
+
+
+class ExtrudeFeatureInput(ApiObject):
+    def __init__(self, profile, operation):
+        self.profile, self.operation = profile, operation
+        self._distance = None
+
+    def setDistanceExtent(self, isSymmetric, distance):
+        self._distance = distance
+        return True
+
+
+class ExtrudeFeature(Feature):
+    def __init__(self, component, featureInput):
+        super().__init__(component, featureInput)
+        self.operation = featureInput.operation
+        self.extentOne = DistanceExtentDefinition(featureInput._distance)
+        # A base cylinder has an outer face, plus the hole face when there
+        # is a hole. The outer face has its two circles and, once teeth are
+        # joined, the lines between the cylinder and each tooth.
+        outer = BRepFace([BRepEdge(core.Circle3D(None, None, 0.0)), BRepEdge(core.Circle3D(None, None, 0.0)),
+                          BRepEdge(core.Line3D(None, None)), BRepEdge(core.Line3D(None, None))])
+        hole = BRepFace([BRepEdge(core.Circle3D(None, None, 0.0)), BRepEdge(core.Circle3D(None, None, 0.0))])
+        self.sideFaces = BRepFaces([hole, outer])
+        self.bodies = BRepBodies()
+        if self.operation == FeatureOperations.NewBodyFeatureOperation:
+            body = component.bRepBodies._add()
+            body._edges = self._body_edges(featureInput)
+            self.bodies._items.append(body)
+
+    @staticmethod
+    def _body_edges(featureInput):
+        # The edges along the extrusion, one where each curve of the profile
+        # starts, and the top and bottom edges of the circles.
+        sketch = featureInput.profile.parentSketch
+        height = featureInput._distance.realValue
+        edges = []
+        for curve in sketch._outline_curves():
+            start = curve.startSketchPoint.geometry
+            edges.append(BRepEdge(core.Line3D(core.Point3D(start.x, start.y, 0.0),
+                                              core.Point3D(start.x, start.y, height))))
+        for circle in sketch.sketchCurves.sketchCircles._items:
+            if not circle.isConstruction:
+                edges += [BRepEdge(core.Circle3D(None, None, circle.radius)),
+                          BRepEdge(core.Circle3D(None, None, circle.radius))]
+        return edges
+
+    def setDistanceExtent(self, isSymmetric, distance):
+        self.extentOne = DistanceExtentDefinition(distance)
+        return True
+
+
+class ExtrudeFeatures(ApiCollection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, profile, operation):
+        return ExtrudeFeatureInput(profile, operation)
+
+    def add(self, input):
+        feature = ExtrudeFeature(self._component, input)
+        self._items.append(feature)
+        return feature
+
+
+class FilletFeatureInput(ApiObject):
+    def __init__(self):
+        self._edge_sets = []
+
+    def addConstantRadiusEdgeSet(self, edges, radius, isTangentChain):
+        self._edge_sets.append((edges, radius, isTangentChain))
+        return True
+
+
+class FilletFeatures(ApiCollection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self):
+        return FilletFeatureInput()
+
+    def add(self, input):
+        feature = Feature(self._component, input)
+        self._items.append(feature)
+        return feature
+
+
+class CircularPatternFeatureInput(ApiObject):
+    def __init__(self, inputEntities, axis):
+        self.inputEntities, self.axis = inputEntities, axis
+        self.quantity = None
+        self.patternComputeOption = PatternComputeOptions.OptimizedPatternCompute
+
+
+class CircularPatternFeatures(ApiCollection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, inputEntities, axis):
+        return CircularPatternFeatureInput(inputEntities, axis)
+
+    def add(self, input):
+        feature = Feature(self._component, input)
+        self._items.append(feature)
+        return feature
+
+
+class MoveFeature(Feature):
+    @property
+    def transform(self):
+        return self._input[1].copy()
+
+
+class MoveFeatures(ApiCollection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, inputEntities, transform):
+        return (inputEntities, transform)
+
+    def add(self, input):
+        feature = MoveFeature(self._component, input)
+        self._items.append(feature)
+        return feature
+
+
+class BaseFeature(Feature):
+    def __init__(self, component):
+        super().__init__(component)
+        self._editing = False
+
+    def startEdit(self):
+        self._editing = True
+        return True
+
+    def finishEdit(self):
+        self._editing = False
+        return True
+
+
+class BaseFeatures(ApiCollection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self):
+        feature = BaseFeature(self._component)
+        self._items.append(feature)
+        return feature
+
+
+class Features(ApiObject):
+    def __init__(self, component):
+        self.baseFeatures = BaseFeatures(component)
+        self.extrudeFeatures = ExtrudeFeatures(component)
+        self.filletFeatures = FilletFeatures(component)
+        self.circularPatternFeatures = CircularPatternFeatures(component)
+        self.moveFeatures = MoveFeatures(component)
+
+
+# Custom graphics
+
+class CustomGraphicsCoordinates(ApiObject):
+    def __init__(self, coordinates):
+        self._coordinates = coordinates
+
+    @staticmethod
+    def create(coordinates):
+        return CustomGraphicsCoordinates(list(coordinates))
+
+    @property
+    def coordinateCount(self):
+        return len(self._coordinates) // 3
+
+
+class CustomGraphicsSolidColorEffect(ApiObject):
+    def __init__(self, color):
+        self.color = color
+
+    @staticmethod
+    def create(color):
+        return CustomGraphicsSolidColorEffect(color)
+
+
+class CustomGraphicsLines(ApiObject):
+    def __init__(self, coordinates, indexList, isLineStrip, lineStripLengths):
+        self.coordinates = coordinates
+        self.indexList = indexList
+        self.isLineStrip = isLineStrip
+        self.lineStripLengths = lineStripLengths
+        self.color = None
+        self.weight = 1
+
+
+class CustomGraphicsGroup(ApiCollection):
+    def __init__(self, groups):
+        super().__init__()
+        self._groups = groups
+        self._deleted = False
+
+    def addLines(self, coordinates, indexList, isLineStrip, lineStripLengths=None):
+        lines = CustomGraphicsLines(coordinates, indexList, isLineStrip, lineStripLengths or [])
+        self._items.append(lines)
+        return lines
+
+    def deleteMe(self):
+        self._deleted = True
+        self._groups._items.remove(self)
+        return True
+
+
+class CustomGraphicsGroups(ApiCollection):
+    def add(self):
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+
+# Components and the design
+
+class Occurrence(_Entity):
+    def __init__(self, occurrences, component, transform):
+        super().__init__()
+        self._occurrences = occurrences
+        self.component = component
+        self.transform = transform.copy()
+        self.isLightBulbOn = True
+        self.timelineObject = occurrences._design.timeline._add(self)
+
+    @property
+    def transform2(self):
+        return self.transform.copy()
+
+    @transform2.setter
+    def transform2(self, value):
+        self.transform = value.copy()
+
+    @property
+    def name(self):
+        return f'{self.component.name}:{self._occurrences._items.index(self) + 1}'
+
+    def deleteMe(self):
+        self._deleted = True
+        self._occurrences._items.remove(self)
+        self.timelineObject._timeline._remove(self.timelineObject)
+        return True
+
+
+class Occurrences(ApiCollection):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+
+    def addNewComponent(self, transform):
+        component = Component(self._design)
+        occurrence = Occurrence(self, component, transform)
+        self._items.append(occurrence)
+        return occurrence
+
+    def addExistingComponent(self, component, transform):
+        occurrence = Occurrence(self, component, transform)
+        self._items.append(occurrence)
+        return occurrence
+
+    @property
+    def asList(self):
+        return ApiCollection(self._items)
+
+
+class Component(_Entity):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+        self.name = ''
+        self.occurrences = Occurrences(design)
+        self.sketches = Sketches(self)
+        self.features = Features(self)
+        self.bRepBodies = BRepBodies(self)
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.xYConstructionPlane = ConstructionPlane('XY')
+        self.xZConstructionPlane = ConstructionPlane('XZ')
+        self.yZConstructionPlane = ConstructionPlane('YZ')
+        self.zAxis = None
+        design._components.append(self)
+
+    @property
+    def parentDesign(self):
+        return self._design
+
+    def allOccurrencesByComponent(self, component):
+        found = []
+        for occurrence in self.occurrences._items:
+            if occurrence.component is component:
+                found.append(occurrence)
+            found += occurrence.component.allOccurrencesByComponent(component)
+        return ApiCollection(found)
+
+
+class Snapshots(ApiCollection):
+    def add(self):
+        self._items.append(object())
+        return self._items[-1]
+
+
+class Design(ApiObject):
+    def __init__(self):
+        self._components = []
+        self.timeline = Timeline()
+        self.snapshots = Snapshots()
+        self.designType = DesignTypes.ParametricDesignType
+        self.rootComponent = Component(self)
+
+    @property
+    def allComponents(self):
+        return ApiCollection(self._components)
+
+    def _entities(self):
+        # Every entity of the design that can carry attributes or be found by token.
+        for component in self._components:
+            yield component
+            yield from component.occurrences._items
+            yield from component.bRepBodies._items
+            for sketch in component.sketches._items:
+                yield sketch
+                for curves in (sketch.sketchCurves.sketchCircles, sketch.sketchCurves.sketchArcs,
+                               sketch.sketchCurves.sketchLines):
+                    yield from curves._items
+
+    def findAttributes(self, groupName, attributeName):
+        found = []
+        for entity in self._entities():
+            if entity._attributes is not None:
+                found += [a for a in entity._attributes._items
+                          if a.groupName == groupName and a.name == attributeName]
+        return found
+
+    def findEntityByToken(self, entityToken):
+        return [entity for entity in self._entities() if entity._token == entityToken]
@@ -0,0 +1,229 @@
+"""Benchmarks the add-in's command_execute without Fusion 360.
+
+The add-in is loaded against the adsk stand-in in this folder and driven with
+synthetic selections of pitch circles. For each selection size the wall time
+and the number of API calls per gear are reported, along with the API calls
+made while the dialog reports the changed inputs, before execute.
+
+Usage:
+    python bench/run_benchmarks.py [--sizes 1 10 100 1000] [--repeat 3] [--instance] [--build-mode MODE]
+                                   [--output NAME] [--rerun N] [--json FILE]
+                                   [--max-calls-per-gear N] [--profile FILE]
+
+With --rerun the command is run once untimed, N of the circles are moved
+slightly, and the second run over the same selection is measured, which is
+the cost of an edit-run cycle. With --max-calls-per-gear the script exits with an error when any size makes
+more API calls per gear, which catches regressions in the hot path. With
+--profile the add-in's own run profiling is turned on and the phase breakdown
+of the last run is written to FILE; the profiling slows the runs down.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDIN_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import adsk  # noqa: E402
+import adsk.core  # noqa: E402
+import adsk.fusion  # noqa: E402
+
+ADDIN_PACKAGE = 'MultiSpurGear'
+
+# Tooth counts cycled through along each gear train, and the module in cm.
+TEETH = [12, 18, 24, 30, 18]
+MODULE = 0.1
+TRAIN_LENGTH = 20
+
+
+def load_addin(profile_file=None):
+    """Imports and runs the add-in the same way Fusion does and returns its command module."""
+    if ADDIN_PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            ADDIN_PACKAGE, os.path.join(ADDIN_DIR, 'MultiSpurGear.py'), submodule_search_locations=[ADDIN_DIR])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[ADDIN_PACKAGE] = module
+        spec.loader.exec_module(module)
+        module.run({})
+    config = sys.modules[f'{ADDIN_PACKAGE}.config']
+    config.PROFILE_CACHE_PERSIST = False
+    config.PROFILE_RUNS = profile_file is not None
+    config.PROFILE_REPORT_FILE = profile_file or ''
+    return sys.modules[f'{ADDIN_PACKAGE}.commands.multiSpurGear.entry']
+
+
+def make_sketch(design, x_dir, y_dir, origin=(0.0, 0.0, 0.0)):
+    """Creates a sketch in the root component with the given orientation."""
+    root = design.rootComponent
+    sketch = root.sketches.add(root.xYConstructionPlane)
+    (xx, xy, xz), (yx, yy, yz) = x_dir, y_dir
+    nx, ny, nz = xy * yz - xz * yy, xz * yx - xx * yz, xx * yy - xy * yx
+    transform = adsk.core.Matrix3D.create()
+    transform.setWithArray([xx, yx, nx, origin[0],
+                            xy, yy, ny, origin[1],
+                            xz, yz, nz, origin[2],
+                            0.0, 0.0, 0.0, 1.0])
+    sketch.transform = transform
+    return sketch
+
+
+def make_circles(design, count):
+    """Draws count pitch circles as straight gear trains of meshing gears.
+
+    Every other train is drawn on a sketch on the XZ plane, so plane changes
+    are part of the benchmark.
+    """
+    sketches = [make_sketch(design, (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)),
+                make_sketch(design, (1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -5.0, 0.0))]
+    row_pitch = 2.0 * (max(TEETH) + 2) * MODULE
+    circles = []
+    for n in range(count):
+        row, k = divmod(n, TRAIN_LENGTH)
+        teeth = TEETH[k % len(TEETH)]
+        if k == 0:
+            x = 0.0
+        else:
+            x += (TEETH[(k - 1) % len(TEETH)] + teeth) * MODULE / 2.0
+        sketch = sketches[row % 2]
+        center = adsk.core.Point3D.create(x, (row // 2) * row_pitch, 0.0)
+        circles.append(sketch.sketchCurves.sketchCircles.addByCenterRadius(center, teeth * MODULE / 2.0))
+    return circles
+
+
+def run_once(entry, count, instance, build_mode, rerun=None, output=None):
+    """Runs command_execute on a fresh design with count selected circles.
+
+    With rerun, the command is run once first and the last rerun circles are
+    moved before the measured run.
+    """
+    app = adsk.core.Application.get()
+    design = adsk.fusion.Design()
+    app.activeProduct = design
+    circles = make_circles(design, count)
+    if rerun is not None:
+        execute(entry, circles, instance, build_mode, output)
+        for circle in circles[len(circles) - rerun:]:
+            circle.centerSketchPoint.geometry.x += MODULE * 0.01
+    return execute(entry, circles, instance, build_mode, output)
+
+
+def execute(entry, circles, instance, build_mode, output=None):
+    """Runs command_execute once with the given circles selected.
+
+    Returns the time and the API calls of command_execute, and the number of
+    API calls made while the inputs were changed.
+    """
+    app = adsk.core.Application.get()
+    command = adsk.core.Command()
+    entry.command_created(adsk.core.CommandCreatedEventArgs(command))
+    inputs = command.commandInputs
+    selection = inputs.itemById('circles_select')
+    for circle in circles:
+        selection.addSelection(circle)
+    inputs.itemById('instance_gears').value = instance
+    if build_mode:
+        for item in inputs.itemById('build_mode').listItems:
+            item.isSelected = item.name == build_mode
+    if output:
+        for item in inputs.itemById('output').listItems:
+            item.isSelected = item.name == output
+    # The dialog reports every change of an input, which is when the add-in
+    # reads the selected circles.
+    adsk.reset_calls()
+    for input_id in ('circles_select', 'instance_gears', 'build_mode', 'output'):
+        command.inputChanged._fire(adsk.core.InputChangedEventArgs(inputs.itemById(input_id), inputs))
+    select_calls = sum(adsk.calls.values())
+    entry.profile_cache.clear()
+    app.userInterface.messages.clear()
+
+    adsk.reset_calls()
+    start = time.perf_counter()
+    entry.command_execute(adsk.core.CommandEventArgs(command))
+    # Large runs are built in chunks by custom events after execute returns.
+    adsk.doEvents()
+    elapsed = time.perf_counter() - start
+    calls = dict(adsk.calls)
+
+    entry.command_destroy(adsk.core.CommandEventArgs(command))
+    if app.userInterface.messages:
+        raise RuntimeError(f'command_execute reported: {app.userInterface.messages[0]}')
+    return elapsed, calls, select_calls
+
+
+def benchmark(sizes, repeat, instance, build_mode=None, profile_file=None, rerun=None, output=None):
+    entry = load_addin(profile_file)
+    results = []
+    for count in sizes:
+        times = []
+        calls = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                elapsed, calls, select_calls = run_once(entry, count, instance, build_mode,
+                                          min(rerun, count) if rerun is not None else None, output)
+                times.append(elapsed)
+        total_calls = sum(calls.values())
+        results.append({
+            'gears': count,
+            'seconds': min(times),
+            'ms_per_gear': min(times) / count * 1000.0,
+            'api_calls': total_calls,
+            'api_calls_per_gear': total_calls / count,
+            'select_api_calls': select_calls,
+            'top_calls': sorted(calls.items(), key=lambda item: -item[1])[:8],
+        })
+    return results
+
+
+def print_report(results):
+    print(f'{"gears":>6} {"seconds":>9} {"ms/gear":>9} {"API calls":>10} {"calls/gear":>11} {"select calls":>13}')
+    for r in results:
+        print(f'{r["gears"]:>6} {r["seconds"]:>9.4f} {r["ms_per_gear"]:>9.3f} {r["api_calls"]:>10} '
+              f'{r["api_calls_per_gear"]:>11.1f} {r["select_api_calls"]:>13}')
+    largest = results[-1]
+    print(f'\nMost frequent API calls for {largest["gears"]} gears:')
+    for name, count in largest['top_calls']:
+        print(f'  {count:>8}  {name}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='numbers of selected pitch circles to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per size, the fastest is reported')
+    parser.add_argument('--instance', action='store_true', help='enable "Reuse identical gears"')
+    parser.add_argument('--build-mode', metavar='MODE',
+                        help='name of the "Build mode" choice to use, such as "Tooth pattern"')
+    parser.add_argument('--output', metavar='NAME',
+                        help='name of the "Output" choice to use, such as "DXF file"; files go to the null device')
+    parser.add_argument('--rerun', type=int, metavar='N',
+                        help='measure a second run after moving N of the circles')
+    parser.add_argument('--json', metavar='FILE', help='also write the results to a JSON file')
+    parser.add_argument('--max-calls-per-gear', type=float, metavar='N',
+                        help='fail when a size makes more than N API calls per gear')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='write the per-phase profile of the last run to a JSON file')
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.sizes, args.repeat, args.instance, args.build_mode, args.profile, args.rerun,
+                        args.output)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_calls_per_gear is not None:
+        over = [r for r in results if r['api_calls_per_gear'] > args.max_calls_per_gear]
+        if over:
+            sys.exit(f'API calls per gear above {args.max_calls_per_gear}: '
+                     + ', '.join(f'{r["gears"]} gears: {r["api_calls_per_gear"]:.1f}' for r in over))
+
+
+if __name__ == '__main__':
+    main()
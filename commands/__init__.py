@@ -4,11 +4,13 @@
 # If you want to add an additional command, duplicate one of the existing directories and import it here.
 # You need to use aliases (import "entry" as "my_module") assuming you have the default module named "entry".
 from .multiSpurGear import entry as multiSpurGear
+from .editSpurGear import entry as editSpurGear
 
 # TODO add your imported modules to this list.
 # Fusion will automatically call the start() and stop() functions.
 commands = [
-    multiSpurGear
+    multiSpurGear,
+    editSpurGear
 ]
 
 
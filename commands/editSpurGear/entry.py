@@ -0,0 +1,245 @@
+import adsk.core, adsk.fusion
+import math
+import os
+from ...lib import fusion360utils as futil
+from ... import config
+from ..multiSpurGear.build_modes import BUILD_FAST_BODIES, BUILD_MODES, FLANK_ACCURACIES
+
+# The application and its user interface, fetched by start() rather than when
+# the add-in is imported.
+app = None
+ui = None
+
+# Imported when the command is first opened, see load_modules.
+readGearParams = updateGear = None
+
+
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_editCmdDialog'
+CMD_NAME = 'Edit spur Gear'
+CMD_Description = 'Change the values of existing spur gears in place.'
+
+IS_PROMOTED = False
+
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidScriptsAddinsPanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_cmdDialog'
+
+# The edit command shares the icons of the command that creates the gears.
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'multiSpurGear', 'resources', '')
+
+local_handlers = []
+
+# Gears built without history have no features to update, so their build
+# mode is not offered.
+EDIT_BUILD_MODES = {name: mode for name, mode in BUILD_MODES.items() if mode != BUILD_FAST_BODIES}
+
+# The inputs the user changed since the gears were selected. Only these are
+# applied, so editing several gears at once keeps their other values.
+edited_inputs = set()
+loading_inputs = False
+
+
+# Imports the functions that read and update the gears, once.
+def load_modules():
+    global readGearParams, updateGear
+    if readGearParams is None:
+        from ..multiSpurGear.spur_gear import readGearParams, updateGear
+
+
+# Executed when add-in is run.
+def start():
+    global app, ui
+    app = adsk.core.Application.get()
+    ui = app.userInterface
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+    if command_control:
+        command_control.deleteMe()
+
+    if command_definition:
+        command_definition.deleteMe()
+
+
+# Defines the dialog, which has the same values as the command that creates
+# the gears plus the number of teeth.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    load_modules()
+    inputs = args.command.commandInputs
+
+    sel_gears = inputs.addSelectionInput('gears_select', 'Gears', 'Select spur gears')
+    sel_gears.selectionFilters = ['Occurrences']
+    sel_gears.setSelectionLimits(1, 0)
+    inputs.addIntegerSpinnerCommandInput('num_teeth', 'Number of teeth', 4, 1000, 1, 12)
+    inputs.addValueInput('pressure_angle', 'Pressure angle', 'degree',  adsk.core.ValueInput.createByReal(math.radians(20.0)))
+    inputs.addValueInput('module', 'Module', 'mm',  adsk.core.ValueInput.createByReal(0.1))
+    inputs.addValueInput('backlash', 'Backlash', 'mm',  adsk.core.ValueInput.createByReal(0.0))
+    inputs.addValueInput('root_filter_rad', 'Root filter radius', 'mm',  adsk.core.ValueInput.createByReal(0.05))
+    inputs.addValueInput('thickness', 'Thickness', 'mm',  adsk.core.ValueInput.createByReal(0.1))
+    inputs.addValueInput('hole_diam', 'Hole diameter', 'mm',  adsk.core.ValueInput.createByReal(0.1))
+    accuracy = inputs.addDropDownCommandInput('flank_accuracy', 'Flank accuracy', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for name in FLANK_ACCURACIES:
+        accuracy.listItems.add(name, False, '')
+    build_mode = inputs.addDropDownCommandInput('build_mode', 'Build mode', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for name in EDIT_BUILD_MODES:
+        build_mode.listItems.add(name, False, '')
+
+    global loading_inputs
+    edited_inputs.clear()
+    loading_inputs = False
+
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.preSelect, command_pre_select, local_handlers=local_handlers)
+    futil.add_handler(args.command.validateInputs, command_validate_input, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# Updates every selected gear with the values the user changed.
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Execute Event')
+    inputs = args.command.commandInputs
+
+    updated = 0
+    for comp in selected_gears(inputs):
+        old_params = readGearParams(comp)
+        if old_params is None:
+            continue
+        new_params = old_params._replace(**edited_values(inputs))
+        try:
+            changed = updateGear(comp, old_params, new_params)
+        except Exception as error:
+            ui.messageBox(f'Failed to update {comp.name} : {error}')
+            continue
+        if changed:
+            updated += 1
+            futil.log(f'{CMD_NAME} {comp.name}: changed {", ".join(sorted(changed))}')
+    futil.log(f'{CMD_NAME} Updated {updated} gears')
+
+
+# The distinct gear components of the selected occurrences. Instances of a
+# gear share its component, so it is updated once.
+def selected_gears(inputs: adsk.core.CommandInputs):
+    sel_gears: adsk.core.SelectionCommandInput = inputs.itemById('gears_select')
+    comps = []
+    tokens = set()
+    for i in range(sel_gears.selectionCount):
+        occ = adsk.fusion.Occurrence.cast(sel_gears.selection(i).entity)
+        if occ is None:
+            continue
+        comp = occ.component
+        token = comp.entityToken
+        if token not in tokens:
+            tokens.add(token)
+            comps.append(comp)
+    return comps
+
+
+# The GearParams fields of the inputs the user changed.
+def edited_values(inputs: adsk.core.CommandInputs):
+    values = {}
+    if 'num_teeth' in edited_inputs:
+        values['num_teeth'] = inputs.itemById('num_teeth').value
+    if 'module' in edited_inputs:
+        values['diametral_pitch'] = 25.4 / inputs.itemById('module').value / 10.0
+    for input_id, field in (('pressure_angle', 'pressure_angle'), ('backlash', 'backlash'),
+                            ('root_filter_rad', 'root_fillet_radius'), ('thickness', 'thickness'),
+                            ('hole_diam', 'hole_diam')):
+        if input_id in edited_inputs:
+            values[field] = inputs.itemById(input_id).value
+    if 'flank_accuracy' in edited_inputs:
+        item = inputs.itemById('flank_accuracy').selectedItem
+        if item:
+            values['flank_tolerance'] = FLANK_ACCURACIES[item.name]
+    if 'build_mode' in edited_inputs:
+        item = inputs.itemById('build_mode').selectedItem
+        if item:
+            values['build_mode'] = EDIT_BUILD_MODES[item.name]
+    return values
+
+
+# Shows the values of the first selected gear in the dialog.
+def load_inputs(inputs: adsk.core.CommandInputs):
+    global loading_inputs
+    gears = selected_gears(inputs)
+    gear_params = readGearParams(gears[0]) if gears else None
+    if gear_params is None:
+        return
+
+    loading_inputs = True
+    try:
+        inputs.itemById('num_teeth').value = gear_params.num_teeth
+        inputs.itemById('module').value = 2.54 / gear_params.diametral_pitch
+        inputs.itemById('pressure_angle').value = gear_params.pressure_angle
+        inputs.itemById('backlash').value = gear_params.backlash
+        inputs.itemById('root_filter_rad').value = gear_params.root_fillet_radius
+        inputs.itemById('thickness').value = gear_params.thickness
+        inputs.itemById('hole_diam').value = gear_params.hole_diam
+        for item in inputs.itemById('flank_accuracy').listItems:
+            item.isSelected = FLANK_ACCURACIES[item.name] == gear_params.flank_tolerance
+        for item in inputs.itemById('build_mode').listItems:
+            item.isSelected = EDIT_BUILD_MODES[item.name] == gear_params.build_mode
+    finally:
+        loading_inputs = False
+
+
+# Loads the values of a newly selected gear, or records which value the user
+# changed.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+    if loading_inputs:
+        return
+    if changed_input.id == 'gears_select':
+        edited_inputs.clear()
+        load_inputs(args.inputs)
+    else:
+        edited_inputs.add(changed_input.id)
+
+
+# Only occurrences of gear components whose values can be read can be selected.
+def command_pre_select(args: adsk.core.SelectionEventArgs):
+    occ = adsk.fusion.Occurrence.cast(args.selection.entity)
+    if occ is None or readGearParams(occ.component) is None:
+        args.isSelectable = False
+
+
+def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    enflag = True
+    sel_gears: adsk.core.SelectionCommandInput = inputs.itemById('gears_select')
+    if sel_gears.selectionCount == 0:
+        enflag = False
+    if inputs.itemById('pressure_angle').value <= 0:
+        enflag = False
+    if inputs.itemById('module').value <= 0:
+        enflag = False
+    if inputs.itemById('backlash').value < 0:
+        enflag = False
+    if inputs.itemById('root_filter_rad').value < 0:
+        enflag = False
+    if inputs.itemById('thickness').value <= 0:
+        enflag = False
+    if inputs.itemById('hole_diam').value < 0:
+        enflag = False
+    args.areInputsValid = enflag
+
+
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    edited_inputs.clear()
+    local_handlers = []
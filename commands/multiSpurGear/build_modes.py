@@ -0,0 +1,28 @@
+# The choices shared by the dialogs of both commands. They live in a module
+# of their own so the dialogs can list them without loading the modules that
+# build the gears, or each other.
+
+# The ways the body of a gear can be built. A tooth pattern extrudes a base
+# cylinder and one tooth and patterns the tooth; a full sketch draws the whole
+# outline in one sketch and extrudes it once, which avoids the pattern feature.
+# Fast bodies skip the sketches and features altogether, see fast_gear.
+BUILD_TOOTH_PATTERN = 'toothPattern'
+BUILD_FULL_SKETCH = 'fullSketch'
+BUILD_FAST_BODIES = 'fastBodies'
+
+# How the body of each gear is built, by the name the dialogs show.
+BUILD_MODES = {
+    'Single sketch': BUILD_FULL_SKETCH,
+    'Tooth pattern': BUILD_TOOTH_PATTERN,
+    'Fast (no history)': BUILD_FAST_BODIES,
+}
+DEFAULT_BUILD_MODE = 'Single sketch'
+
+# Chord tolerance of the sampled involute flanks for each accuracy setting of
+# the dialogs, as a fraction of the module.
+FLANK_ACCURACIES = {
+    'Draft': 5e-3,
+    'Normal': 1e-3,
+    'Fine': 2e-4,
+}
+DEFAULT_FLANK_ACCURACY = 'Normal'
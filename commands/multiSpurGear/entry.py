@@ -1,10 +1,24 @@
-import adsk.core
+import adsk.core, adsk.fusion
+import math
 import os
+import time
 from ...lib import fusion360utils as futil
 from ... import config
-app = adsk.core.Application.get()
-ui = app.userInterface
-from .spur_gear import *
+from .build_modes import (BUILD_FAST_BODIES, BUILD_MODES, DEFAULT_BUILD_MODE, FLANK_ACCURACIES,
+                          DEFAULT_FLANK_ACCURACY)
+from . import instrument
+
+# The application and its user interface, fetched by start() rather than when
+# the add-in is imported.
+app = None
+ui = None
+
+# The modules that lay out, build and preview the gears. They are imported
+# when the command is first opened rather than when Fusion starts, see
+# load_modules.
+gearcore = None
+drawGear = gearAttributeValue = drawGearBodies = None
+GearPreview = GearSession = ChunkedJob = None
 
 
 # TODO *** Specify the command identity information. ***
@@ -30,9 +44,73 @@ ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource
 # they are not released and garbage collected.
 local_handlers = []
 
+# Custom event used to redraw the preview once the inputs settle.
+PREVIEW_EVENT_ID = f'{CMD_ID}_preview'
+gear_preview = None
+command_inputs = None
+
+# The state of the open dialog, see GearSession.
+gear_session = None
+
+# Custom event that builds the next chunk of gears of a large run, and the
+# run being built, see start_build_job. Runs with fewer gears are built at
+# once inside the command.
+BUILD_EVENT_ID = f'{CMD_ID}_build'
+CHUNKED_BUILD_GEARS = 50
+build_event = None
+build_job = None
+
+# Where the gears go: into the design, or as flat outlines into a DXF or SVG
+# file for cutting, without building any bodies.
+OUTPUT_DESIGN = 'design'
+OUTPUTS = {
+    'Design': OUTPUT_DESIGN,
+    'DXF file': 'dxf',
+    'SVG file': 'svg',
+}
+DEFAULT_OUTPUT = 'Design'
+
+# Rows of the dialog box that shows the checks of the meshing gears, and the
+# most failing meshes listed in it.
+ANALYSIS_ROWS = 6
+ANALYSIS_WARNINGS = 3
+
+# Tooth profiles shared by all runs of the command, made by load_modules. It
+# is filled from the persisted file the first time it is needed.
+profile_cache = None
+profile_cache_loaded = False
+
+# Number of tooth profiles computed in one job of the worker thread.
+PROFILE_CHUNK_SIZE = 8
+
+# The worker thread the tooth profiles are computed on while the main thread
+# reads the selection and the design, see layout_gears. The API is only used
+# from the main thread. All access to the profile cache during a run goes
+# through this single thread.
+compute_executor = None
+
+
+# Imports the modules that lay out, build and preview the gears, once.
+def load_modules():
+    global gearcore, drawGear, gearAttributeValue, drawGearBodies, GearPreview, GearSession, ChunkedJob
+    global profile_cache
+    if gearcore is not None:
+        return
+    from ...lib import gearcore
+    from .spur_gear import drawGear, gearAttributeValue
+    from .fast_gear import drawGearBodies
+    from .preview import GearPreview
+    from .session import GearSession
+    from .scheduler import ChunkedJob
+    profile_cache = gearcore.ProfileCache(config.PROFILE_CACHE_SIZE)
+
 
 # Executed when add-in is run.
 def start():
+    global app, ui
+    app = adsk.core.Application.get()
+    ui = app.userInterface
+
     # Create a command Definition.
     cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
 
@@ -69,12 +147,27 @@ def stop():
     if command_definition:
         command_definition.deleteMe()
 
+    global build_event
+    if build_job:
+        build_job.cancel()
+    if build_event:
+        app.unregisterCustomEvent(BUILD_EVENT_ID)
+        build_event = None
+
+    global compute_executor
+    if compute_executor:
+        compute_executor.shutdown(wait=True)
+        compute_executor = None
+
 
 # Function that is called when a user clicks the corresponding button in the UI.
 # This defines the contents of the command dialog and connects to the command related events.
 def command_created(args: adsk.core.CommandCreatedEventArgs):
     # General logging for debug.
     #futil.log(f'{CMD_NAME} Command Created Event')
+    started = time.perf_counter()
+    load_modules()
+    loaded = time.perf_counter()
 
     # https://help.autodesk.com/view/fusion360/ENU/?contextId=CommandInputs
     inputs = args.command.commandInputs
@@ -91,6 +184,18 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     inputs.addValueInput('root_filter_rad', 'Root filter radius', 'mm',  adsk.core.ValueInput.createByReal(0.05))
     inputs.addValueInput('thickness', 'Thickness', 'mm',  adsk.core.ValueInput.createByReal(0.1))
     inputs.addValueInput('hole_diam', 'Hole diameter', 'mm',  adsk.core.ValueInput.createByReal(0.1))
+    accuracy = inputs.addDropDownCommandInput('flank_accuracy', 'Flank accuracy', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for name in FLANK_ACCURACIES:
+        accuracy.listItems.add(name, name == DEFAULT_FLANK_ACCURACY, '')
+    build_mode = inputs.addDropDownCommandInput('build_mode', 'Build mode', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for name in BUILD_MODES:
+        build_mode.listItems.add(name, name == DEFAULT_BUILD_MODE, '')
+    inputs.addBoolValueInput('instance_gears', 'Reuse identical gears', True, '', False)
+    output = inputs.addDropDownCommandInput('output', 'Output', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for name in OUTPUTS:
+        output.listItems.add(name, name == DEFAULT_OUTPUT, '')
+    # checks of the meshing gears, filled in with the preview
+    inputs.addTextBoxCommandInput('analysis', 'Meshing', '', ANALYSIS_ROWS, True)
 
     # TODO Connect to the events that are needed by this command.
     futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
@@ -99,6 +204,20 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.add_handler(args.command.validateInputs, command_validate_input, local_handlers=local_handlers)
     futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
 
+    # The preview is drawn with custom graphics outside of the preview
+    # transaction, so unchanged gears don't have to be drawn again.
+    global gear_preview, command_inputs, gear_session
+    command_inputs = inputs
+    gear_session = GearSession(inputs)
+    gear_preview = GearPreview(PREVIEW_EVENT_ID)
+    app.unregisterCustomEvent(PREVIEW_EVENT_ID)
+    preview_event = app.registerCustomEvent(PREVIEW_EVENT_ID)
+    futil.add_handler(preview_event, command_preview_redraw, local_handlers=local_handlers)
+
+    if config.LOG_LATENCY:
+        futil.log(f'{CMD_NAME} Dialog created in {(time.perf_counter() - started) * 1000:.1f} ms, '
+                  f'{(loaded - started) * 1000:.1f} ms of it loading modules', force_console=True)
+
 
 # This event handler is called when the user clicks the OK button in the command dialog or 
 # is immediately called after the created event not command inputs were created for the dialog.
@@ -106,139 +225,449 @@ def command_execute(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Execute Event')
     des = adsk.fusion.Design.cast(app.activeProduct)
-    rootComp = des.rootComponent
-    features = rootComp.features
-
-    # TODO ******************************** Your code here ********************************
 
     # Get a reference to your command's inputs.
     inputs = args.command.commandInputs
-    sel_circles: adsk.core.SelectionCommandInput = inputs.itemById('circles_select')    
-    pressure_angle: adsk.core.ValueCommandInput = inputs.itemById('pressure_angle')
-    module: adsk.core.ValueCommandInput = inputs.itemById('module')
-    backlash: adsk.core.ValueCommandInput = inputs.itemById('backlash')
-    root_filter_rad: adsk.core.ValueCommandInput = inputs.itemById('root_filter_rad')
-    thickness: adsk.core.ValueCommandInput = inputs.itemById('thickness')
-    hole_diam: adsk.core.ValueCommandInput = inputs.itemById('hole_diam')
-
-    # create gear
-    cnt = sel_circles.selectionCount
-    ents = [sel_circles.selection(i).entity for i in range(sel_circles.selectionCount)]
-    
-    # param
-    val_pressure_angle = pressure_angle.value
-    val_module = 25.4 / module.value / 10.0
-    val_backlash = backlash.value
-    val_root_filter_rad = root_filter_rad.value
-    val_thickness = thickness.value
-    val_hole_diam = hole_diam.value
-
-    pxs = []
-    pys = []
-    pzs = []
-    sxs = []
-    sys = []
-    x_dirs = []
-    y_dirs = []
-    nxs = []
-    nys = []
-    nzs = []
-    rs = []
-    ts = []
-    angles = []
-    pairs = []
-
-    for ent in ents:
-        ent = adsk.fusion.SketchCircle.cast(ent)
-        r = ent.radius
-        rs.append(r)
-        t = round(r * 2.0 / module.value)
-        ts.append(t)
-        # get position
-        sxs.append(ent.centerSketchPoint.geometry.x)
-        sys.append(ent.centerSketchPoint.geometry.y)
-        pxs.append(ent.centerSketchPoint.worldGeometry.x)
-        pys.append(ent.centerSketchPoint.worldGeometry.y)
-        pzs.append(ent.centerSketchPoint.worldGeometry.z)
-        pairs.append(-1)
-        angles.append(0.0)
-        x_dir = ent.parentSketch.xDirection
-        y_dir = ent.parentSketch.yDirection
-        x_dirs.append(x_dir)
-        y_dirs.append(y_dir)
-        # calc norm
-        nx = x_dir.y * y_dir.z - x_dir.z * y_dir.y
-        ny = x_dir.z * y_dir.x - x_dir.x * y_dir.z
-        nz = x_dir.x * y_dir.y - x_dir.y * y_dir.x
-        ln = math.sqrt(nx * nx + ny * ny + nz * nz)
-        nx = nx / ln
-        ny = ny / ln
-        nz = nz / ln
-        #futil.log('nx{0},ny{1},nz{2}'.format(nx, ny, nz))
-        nxs.append(nx)
-        nys.append(ny)
-        nzs.append(nz)
-
-    
-    for i in range(1, len(ents)):
-        for j in range(0, i):
-            #futil.log('nxsi{0},nxsj{1},nysi{2},nysj{3},nzsi{4},nzsj{5}'.format(nxs[i],nxs[j],nys[i],nys[j],nzs[i],nzs[j]))
-            if nxs[i]==nxs[j] and nys[i]==nys[j] and nzs[i]==nzs[j]:
-                d = math.sqrt((sxs[i]-sxs[j])**2 + (sys[i]-sys[j])**2)
-                if round(d / module.value * 2.0) == (ts[i] + ts[j]):
-                    #futil.log('{0}pair{1}'.format(i,j))
-                    pairs[i] = j
-                    break
-                    
-    for i in range(len(ents)):
-        buf = drawGear(des, val_module, ts[i], val_thickness, val_root_filter_rad, val_pressure_angle, val_backlash, val_hole_diam)
-        gearComp = adsk.fusion.Component.cast(buf)
-
-        features = gearComp.features 
-        moveFeats = features.moveFeatures
-        target = adsk.core.ObjectCollection.create()
-        target.add(gearComp.bRepBodies.item(0))
-
-        # rotate
-        if pairs[i]!=-1:
-            j = pairs[i]
-            base_angle = -(angles[j] - math.pi / 2.0 / ts[j]) * ts[j] / ts[i] + math.pi / 2.0 / ts[i]
-            delta_angle = math.atan2(sys[i] - sys[j], sxs[i] - sxs[j])
-            rot_angle = delta_angle * (1 + ts[j] / ts[i])
-            angle = math.pi + base_angle + rot_angle
-            angles[i] = angle
-            #futil.log('angleA{0}'.format(angle))
+
+    # The gears of an earlier run are still being built.
+    if build_job is not None:
+        ui.messageBox(f'{CMD_NAME} is still building {build_job.count - build_job.done} gears of the last run. '
+                      'Stop it in its progress dialog or wait until it is done.')
+        return
+
+    # Time the phases of the run and count their API calls if profiling is on.
+    instrument.start(CMD_NAME, config.PROFILE_RUNS)
+    try:
+        build_gears(des, inputs)
+    finally:
+        report = instrument.finish()
+        if report:
+            instrument.emit(report, lambda message: futil.log(message, force_console=True),
+                            config.PROFILE_REPORT_FILE)
+
+
+# Lays out the selected gears and builds them in the design.
+def build_gears(des: adsk.fusion.Design, inputs: adsk.core.CommandInputs):
+    with instrument.phase('layout'):
+        layout = layout_gears(inputs, des, gear_session)
+    ts = layout.table.teeth
+
+    for i, j, error in layout.conflicts:
+        futil.log(f'{CMD_NAME} Gear {i + 1} ({ts[i]} teeth) cannot mesh with gear {j + 1} ({ts[j]} teeth) '
+                  f'in the same loop, off by {math.degrees(error):.3f} degrees',
+                  adsk.core.LogLevels.WarningLogLevel, True)
+    report_analysis(layout)
+
+    if layout.val_output != OUTPUT_DESIGN:
+        with instrument.phase('export'):
+            export_gears(layout, layout.val_output)
+    else:
+        with instrument.phase('build'):
+            if layout.val_build_mode == BUILD_FAST_BODIES:
+                build_gear_bodies(des, layout)
+            elif len(ts) >= CHUNKED_BUILD_GEARS and not config.PROFILE_RUNS:
+                # Profiled runs are built at once so the report covers them.
+                start_build_job(des, layout)
+                return
+            else:
+                build_gear_components(des, layout)
+    finish_build(layout)
+
+
+# Logs the statistics of the profile cache and saves it once the gears are built.
+def finish_build(layout: 'GearLayout'):
+    instrument.step('save_cache')
+    layout.profiles.wait()
+    stats = profile_cache.stats()
+    futil.log(f'{CMD_NAME} Profile cache: {stats["hits"]} hits, {stats["misses"]} misses, '
+              f'{stats["evictions"]} evictions, {stats["size"]}/{stats["max_size"]} profiles')
+    save_profile_cache()
+
+
+# Logs the checks of the meshing gears and every mesh that fails one.
+def report_analysis(layout: 'GearLayout'):
+    for line in gearcore.analysis_summary(layout.analysis, layout.table.teeth):
+        futil.log(f'{CMD_NAME} {line}')
+    for line in gearcore.analysis_warnings(layout.analysis, layout.table.teeth):
+        futil.log(f'{CMD_NAME} {line}', adsk.core.LogLevels.WarningLogLevel, True)
+
+
+# Shows the checks of the meshing gears in the dialog. The text is only set
+# when it changed, since setting it counts as an input change.
+def show_analysis(inputs: adsk.core.CommandInputs, layout: 'GearLayout'):
+    text_box: adsk.core.TextBoxCommandInput = inputs.itemById('analysis')
+    lines = gearcore.analysis_summary(layout.analysis, layout.table.teeth)
+    lines += gearcore.analysis_warnings(layout.analysis, layout.table.teeth, ANALYSIS_WARNINGS)
+    text = '<br>'.join(lines)
+    if text_box.formattedText != text:
+        text_box.formattedText = text
+
+
+# Writes the outlines of the gears, placed and phased in the plane of their
+# gear train, to a DXF or SVG file the user picks. Gears on different planes
+# go to different layers.
+def export_gears(layout: 'GearLayout', kind: str):
+    dialog = ui.createFileDialog()
+    dialog.title = f'Export gears as {kind.upper()}'
+    dialog.filter = f'{kind.upper()} files (*.{kind})'
+    if dialog.showSave() != adsk.core.DialogResults.DialogOK:
+        return
+    path = dialog.filename
+
+    table = layout.table
+    gears = table.placed_gears(layout.profiles, layout.val_hole_diam)
+    with open(path, 'w', newline='') as f:
+        if kind == 'dxf':
+            layers = [f'PLANE{plane + 1}' for plane in sorted(set(table.plane))]
+            count = gearcore.write_dxf(f, gears, layers=layers)
         else:
-            angle = math.pi / 2.0 / ts[i]
-            angles[i] = angle
-            #futil.log('angleB{0}'.format(angle))
-        rotTrans = adsk.core.Matrix3D.create()
-        rotTrans.setToRotateTo(adsk.core.Vector3D.create(1,0,0), adsk.core.Vector3D.create(math.cos(angle), math.sin(angle), 0.0))
-        moveFeatureInput = moveFeats.createInput(target, rotTrans)
-        moveFeats.add(moveFeatureInput)
-
-        # plane change
-        if nxs[i]!=0 or nys[i]!=0 or nzs[i]!=1:
-            rotTrans = adsk.core.Matrix3D.create()
-            rotTrans.setToRotateTo(adsk.core.Vector3D.create(0,0,1), adsk.core.Vector3D.create(nxs[i],nys[i],nzs[i]))
-            moveFeatureInput = moveFeats.createInput(target, rotTrans)
-            moveFeats.add(moveFeatureInput)
-
-        # transform
-        if pxs[i]!=0 or pys[i]!=0 or pzs[i]!=0:
-            moveTrans = adsk.core.Matrix3D.create()
-            vector = adsk.core.Vector3D.create(pxs[i], pys[i], pzs[i])
-            moveTrans.translation = vector
-            moveFeatureInput = moveFeats.createInput(target, moveTrans)
-            moveFeats.add(moveFeatureInput)
+            # With its size known the file is written as the gears are placed.
+            count = gearcore.write_svg(f, gears, table.bounds(layout.profiles))
+    futil.log(f'{CMD_NAME} Exported {count} gears to {path}')
+
+
+# Builds every gear as a component of its own with the sketches and features
+# of drawGear, each placed by its occurrence transform so no move features are
+# needed. Identical gears can share a single component.
+#
+# Gears built by an earlier run from the same pitch circles are kept: unchanged
+# gears are skipped, gears that only moved or turned get a new transform and
+# only the ones whose shape changed are built again.
+def build_gear_components(des: adsk.fusion.Design, layout: 'GearLayout'):
+    builder = ComponentBuilder(des, layout)
+    for i in range(len(layout.table)):
+        builder.build(i)
+    builder.finish()
+
+
+# Builds the gears of a layout one at a time, see build_gear_components.
+class ComponentBuilder:
+    def __init__(self, des: adsk.fusion.Design, layout: 'GearLayout'):
+        self.des = des
+        self.layout = layout
+        self.rootComp = des.rootComponent
+        self.gear_comps = {}
+        self.kept = self.moved = self.built = 0
+
+    # Builds, moves or keeps gear i.
+    def build(self, i):
+        des, layout, rootComp = self.des, self.layout, self.rootComp
+        ts = layout.table.teeth
+        existing = layout.existing[i]
+        if existing is not None and not existing.isValid:
+            # Deleted or undone while the job ran, so it is built again.
+            existing = None
+        if existing is not None and layout.clean[i]:
+            self.kept += 1
+            return
+        gearComp = self.gear_comps.get(ts[i])
+        with instrument.gear(i, teeth=ts[i], instance=gearComp is not None):
+            instrument.step('transform')
+            matrix = layout.matrix(i)
+            transform = adsk.core.Matrix3D.create()
+            transform.setWithArray(matrix)
+            source = gearcore.encode_source(layout.sources[i])
+            if existing is not None:
+                if layout.same_shape[i]:
+                    # Same gear, possibly at another place or phase. Gears of a
+                    # train that was phased again mostly keep their place.
+                    instrument.step('move')
+                    current = existing.transform2.asArray()
+                    if any(abs(a - b) > 1e-9 for a, b in zip(current, matrix)):
+                        existing.transform2 = transform
+                        self.moved += 1
+                    else:
+                        self.kept += 1
+                    existing.attributes.add('SpurGear', 'Source', source)
+                    if layout.val_instance_gears:
+                        self.gear_comps.setdefault(ts[i], existing.component)
+                    return
+                instrument.step('delete')
+                existing.deleteMe()
+            self.built += 1
+            if gearComp is None:
+                buf = drawGear(des, layout.val_module, ts[i], layout.val_thickness, layout.val_root_filter_rad,
+                               layout.val_pressure_angle, layout.val_backlash, layout.val_hole_diam, layout.profiles[ts[i]], transform,
+                               layout.val_build_mode, layout.val_flank_tolerance, source)
+                if buf is not None and layout.val_instance_gears:
+                    self.gear_comps[ts[i]] = adsk.fusion.Component.cast(buf)
+            else:
+                instrument.step('instance')
+                occ = rootComp.occurrences.addExistingComponent(gearComp, transform)
+                occ.attributes.add('SpurGear', 'Source', source)
+
+    # Captures the moved gears in the timeline and logs what was done.
+    def finish(self):
+        # Moved occurrences of a parametric design keep their new place only
+        # once it is captured in the timeline.
+        if self.moved and self.des.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+            instrument.step('snapshot')
+            self.des.snapshots.add()
+        futil.log(f'{CMD_NAME} {self.kept} gears unchanged, {self.moved} moved, {self.built} built')
+
+
+# Builds the gears of a large run in chunks, each in a custom event of its
+# own, with a progress dialog the run can be stopped from. A run only stops
+# between gears, so the timeline holds the complete timeline group of every
+# gear built, and moved gears are captured whether it was done or stopped.
+def start_build_job(des: adsk.fusion.Design, layout: 'GearLayout'):
+    global build_event, build_job
+    if build_event is None:
+        build_event = app.registerCustomEvent(BUILD_EVENT_ID)
+        futil.add_handler(build_event, command_build_chunk)
+    builder = ComponentBuilder(des, layout)
+
+    def finish(done, cancelled):
+        global build_job
+        build_job = None
+        builder.finish()
+        if cancelled:
+            futil.log(f'{CMD_NAME} Stopped after {done} of {len(layout.table)} gears',
+                      adsk.core.LogLevels.WarningLogLevel, True)
+        finish_build(layout)
+
+    build_job = ChunkedJob(BUILD_EVENT_ID, CMD_NAME, len(layout.table), builder.build, finish, 'gears')
+    build_job.start()
+
+
+# This event handler is called for every chunk of a large run, see start_build_job.
+def command_build_chunk(args: adsk.core.CustomEventArgs):
+    if build_job is not None:
+        build_job.run_chunk()
+
+
+# Builds all gears as bodies of one component without any parametric history,
+# see drawGearBodies. Every body keeps the SpurGear attribute.
+def build_gear_bodies(des: adsk.fusion.Design, layout: 'GearLayout'):
+    gears = []
+    for i, t in enumerate(layout.table.teeth):
+        transform = adsk.core.Matrix3D.create()
+        transform.setWithArray(layout.matrices[i])
+        value = gearAttributeValue(layout.val_module, t, layout.val_thickness, layout.val_root_filter_rad,
+                                   layout.val_pressure_angle, layout.val_backlash, layout.val_hole_diam,
+                                   layout.val_flank_tolerance, BUILD_FAST_BODIES)
+        gears.append((layout.profiles[t], transform, value))
+    try:
+        drawGearBodies(des, gears, layout.val_thickness, layout.val_hole_diam)
+    except Exception as error:
+        ui.messageBox('drawGearBodies Failed : ' + str(error))
+
+
+# The gears laid out from the selected pitch circles and the dialog values.
+# The table holds the circles with their teeth, planes and phase angles; it
+# and the per-gear lists are indexed in selection order. When the layout is
+# made for a design, existing holds the occurrence an earlier run built from
+# each circle, if any, and clean tells whether it is still up to date; the
+# matrices of clean gears are None since their trains are not phased again,
+# and matrix phases the train of such a gear when it has to be built after
+# all. Gears built without history are always built again.
+class GearLayout:
+    def __init__(self):
+        self.table = gearcore.GearTable()
+        self.graph = None
+        self.coords = []
+        self.order = []
+        self.matrices = []
+        self.conflicts = []
+        self.meshes = []
+        self.analysis = None
+        self.profiles = {}
+        self.sources = []
+        self.existing = []
+        self.clean = []
+        self.same_shape = []
+
+    # Returns the placement of gear i. The train of a clean gear is phased
+    # here, which gives the angles the earlier run placed it at since a train
+    # is always phased from the same root.
+    def matrix(self, i):
+        if self.matrices[i] is None:
+            table = self.table
+            trains = gearcore.train_components(self.graph)
+            active = [c == trains[i] for c in trains]
+            phases = gearcore.solve_phases(self.graph, table.teeth, self.coords, self.order, active=active)
+            for j, c in enumerate(phases.component):
+                if c != -1 and self.matrices[j] is None:
+                    table.angle[j] = phases.angles[j]
+                    self.matrices[j] = gearcore.placement_matrix(phases.angles[j], table.normal(j),
+                                                                 table.position(j))
+        return self.matrices[i]
+
+
+# Reads the selected circles and the values of the dialog, finds the meshing
+# gears and computes the tooth profile and placement of every gear. Given the
+# design, gears an earlier run built from the same circles are looked up and
+# only the gear trains with a changed gear are phased.
+def layout_gears(inputs: adsk.core.CommandInputs, des: adsk.fusion.Design = None,
+                 session: 'GearSession' = None) -> GearLayout:
+    # The circles and values come from the session of the dialog, which only
+    # reads circles that were selected since it was last brought up to date.
+    if session is None:
+        session = GearSession(inputs)
+    instrument.step('read_selection')
+    session.sync_selection(inputs.itemById('circles_select'))
+    values = session.values
+    layout = GearLayout()
 
+    # param
+    layout.val_pressure_angle = values['pressure_angle']
+    layout.val_module = 25.4 / values['module'] / 10.0
+    layout.val_backlash = values['backlash']
+    layout.val_root_filter_rad = values['root_filter_rad']
+    layout.val_thickness = values['thickness']
+    layout.val_hole_diam = values['hole_diam']
+    layout.val_flank_tolerance = FLANK_ACCURACIES[values['flank_accuracy'] or DEFAULT_FLANK_ACCURACY]
+    layout.val_build_mode = BUILD_MODES[values['build_mode'] or DEFAULT_BUILD_MODE]
+    layout.val_instance_gears = values['instance_gears']
+    layout.val_output = OUTPUTS[values['output'] or DEFAULT_OUTPUT]
+
+    # the table of the selected circles with their tooth counts and planes,
+    # the meshing gears and the gear train graph, kept by the session until
+    # the selection or the module changes
+    instrument.step('pairing')
+    circles = session.trains(values['module'])
+    table = circles.table
+    tokens, ts = table.tokens, table.teeth
+    planes, meshes, order, graph = circles.planes, circles.meshes, circles.order, circles.graph
+    layout.table = table
+    layout.meshes = meshes
+    layout.graph, layout.coords, layout.order = graph, planes.coords, order
+
+    # compute the tooth profiles of all distinct gears on the worker thread,
+    # in the order the gears are built
+    instrument.step('profiles')
+    teeth = sorted(set(ts))
+    layout.profiles = get_profiles_async(list(dict.fromkeys(ts)), layout.val_module, layout.val_pressure_angle,
+                                         layout.val_backlash, layout.val_root_filter_rad, layout.val_flank_tolerance)
+
+    # check the meshing pairs
+    instrument.step('analysis')
+    layout.analysis = gearcore.analyze_meshes(meshes, ts, planes.coords, layout.val_module,
+                                              layout.val_pressure_angle, layout.val_backlash)
+
+    # what each gear is made from, and the gears built from the same circles
+    # by earlier runs
+    instrument.step('sources')
+    shape_keys = {t: gearcore.values_key([t, layout.val_module, layout.val_pressure_angle, layout.val_backlash,
+                                          layout.val_root_filter_rad, layout.val_thickness, layout.val_hole_diam,
+                                          layout.val_flank_tolerance, layout.val_build_mode]) for t in teeth}
+    place_keys = [gearcore.values_key([ts[i], *table.position(i), *table.normal(i)]) for i in range(len(ts))]
+    trains = gearcore.train_components(graph)
+    members = {}
+    for i, c in enumerate(trains):
+        members.setdefault(c, []).append(place_keys[i])
+    train_keys = {c: gearcore.combined_key(keys) for c, keys in members.items()}
+    layout.sources = [gearcore.GearSource(tokens[i], shape_keys[ts[i]], place_keys[i], train_keys[trains[i]])
+                      for i in range(len(ts))]
+    active = None
+    if des is not None and layout.val_output == OUTPUT_DESIGN and layout.val_build_mode != BUILD_FAST_BODIES:
+        layout.existing, previous = find_existing_gears(des, tokens)
+        layout.same_shape = [old is not None and old.shape == new.shape for old, new in zip(previous, layout.sources)]
+        layout.clean = [old == new for old, new in zip(previous, layout.sources)]
+        active = [not clean for clean in layout.clean]
+
+    # phase angles, propagated through every gear train from its largest gear
+    instrument.step('phasing')
+    phases = gearcore.solve_phases(graph, ts, planes.coords, order, active=active)
+    table.set_phases(phases)
+    layout.conflicts = phases.conflicts
+    layout.matrices = [table.matrix(i) for i in range(len(ts))]
+    return layout
+
+
+# Finds the gear occurrences built from the given pitch circles by earlier
+# runs. Returns the occurrence and its GearSource for each circle, or None.
+def find_existing_gears(des: adsk.fusion.Design, tokens):
+    index = {token: i for i, token in enumerate(tokens)}
+    occurrences = [None] * len(tokens)
+    sources = [None] * len(tokens)
+    for attrib in des.findAttributes('SpurGear', 'Source'):
+        occ = adsk.fusion.Occurrence.cast(attrib.parent)
+        source = gearcore.decode_source(attrib.value)
+        if occ is None or source is None:
+            continue
+        i = index.get(source.token)
+        if i is None:
+            # Tokens of the same entity can differ between sessions.
+            entities = des.findEntityByToken(source.token)
+            if not entities:
+                continue
+            i = index.get(entities[0].entityToken)
+            if i is None:
+                continue
+        if occurrences[i] is None:
+            occurrences[i] = occ
+            sources[i] = source._replace(token=tokens[i])
+    return occurrences, sources
+
+
+# Returns the tooth profiles of the given gears from the profile cache, with
+# the flanks sampled to the given chord tolerance.
+def get_profiles(specs, tolerance):
+    global profile_cache_loaded
+    if not profile_cache_loaded:
+        profile_cache_loaded = True
+        if config.PROFILE_CACHE_PERSIST:
+            profile_cache.load(config.PROFILE_CACHE_FILE)
+
+    return profile_cache.get_many(specs, tolerance=tolerance)
+
+
+# Starts computing the tooth profiles of the given numbers of teeth on the
+# worker thread. Returns a mapping from the number of teeth to the profile
+# whose lookups wait for the profile, so the first gears can be built while
+# the profiles of the others are still being computed.
+def get_profiles_async(teeth, diametral_pitch, pressure_angle, backlash, fillet_radius, tolerance):
+    global compute_executor
+    if compute_executor is None:
+        compute_executor = gearcore.make_executor(1, processes=False)
+
+    def compute(chunk):
+        specs = [gearcore.GearSpec(diametral_pitch, t, pressure_angle, backlash, fillet_radius) for t in chunk]
+        return get_profiles(specs, tolerance)
+    return gearcore.FutureMap(compute_executor, compute, teeth, PROFILE_CHUNK_SIZE)
+
+
+# Writes the profile cache to the add-in folder if it changed.
+def save_profile_cache():
+    if config.PROFILE_CACHE_PERSIST and profile_cache.is_dirty:
+        try:
+            profile_cache.save(config.PROFILE_CACHE_FILE)
+        except OSError:
+            futil.log(f'{CMD_NAME} Failed to save the profile cache to {config.PROFILE_CACHE_FILE}')
 
 
 # This event handler is called when the command needs to compute a new preview in the graphics window.
 def command_preview(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     #futil.log(f'{CMD_NAME} Command Preview Event')
-    inputs = args.command.commandInputs
+
+    # No features are created for the preview. The outlines are drawn once the
+    # inputs stop changing, see command_preview_redraw.
+    if gear_preview:
+        gear_preview.schedule()
+
+
+# This event handler is called from the preview timer and redraws the gears
+# whose inputs changed since the last redraw.
+def command_preview_redraw(args: adsk.core.CustomEventArgs):
+    if gear_preview is None or gear_preview.is_stale():
+        return
+    # The inputs may have become invalid since the redraw was scheduled.
+    gear_session.sync_selection(command_inputs.itemById('circles_select'))
+    if not inputs_valid(gear_session):
+        return
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    layout = layout_gears(command_inputs, None, gear_session)
+    params = (layout.val_module, layout.val_pressure_angle, layout.val_backlash, layout.val_root_filter_rad,
+              layout.val_flank_tolerance)
+    gears = []
+    for i, t in enumerate(layout.table.teeth):
+        key = (layout.table.tokens[i], t, params, tuple(round(v, 9) for v in layout.matrices[i]))
+        gears.append((key, layout.matrices[i], layout.profiles[t]))
+    gear_preview.update(des.rootComponent, gears)
+    app.activeViewport.refresh()
+    show_analysis(command_inputs, layout)
 
 
 # This event handler is called when the user changes anything in the command dialog
@@ -250,6 +679,14 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
     # General logging for debug.
     #futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
 
+    # Keep the session up to date, so nothing has to be read again later.
+    if gear_session is None:
+        return
+    if changed_input.id == 'circles_select':
+        gear_session.sync_selection(adsk.core.SelectionCommandInput.cast(changed_input))
+    else:
+        gear_session.update_value(changed_input)
+
 
 # This event handler is called when the user interacts with any of the inputs in the dialog
 # which allows you to verify that all of the inputs are valid and enables the OK button.
@@ -257,39 +694,34 @@ def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
     # General logging for debug.
     #futil.log(f'{CMD_NAME} Validate Input Event')
 
-    inputs = args.inputs
-    enflag = True
-    # inputs
-    sel_circles: adsk.core.SelectionCommandInput = inputs.itemById('circles_select')    
-    pressure_angle: adsk.core.ValueCommandInput = inputs.itemById('pressure_angle')
-    module: adsk.core.ValueCommandInput = inputs.itemById('module')
-    backlash: adsk.core.ValueCommandInput = inputs.itemById('backlash')
-    root_filter_rad: adsk.core.ValueCommandInput = inputs.itemById('root_filter_rad')
-    thickness: adsk.core.ValueCommandInput = inputs.itemById('thickness')
-    hole_diam: adsk.core.ValueCommandInput = inputs.itemById('hole_diam')
-    # check
-    if sel_circles.selectionCount == 0:
-        enflag = False
-    if pressure_angle.value <= 0:
-        enflag = False
-    if module.value <= 0:    
-        enflag = False
-    if backlash.value < 0:    
-        enflag = False
-    if root_filter_rad.value < 0:    
-        enflag = False
-    if thickness.value <= 0:    
-        enflag = False
-    if hole_diam.value <= 0:    
-        enflag = False
+    # inputs, as kept by the session
+    if gear_session is None:
+        args.areInputsValid = False
+        return
+    # the input changed event may not have been fired for the selection yet
+    gear_session.sync_selection(args.inputs.itemById('circles_select'))
     # enable
-    args.areInputsValid = enflag
-        
+    args.areInputsValid = inputs_valid(gear_session)
+
+
+# Whether the circles and values kept by the session make gears.
+def inputs_valid(session: 'GearSession'):
+    values = session.values
+    return (bool(session.tokens) and values['pressure_angle'] > 0 and values['module'] > 0
+            and values['backlash'] >= 0 and values['root_filter_rad'] >= 0 and values['thickness'] > 0
+            and values['hole_diam'] > 0)
+
 
 # This event handler is called when the command terminates.
 def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
-    global local_handlers
+    global local_handlers, gear_preview, command_inputs, gear_session
+    if gear_preview:
+        gear_preview.clear()
+        gear_preview = None
+    command_inputs = None
+    gear_session = None
+    app.unregisterCustomEvent(PREVIEW_EVENT_ID)
     local_handlers = []
@@ -0,0 +1,172 @@
+import adsk.core, adsk.fusion
+from ...lib.gearcore import geometry
+from . import instrument
+
+# Fast mode builds the gear bodies in memory instead of with sketches and
+# features. The body of each distinct gear is defined face by face from its
+# outline, copied and moved into place with the temporary B-rep manager, and
+# all bodies of a run are inserted in a single base feature, so the timeline
+# gets one entry for the whole run.
+
+
+# Builds the bodies of the given gears in a new component. Each gear is a
+# tuple of its tooth profile, its placement Matrix3D and the value of its
+# SpurGear attribute.
+def drawGearBodies(design, gears, thickness, holeDiam):
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+
+    instrument.step('component')
+    occ = design.rootComponent.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+    comp = adsk.fusion.Component.cast(occ.component)
+    comp.name = 'Spur Gears'
+
+    # Base features only exist in parametric designs. In a direct design the
+    # bodies are added to the component as they are.
+    baseFeature = None
+    if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        baseFeature = comp.features.baseFeatures.add()
+        baseFeature.startEdit()
+
+    templates = {}
+    bodies = comp.bRepBodies
+    try:
+        for index, (profile, transform, attributeValue) in enumerate(gears):
+            with instrument.gear(index, teeth=profile.num_teeth, instance=id(profile) in templates):
+                # Define the body of each distinct gear once, at the origin.
+                instrument.step('body')
+                template = templates.get(id(profile))
+                if template is None:
+                    template = templates[id(profile)] = gearBody(profile, thickness, holeDiam)
+
+                instrument.step('place')
+                body = tempBRep.copy(template)
+                tempBRep.transform(body, transform)
+
+                instrument.step('insert')
+                newBody = bodies.add(body, baseFeature) if baseFeature else bodies.add(body)
+                newBody.name = 'Spur Gear (' + str(profile.num_teeth) + ' teeth)'
+                newBody.attributes.add('SpurGear', 'Values', attributeValue)
+    finally:
+        if baseFeature:
+            instrument.step('finish_edit')
+            baseFeature.finishEdit()
+    return comp
+
+
+# Defines the solid of a gear by extruding its outline, with the hole if
+# there is one, along Z. Every outline segment becomes a side face; the
+# outline runs counter-clockwise, so the material is on the left of it.
+def gearBody(profile, thickness, holeDiam):
+    segments = geometry.gear_outline(profile)
+    count = len(segments)
+    bodyDef = adsk.fusion.BRepBodyDefinition.create()
+    shellDef = bodyDef.lumpDefinitions.add().shellDefinitions.add()
+
+    # A vertex at the start of every segment at the bottom and at the top,
+    # joined by a vertical edge.
+    bottomVertices = []
+    topVertices = []
+    verticals = []
+    for segment in segments:
+        x, y = segment.points[0]
+        bottom = bodyDef.createVertexDefinition(adsk.core.Point3D.create(x, y, 0))
+        top = bodyDef.createVertexDefinition(adsk.core.Point3D.create(x, y, thickness))
+        bottomVertices.append(bottom)
+        topVertices.append(top)
+        verticals.append(bodyDef.createEdgeDefinitionByCurve(bottom, top, adsk.core.Line3D.create(
+            adsk.core.Point3D.create(x, y, 0), adsk.core.Point3D.create(x, y, thickness))))
+
+    # The side faces, bounded by the segment at the bottom, the vertical edge
+    # at its end, the segment at the top and the vertical edge at its start.
+    bottomEdges = []
+    topEdges = []
+    for index, segment in enumerate(segments):
+        following = (index + 1) % count
+        bottomEdge = bodyDef.createEdgeDefinitionByCurve(
+            bottomVertices[index], bottomVertices[following], segmentCurve(segment, 0))
+        topEdge = bodyDef.createEdgeDefinitionByCurve(
+            topVertices[index], topVertices[following], segmentCurve(segment, thickness))
+        bottomEdges.append(bottomEdge)
+        topEdges.append(topEdge)
+
+        surface, isReversed = sideSurface(segment, thickness)
+        loop = shellDef.faceDefinitions.add(surface, isReversed).loopDefinitions.add()
+        coEdges = loop.bRepCoEdgeDefinitions
+        coEdges.add(bottomEdge, False)
+        coEdges.add(verticals[following], False)
+        coEdges.add(topEdge, True)
+        coEdges.add(verticals[index], True)
+
+    zAxis = adsk.core.Vector3D.create(0, 0, 1)
+    bottomFace = shellDef.faceDefinitions.add(adsk.core.Plane.create(adsk.core.Point3D.create(0, 0, 0), zAxis), True)
+    topFace = shellDef.faceDefinitions.add(adsk.core.Plane.create(adsk.core.Point3D.create(0, 0, thickness), zAxis), False)
+    bottomLoop = bottomFace.loopDefinitions.add().bRepCoEdgeDefinitions
+    for edge in reversed(bottomEdges):
+        bottomLoop.add(edge, True)
+    topLoop = topFace.loopDefinitions.add().bRepCoEdgeDefinitions
+    for edge in topEdges:
+        topLoop.add(edge, False)
+
+    # The hole is a cylinder bounded by a circle in each cap.
+    radius = holeDiam / 2.0
+    if radius > adsk.core.Application.get().pointTolerance:
+        holeEdges = []
+        for z in (0, thickness):
+            vertex = bodyDef.createVertexDefinition(adsk.core.Point3D.create(radius, 0, z))
+            circle = adsk.core.Circle3D.createByCenter(adsk.core.Point3D.create(0, 0, z), zAxis, radius)
+            holeEdges.append(bodyDef.createEdgeDefinitionByCurve(vertex, vertex, circle))
+        bottomFace.loopDefinitions.add().bRepCoEdgeDefinitions.add(holeEdges[0], False)
+        topFace.loopDefinitions.add().bRepCoEdgeDefinitions.add(holeEdges[1], True)
+        holeFace = shellDef.faceDefinitions.add(
+            adsk.core.Cylinder.create(adsk.core.Point3D.create(0, 0, 0), zAxis, radius), True)
+        holeFace.loopDefinitions.add().bRepCoEdgeDefinitions.add(holeEdges[0], True)
+        holeFace.loopDefinitions.add().bRepCoEdgeDefinitions.add(holeEdges[1], False)
+
+    # Let the modeler fix up tolerances and orientations it disagrees with.
+    bodyDef.doFullHealing = True
+    return bodyDef.createBody()
+
+
+# The curve of an outline segment at the given height.
+def segmentCurve(segment, z):
+    if segment.kind == 'line':
+        (x0, y0), (x1, y1) = segment.points[0], segment.points[-1]
+        return adsk.core.Line3D.create(adsk.core.Point3D.create(x0, y0, z), adsk.core.Point3D.create(x1, y1, z))
+    if segment.kind == 'arc':
+        start, middle, end = [adsk.core.Point3D.create(x, y, z) for x, y in
+                              (segment.points[0], segment.points[1], segment.points[-1])]
+        return adsk.core.Arc3D.createByThreePoints(start, middle, end)
+    spline = segment.spline
+    controlPoints = [adsk.core.Point3D.create(x, y, z) for x, y in spline.control_points]
+    return adsk.core.NurbsCurve3D.createNonRational(controlPoints, spline.degree, spline.knots, False)
+
+
+# The surface of the side face swept by an outline segment, and whether its
+# normal points into the material.
+def sideSurface(segment, thickness):
+    (x0, y0), (x1, y1) = segment.points[0], segment.points[-1]
+    if segment.kind == 'line':
+        # The outward normal is on the right of the direction of the line.
+        normal = adsk.core.Vector3D.create(y1 - y0, x0 - x1, 0)
+        normal.normalize()
+        return adsk.core.Plane.create(adsk.core.Point3D.create(x0, y0, 0), normal), False
+    if segment.kind == 'arc':
+        xm, ym = segment.points[1]
+        (cx, cy), radius = geometry.arc_center((x0, y0), (xm, ym), (x1, y1))
+        cylinder = adsk.core.Cylinder.create(adsk.core.Point3D.create(cx, cy, 0), adsk.core.Vector3D.create(0, 0, 1), radius)
+        # Normals of a cylinder point away from its axis, which is outward
+        # unless the arc turns clockwise, like the root fillets do.
+        clockwise = (xm - x0) * (y1 - y0) - (ym - y0) * (x1 - x0) < 0
+        return cylinder, clockwise
+
+    # The flank is ruled along Z: the spline runs along U at the bottom and the
+    # top, which makes the normal U x V point outward.
+    spline = segment.spline
+    controlPoints = []
+    for x, y in spline.control_points:
+        controlPoints.append(adsk.core.Point3D.create(x, y, 0))
+        controlPoints.append(adsk.core.Point3D.create(x, y, thickness))
+    properties = adsk.core.NurbsSurfaceProperties.OpenNurbsSurface
+    surface = adsk.core.NurbsSurface.create(spline.degree, 1, len(spline.control_points), 2, controlPoints,
+                                            spline.knots, [0.0, 0.0, 1.0, 1.0], [], properties, properties)
+    return surface, False
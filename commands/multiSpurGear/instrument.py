@@ -0,0 +1,221 @@
+import json
+import sys
+import time
+from collections import Counter
+
+# Opt-in timing and API call counting for a run of the command.
+#
+# start() begins recording, phase(), step() and gear() mark the parts of the
+# run and finish() returns the report. While nothing is recording, phase() and
+# gear() return a shared no-op context manager and step() returns at once, so
+# instrumented code costs a function call per phase and nothing else.
+
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL = _NullContext()
+_active = None
+
+
+# The module of a function called through the profile hook, for both Python
+# functions and builtins of the compiled adsk modules.
+def _builtin_module(func):
+    module = getattr(func, '__module__', None)
+    if module is None:
+        module = type(getattr(func, '__self__', None)).__module__
+    return module or ''
+
+
+class _Phase:
+    __slots__ = ('run', 'name', 'depth')
+
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+        self.depth = 0
+
+    def __enter__(self):
+        self.depth = self.run._enter(self.name)
+        return self
+
+    def __exit__(self, *args):
+        self.run._exit(self.depth)
+        return False
+
+
+class _Gear:
+    __slots__ = ('run', 'record')
+
+    def __init__(self, run, record):
+        self.run = run
+        self.record = record
+
+    def __enter__(self):
+        self.run._gear = self.record
+        self.record['_start'] = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.run._end_step()
+        self.record['seconds'] = time.perf_counter() - self.record.pop('_start')
+        self.run._gear = None
+        return False
+
+
+# The timings and API call counts of one run.
+class RunProfile:
+    def __init__(self, name):
+        self.name = name
+        self.phases = {}
+        self.gears = []
+        self.api_calls = Counter()
+        self._stack = []
+        self._gear = None
+        self._step = None
+        self._start = time.perf_counter()
+        self._seconds = None
+
+    def _enter(self, name):
+        self._stack.append((name, time.perf_counter()))
+        return len(self._stack)
+
+    # Closes the phase at depth together with any step left open inside it.
+    def _exit(self, depth):
+        while len(self._stack) >= depth:
+            name, start = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            for entry in self._entries(name):
+                entry['seconds'] += elapsed
+                entry['count'] += 1
+        if self._step is not None and self._step > len(self._stack):
+            self._step = None
+
+    def _end_step(self):
+        if self._step is not None:
+            self._exit(self._step)
+
+    # The totals of a phase for the whole run and for the gear being built.
+    def _entries(self, name):
+        entries = []
+        for phases in (self.phases, self._gear['phases'] if self._gear is not None else None):
+            if phases is not None:
+                entry = phases.get(name)
+                if entry is None:
+                    entry = phases[name] = {'seconds': 0.0, 'count': 0, 'api_calls': 0}
+                entries.append(entry)
+        return entries
+
+    def _count_call(self, name):
+        self.api_calls[name] += 1
+        if self._stack:
+            for entry in self._entries(self._stack[-1][0]):
+                entry['api_calls'] += 1
+        if self._gear is not None:
+            self._gear['api_calls'] += 1
+
+    # Profile hook counting the calls into the adsk modules made from outside of
+    # them. Special methods are not API calls and are skipped.
+    def _profile(self, frame, event, arg):
+        if event == 'call':
+            module = frame.f_globals.get('__name__', '')
+            if not module.startswith('adsk') or frame.f_code.co_name.startswith('__'):
+                return
+            caller = frame.f_back
+            if caller is None or caller.f_globals.get('__name__', '').startswith('adsk'):
+                return
+            code = frame.f_code
+            self._count_call(getattr(code, 'co_qualname', code.co_name))
+        elif event == 'c_call':
+            if not _builtin_module(arg).startswith('adsk'):
+                return
+            if frame.f_globals.get('__name__', '').startswith('adsk'):
+                return
+            self._count_call(getattr(arg, '__qualname__', arg.__name__))
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    # Ends the current step, if any, and starts the next one. Steps time the
+    # consecutive parts of a long function without nesting it in with blocks.
+    def step(self, name):
+        self._end_step()
+        self._step = self._enter(name)
+
+    def gear(self, index, **info):
+        record = {'index': index, **info, 'seconds': 0.0, 'api_calls': 0, 'phases': {}}
+        self.gears.append(record)
+        return _Gear(self, record)
+
+    def stop(self):
+        if self._stack:
+            self._exit(1)
+        self._seconds = time.perf_counter() - self._start
+
+    def report(self):
+        if self._seconds is None:
+            self.stop()
+        return {
+            'name': self.name,
+            'seconds': self._seconds,
+            'api_calls': sum(self.api_calls.values()),
+            'phases': self.phases,
+            'gears': self.gears,
+            'api_calls_by_name': dict(self.api_calls.most_common()),
+        }
+
+
+# Starts recording a run. Nothing is recorded unless enabled is True.
+def start(name, enabled=True):
+    global _active
+    finish()
+    if not enabled:
+        return None
+    _active = RunProfile(name)
+    sys.setprofile(_active._profile)
+    return _active
+
+
+# Stops recording and returns the report of the run, or None if nothing was recorded.
+def finish():
+    global _active
+    run = _active
+    if run is None:
+        return None
+    sys.setprofile(None)
+    _active = None
+    run.stop()
+    return run.report()
+
+
+# Times a phase of the run. Phases can be nested; API calls are counted in
+# the innermost one.
+def phase(name):
+    return _active.phase(name) if _active is not None else _NULL
+
+
+# Ends the current step and starts the next one.
+def step(name):
+    if _active is not None:
+        _active.step(name)
+
+
+# Collects the phases and API calls made while building one gear.
+def gear(index, **info):
+    return _active.gear(index, **info) if _active is not None else _NULL
+
+
+# Writes the report to a file, or to the text command window if no file is given.
+def emit(report, log, path=''):
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text)
+        log(f'Run profile written to {path}')
+    else:
+        log(text)
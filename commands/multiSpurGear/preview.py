@@ -0,0 +1,93 @@
+import adsk.core, adsk.fusion
+import threading
+import time
+from ...lib.gearcore import geometry
+
+# Delay, in seconds, after the last input change before the preview is redrawn.
+DEBOUNCE_DELAY = 0.25
+
+PREVIEW_COLOR = (255, 128, 0)
+
+
+# Transforms 2D gear points with a row-major placement matrix into a flat list of world coordinates.
+def _world_coordinates(points, m):
+    coords = []
+    for x, y in points:
+        coords.append(m[0] * x + m[1] * y + m[3])
+        coords.append(m[4] * x + m[5] * y + m[7])
+        coords.append(m[8] * x + m[9] * y + m[11])
+    return coords
+
+
+# Draws tooth outlines and pitch circles of the gears with custom graphics.
+# Each gear is drawn in its own graphics group, keyed by everything that
+# affects its shape and placement, so only gears that changed are redrawn.
+class GearPreview:
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self._groups = {}
+        self._outlines = {}
+        self._timer = None
+        self._last_request = 0.0
+
+    # Requests a redraw. The custom event is fired once the inputs have not
+    # changed for DEBOUNCE_DELAY seconds.
+    def schedule(self):
+        self._last_request = time.perf_counter()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(DEBOUNCE_DELAY, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    # True if the inputs changed again since the redraw was requested.
+    def is_stale(self):
+        return time.perf_counter() - self._last_request < DEBOUNCE_DELAY * 0.9
+
+    def _fire(self):
+        adsk.core.Application.get().fireCustomEvent(self.event_id, '')
+
+    # Updates the graphics to show the given gears.
+    #
+    # component -- The component the graphics are added to.
+    # gears -- (key, placement matrix, tooth profile) for each gear.
+    def update(self, component, gears):
+        wanted = set()
+        for key, matrix, profile in gears:
+            wanted.add(key)
+            if key not in self._groups:
+                self._groups[key] = self._draw(component, matrix, profile)
+
+        for key in list(self._groups):
+            if key not in wanted:
+                self._groups.pop(key).deleteMe()
+
+    # Removes all graphics and stops a pending redraw.
+    def clear(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for group in self._groups.values():
+            if group.isValid:
+                group.deleteMe()
+        self._groups = {}
+        self._outlines = {}
+
+    def _draw(self, component, matrix, profile):
+        outline, pitch_circle = self._outline(profile)
+        coords = _world_coordinates(outline, matrix) + _world_coordinates(pitch_circle, matrix)
+        group = component.customGraphicsGroups.add()
+        lines = group.addLines(adsk.fusion.CustomGraphicsCoordinates.create(coords), [], True,
+                               [len(outline), len(pitch_circle)])
+        lines.color = adsk.fusion.CustomGraphicsSolidColorEffect.create(adsk.core.Color.create(*PREVIEW_COLOR, 255))
+        return group
+
+    # The closed outline and pitch circle of a profile, shared by all gears with
+    # that profile. The profile is kept with them so its id stays unique.
+    def _outline(self, profile):
+        entry = self._outlines.get(id(profile))
+        if entry is None:
+            points = geometry.outline_polyline(profile)
+            pitch_circle = geometry.circle_polyline(profile.dims.pitch_dia / 2.0)
+            entry = self._outlines[id(profile)] = (profile, points + points[:1], pitch_circle + pitch_circle[:1])
+        return entry[1], entry[2]
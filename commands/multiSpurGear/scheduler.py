@@ -0,0 +1,94 @@
+import adsk.core
+import time
+
+# Seconds of work done in one chunk before Fusion gets to redraw and handle
+# the user's input again.
+CHUNK_SECONDS = 0.2
+
+# Seconds a job runs before its progress dialog is shown.
+PROGRESS_DELAY = 1
+
+
+# Formats a number of seconds as minutes and seconds.
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    return f'{minutes} min {seconds} s' if minutes else f'{seconds} s'
+
+
+# Runs a long job in chunks, each started by a custom event, so Fusion stays
+# responsive between them. A progress dialog shows the items done and the
+# estimated time left, and its cancel button stops the job after the item
+# being done.
+#
+# event_id -- The custom event that runs the next chunk, see run_chunk.
+# title -- The title of the progress dialog.
+# count -- The number of items.
+# unit -- What the items are called in the progress dialog.
+# step -- Called with the index of every item, in order.
+# finish -- Called once with the number of items done and whether the job was
+#           cancelled, also when a step failed.
+class ChunkedJob:
+    def __init__(self, event_id, title, count, step, finish, unit='items'):
+        self.event_id = event_id
+        self.title = title
+        self.count = count
+        self.unit = unit
+        self.step = step
+        self.finish = finish
+        self.done = 0
+        self.is_running = False
+        self._progress = None
+        self._start = 0.0
+
+    # Shows the progress dialog and queues the first chunk.
+    def start(self):
+        app = adsk.core.Application.get()
+        self._progress = app.userInterface.createProgressDialog()
+        self._progress.isCancelButtonShown = True
+        self._progress.cancelButtonText = 'Stop'
+        self._progress.show(self.title, self._message(), 0, self.count, PROGRESS_DELAY)
+        self._start = time.perf_counter()
+        self.is_running = True
+        app.fireCustomEvent(self.event_id, '')
+
+    # Does the items of one chunk and queues the next one, or ends the job
+    # when all items are done or the user cancelled it.
+    def run_chunk(self):
+        if not self.is_running:
+            return
+        if self._progress.wasCancelled:
+            self._end(True)
+            return
+        deadline = time.perf_counter() + CHUNK_SECONDS
+        try:
+            while self.done < self.count:
+                self.step(self.done)
+                self.done += 1
+                if time.perf_counter() >= deadline:
+                    break
+        except Exception:
+            self._end(True)
+            raise
+        if self.done == self.count:
+            self._end(False)
+            return
+        self._progress.progressValue = self.done
+        self._progress.message = self._message()
+        adsk.core.Application.get().fireCustomEvent(self.event_id, '')
+
+    # Stops the job after the item being done, as the cancel button does.
+    def cancel(self):
+        if self.is_running:
+            self._end(True)
+
+    def _end(self, cancelled):
+        self.is_running = False
+        self._progress.hide()
+        self.finish(self.done, cancelled)
+
+    def _message(self):
+        message = f'{self.done} of {self.count} {self.unit}'
+        if self.done:
+            elapsed = time.perf_counter() - self._start
+            message += f', about {_duration(elapsed / self.done * (self.count - self.done))} left'
+        return message
@@ -0,0 +1,148 @@
+import adsk.core, adsk.fusion
+import math
+from typing import NamedTuple
+from ...lib import gearcore
+
+# The inputs of the dialog whose values are kept by GearSession, and the
+# drop downs whose selected item names are.
+VALUE_INPUTS = ('pressure_angle', 'module', 'backlash', 'root_filter_rad', 'thickness', 'hole_diam',
+                'instance_gears')
+CHOICE_INPUTS = ('flank_accuracy', 'build_mode', 'output')
+
+
+# The gear trains of the selected circles for one module: the table of the
+# circles in selection order with their numbers of teeth and planes, the
+# planes, the meshing pairs, the gear order and the mesh graph.
+class CircleTrains(NamedTuple):
+    table: gearcore.GearTable
+    planes: gearcore.PlaneGroups
+    meshes: list
+    order: list
+    graph: gearcore.MeshGraph
+
+
+# The placement of a sketch in the world: the 16 values of the matrix from
+# sketch space to world space and the normal of the sketch plane.
+class SketchFrame(NamedTuple):
+    matrix: list
+    normal: tuple
+
+
+# Reads the placement of a sketch. Sketches reached through an occurrence
+# are also moved by the occurrence.
+def read_sketch(sketch: adsk.fusion.Sketch) -> SketchFrame:
+    transform = sketch.transform
+    occurrence = sketch.assemblyContext
+    if occurrence is not None:
+        transform.transformBy(occurrence.transform2)
+    m = transform.asArray()
+    nx = m[4] * m[9] - m[8] * m[5]
+    ny = m[8] * m[1] - m[0] * m[9]
+    nz = m[0] * m[5] - m[4] * m[1]
+    ln = math.sqrt(nx * nx + ny * ny + nz * nz)
+    return SketchFrame(m, (nx / ln, ny / ln, nz / ln))
+
+
+# Reads the pitch circles of the selection into the table: their world
+# center, the normal of their sketch and their radius. Only the center in
+# sketch space and the radius are read from each circle; the placement of
+# every sketch is read once and kept in frames, keyed by the entity token of
+# the sketch, and the centers are moved to world space afterwards.
+def read_circles(entities, tokens, table: gearcore.GearTable, frames: dict):
+    circles = []
+    for ent in entities:
+        ent = adsk.fusion.SketchCircle.cast(ent)
+        sketch = ent.parentSketch
+        key = sketch.entityToken
+        frame = frames.get(key)
+        if frame is None:
+            frame = frames[key] = read_sketch(sketch)
+        center = ent.centerSketchPoint.geometry
+        circles.append((frame, center.x, center.y, center.z, ent.radius))
+
+    for token, (frame, x, y, z, radius) in zip(tokens, circles):
+        m = frame.matrix
+        table.append((m[0] * x + m[1] * y + m[2] * z + m[3],
+                      m[4] * x + m[5] * y + m[6] * z + m[7],
+                      m[8] * x + m[9] * y + m[10] * z + m[11]), frame.normal, radius, token)
+
+
+# The state of one run of the dialog. It is filled as the inputs change, so
+# validation, the preview and execute neither read the inputs nor walk the
+# selection again. Circles are read once, when they are selected; the tooth
+# counts, planes and meshes are only computed again when the selection or
+# the module changed.
+#
+# circles holds every circle read in the session, rows the row of each token
+# in it, and tokens the selected circles in selection order. sketches keeps
+# the placement of the sketches of the circles, see read_circles.
+class GearSession:
+    def __init__(self, inputs: adsk.core.CommandInputs):
+        self.values = {}
+        for input_id in VALUE_INPUTS + CHOICE_INPUTS:
+            self.update_value(inputs.itemById(input_id))
+        self.circles = gearcore.GearTable()
+        self.rows = {}
+        self.sketches = {}
+        self.tokens = []
+        self.version = 0
+        self._table = None
+        self._planes = None
+        self._planes_version = -1
+        self._trains = None
+        self._trains_key = None
+
+    # Keeps the value of a changed input. Returns False for inputs the
+    # session does not keep.
+    def update_value(self, changed_input: adsk.core.CommandInput):
+        if changed_input.id in CHOICE_INPUTS:
+            item = adsk.core.DropDownCommandInput.cast(changed_input).selectedItem
+            self.values[changed_input.id] = item.name if item else None
+        elif changed_input.id in VALUE_INPUTS:
+            self.values[changed_input.id] = changed_input.value
+        else:
+            return False
+        return True
+
+    # Brings the circles up to date with the selection. The tokens of all
+    # selected circles are read, which catches circles that were swapped or
+    # reordered as well as added and removed ones, but only the circles not
+    # read before in the session are read.
+    def sync_selection(self, sel_circles: adsk.core.SelectionCommandInput):
+        entities, tokens, selected = [], [], []
+        for i in range(sel_circles.selectionCount):
+            ent = sel_circles.selection(i).entity
+            token = ent.entityToken
+            if token not in self.rows:
+                self.rows[token] = len(self.circles) + len(tokens)
+                entities.append(ent)
+                tokens.append(token)
+            selected.append(token)
+        if entities:
+            read_circles(entities, tokens, self.circles, self.sketches)
+        if selected != self.tokens:
+            self.tokens = selected
+            self.version += 1
+
+    # The table of the selected circles in selection order.
+    def table(self) -> gearcore.GearTable:
+        return self.circles.take([self.rows[token] for token in self.tokens])
+
+    # The gear trains of the selected circles for the given module in cm.
+    def trains(self, module: float) -> CircleTrains:
+        key = (self.version, module)
+        if self._trains_key == key:
+            return self._trains
+
+        if self._planes_version != self.version:
+            self._table = self.table()
+            self._planes = self._table.group_planes()
+            self._planes_version = self.version
+        table, planes = self._table, self._planes
+        ts = table.count_teeth(module)
+        meshes = gearcore.find_meshes(planes, ts, module)
+        order = gearcore.gear_order(planes, ts)
+        graph = gearcore.MeshGraph(len(ts), meshes, order)
+        self._trains = CircleTrains(table, planes, meshes, order, graph)
+        self._trains_key = key
+        return self._trains
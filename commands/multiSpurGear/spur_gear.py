@@ -1,264 +1,52 @@
-import adsk.core, adsk.fusion, adsk.cam, traceback
-import math
+import adsk.core, adsk.fusion
+from ...lib.gearcore import geometry, params
+from . import instrument
+from .build_modes import BUILD_TOOTH_PATTERN, BUILD_FULL_SKETCH
 
 _app = adsk.core.Application.get()
 _ui  = _app.userInterface
 _units = ''
 
-# Calculate points along an involute curve.
-def involutePoint(baseCircleRadius, distFromCenterToInvolutePoint):
-    try:
-        # Calculate the other side of the right-angle triangle defined by the base circle and the current distance radius.
-        # This is also the length of the involute chord as it comes off of the base circle.
-        triangleSide = math.sqrt(math.pow(distFromCenterToInvolutePoint,2) - math.pow(baseCircleRadius,2)) 
-        
-        # Calculate the angle of the involute.
-        alpha = triangleSide / baseCircleRadius
-
-        # Calculate the angle where the current involute point is.
-        theta = alpha - math.acos(baseCircleRadius / distFromCenterToInvolutePoint)
-
-        # Calculate the coordinates of the involute point.    
-        x = distFromCenterToInvolutePoint * math.cos(theta)
-        y = distFromCenterToInvolutePoint * math.sin(theta)
-
-        # Create a point to return.        
-        return adsk.core.Point3D.create(x, y, 0)
-    except:
-        if _ui:
-            _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
-
-
 # Builds a spur gear.
 #def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, x, y, angle):
-def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam):
+def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, profile=None, transform=None, buildMode=BUILD_TOOTH_PATTERN, flankTolerance=None, sourceValue=None):
     try:
-        # The diametral pitch is specified in inches but everthing
-        # here expects all distances to be in centimeters, so convert
-        # for the gear creation.
-        diametralPitch = diametralPitch / 2.54
-    
-        # Compute the various values for a gear.
-        pitchDia = numTeeth / diametralPitch
-        
-        #addendum = 1.0 / diametralPitch
-        if (diametralPitch < (20 *(math.pi/180))-0.000001):
-            dedendum = 1.157 / diametralPitch
-        else:
-            circularPitch = math.pi / diametralPitch
-            if circularPitch >= 20:
-                dedendum = 1.25 / diametralPitch
-            else:
-                dedendum = (1.2 / diametralPitch) + (.002 * 2.54)                
-
-        rootDia = pitchDia - (2 * dedendum)
-        
-        baseCircleDia = pitchDia * math.cos(pressureAngle)
-        outsideDia = (numTeeth + 2) / diametralPitch
+        # Compute the tooth outline with its root fillets and the various
+        # diameters of the gear, unless the caller already computed it as part
+        # of a batch.
+        instrument.step('profile')
+        if profile is None:
+            profile = geometry.tooth_profile(diametralPitch, numTeeth, pressureAngle, backlash,
+                                             tolerance=flankTolerance, fillet_radius=rootFilletRad)
+        pitchDia = profile.dims.pitch_dia
         
-        # Create a new component by creating an occurrence.
+        # Create a new component by creating an occurrence, placed with the
+        # given transform if there is one.
+        instrument.step('component')
         occs = design.rootComponent.occurrences
-        mat = adsk.core.Matrix3D.create()
+        mat = transform if transform else adsk.core.Matrix3D.create()
         newOcc = occs.addNewComponent(mat)        
         newComp = adsk.fusion.Component.cast(newOcc.component)
-        
-        # Create a new sketch.
-        sketches = newComp.sketches
-        xyPlane = newComp.xYConstructionPlane
-        baseSketch = sketches.add(xyPlane)
 
-        # Draw a circle for the base.
-        baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), rootDia/2.0)
+        # Record the pitch circle the gear was built from on its occurrence,
+        # so a later run can tell whether it changed.
+        if sourceValue:
+            newOcc.attributes.add('SpurGear', 'Source', sourceValue)
         
-        # Draw a circle for the center hole, if the value is greater than 0.
-        prof = adsk.fusion.Profile.cast(None)
-        if holeDiam - (_app.pointTolerance * 2) > 0:
-            baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), holeDiam/2.0)
-            
-            # Find the profile that uses both circles.
-            for prof in baseSketch.profiles:
-                if prof.profileLoops.count == 2:
-                    break
-        else:
-            # Use the single profile.
-            prof = baseSketch.profiles.item(0)
-        
-        #### Extrude the circle to create the base of the gear.
-
-        # Create an extrusion input to be able to define the input needed for an extrusion
-        # while specifying the profile and that a new component is to be created
-        extrudes = newComp.features.extrudeFeatures
-        extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-
-        # Define that the extent is a distance extent of 5 cm.
-        distance = adsk.core.ValueInput.createByReal(thickness)
-        extInput.setDistanceExtent(False, distance)
-
-        # Create the extrusion.
-        baseExtrude = extrudes.add(extInput)
-        
-        # Create a second sketch for the tooth.
-        toothSketch = sketches.add(xyPlane)
-
-        # Calculate points along the involute curve.
-        involutePointCount = 15 
-        involuteIntersectionRadius = baseCircleDia / 2.0
-        involutePoints = []
-        involuteSize = (outsideDia - baseCircleDia) / 2.0
-        for i in range(0, involutePointCount):
-            involuteIntersectionRadius = (baseCircleDia / 2.0) + ((involuteSize / (involutePointCount - 1)) * i)
-            newPoint = involutePoint(baseCircleDia / 2.0, involuteIntersectionRadius)
-            involutePoints.append(newPoint)
-            
-        # Get the point along the tooth that's at the pictch diameter and then
-        # calculate the angle to that point.
-        pitchInvolutePoint = involutePoint(baseCircleDia / 2.0, pitchDia / 2.0)
-        pitchPointAngle = math.atan(pitchInvolutePoint.y / pitchInvolutePoint.x)
-
-        # Determine the angle defined by the tooth thickness as measured at
-        # the pitch diameter circle.
-        toothThicknessAngle = (2 * math.pi) / (2 * numTeeth)
-        
-        # Determine the angle needed for the specified backlash.
-        backlashAngle = (backlash / (pitchDia / 2.0)) * .25
-        
-        # Determine the angle to rotate the curve.
-        rotateAngle = -((toothThicknessAngle/2) + pitchPointAngle - backlashAngle)
-        
-        # Rotate the involute so the middle of the tooth lies on the x axis.
-        cosAngle = math.cos(rotateAngle)
-        sinAngle = math.sin(rotateAngle)
-        for i in range(0, involutePointCount):
-            newX = involutePoints[i].x * cosAngle - involutePoints[i].y * sinAngle
-            newY = involutePoints[i].x * sinAngle + involutePoints[i].y * cosAngle
-            involutePoints[i] = adsk.core.Point3D.create(newX, newY, 0)
-            #involutePoints[i] = adsk.core.Point3D.create(newX + x, newY + y, 0)
-
-        # Create a new set of points with a negated y.  This effectively mirrors the original
-        # points about the X axis.
-        involute2Points = []
-        for i in range(0, involutePointCount):
-            involute2Points.append(adsk.core.Point3D.create(involutePoints[i].x, -involutePoints[i].y, 0))
-
-        curve1Dist = []
-        curve1Angle = []
-        for i in range(0, involutePointCount):
-            curve1Dist.append(math.sqrt(involutePoints[i].x * involutePoints[i].x + involutePoints[i].y * involutePoints[i].y))
-            curve1Angle.append(math.atan(involutePoints[i].y / involutePoints[i].x))
-        
-        curve2Dist = []
-        curve2Angle = []
-        for i in range(0, involutePointCount):
-            curve2Dist.append(math.sqrt(involute2Points[i].x * involute2Points[i].x + involute2Points[i].y * involute2Points[i].y))
-            curve2Angle.append(math.atan(involute2Points[i].y / involute2Points[i].x))
-
-        toothSketch.isComputeDeferred = True
-		
-        # Create and load an object collection with the points.
-        pointSet = adsk.core.ObjectCollection.create()
-        for i in range(0, involutePointCount):
-            pointSet.add(involutePoints[i])
-
-        # Create the first spline.
-        spline1 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet)
-
-        # Add the involute points for the second spline to an ObjectCollection.
-        pointSet = adsk.core.ObjectCollection.create()
-        for i in range(0, involutePointCount):
-            pointSet.add(involute2Points[i])
-
-        # Create the second spline.
-        spline2 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet)
-
-        # Draw the arc for the top of the tooth.
-        midPoint = adsk.core.Point3D.create((outsideDia / 2), 0, 0)
-        toothSketch.sketchCurves.sketchArcs.addByThreePoints(spline1.endSketchPoint, midPoint, spline2.endSketchPoint)     
-
-        # Check to see if involute goes down to the root or not.  If not, then
-        # create lines to connect the involute to the root.
-        if( baseCircleDia < rootDia ):
-            toothSketch.sketchCurves.sketchLines.addByTwoPoints(spline2.startSketchPoint, spline1.startSketchPoint)
-        else:
-            rootPoint1 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve1Angle[0] ), (rootDia / 2) * math.sin(curve1Angle[0]), 0)
-            line1 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint1, spline1.startSketchPoint)
-
-            rootPoint2 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve2Angle[0]), (rootDia / 2) * math.sin(curve2Angle[0]), 0)
-            line2 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint2, spline2.startSketchPoint)
-
-            baseLine = toothSketch.sketchCurves.sketchLines.addByTwoPoints(line1.startSketchPoint, line2.startSketchPoint)
-
-            # Make the lines tangent to the spline so the root fillet will behave correctly.            
-            line1.isFixed = True
-            line2.isFixed = True
-            toothSketch.geometricConstraints.addTangent(spline1, line1)
-            toothSketch.geometricConstraints.addTangent(spline2, line2)
-       
-        toothSketch.isComputeDeferred = False
-
-        ### Extrude the tooth.
-        
-        # Get the profile defined by the tooth.
-        prof = toothSketch.profiles.item(0)
-
-        # Create an extrusion input to be able to define the input needed for an extrusion
-        # while specifying the profile and that a new component is to be created
-        extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.JoinFeatureOperation)
-
-        # Define that the extent is a distance extent of 5 cm.
-        distance = adsk.core.ValueInput.createByReal(thickness)
-        extInput.setDistanceExtent(False, distance)
-
-        # Create the extrusion.
-        toothExtrude = extrudes.add(extInput)
-
-        baseFillet = None
-        if rootFilletRad > 0:
-            ### Find the edges between the base cylinder and the tooth.
-            
-            # Get the outer cylindrical face from the base extrusion by checking the number
-            # of edges and if it's 2 get the other one.
-            cylFace = baseExtrude.sideFaces.item(0)
-            if cylFace.edges.count == 2:
-                cylFace = baseExtrude.sideFaces.item(1)
-    
-            # Get the two linear edges, which are the connection between the cylinder and tooth.
-            edges = adsk.core.ObjectCollection.create()
-            for edge in cylFace.edges:
-                if isinstance(edge.geometry, adsk.core.Line3D):
-                    edges.add(edge)
-    
-            # Create a fillet input to be able to define the input needed for a fillet.
-            fillets = newComp.features.filletFeatures;
-            filletInput = fillets.createInput()
-    
-            # Define that the extent is a distance extent of 5 cm.
-            radius = adsk.core.ValueInput.createByReal(rootFilletRad)
-            filletInput.addConstantRadiusEdgeSet(edges, radius, False)
-    
-            # Create the extrusion.
-            baseFillet = fillets.add(filletInput)
-
-        # Create a pattern of the tooth extrude and the base fillet.
-        circularPatterns = newComp.features.circularPatternFeatures
-        entities = adsk.core.ObjectCollection.create()
-        entities.add(toothExtrude)
-        if baseFillet:
-            entities.add(baseFillet)
-        cylFace = baseExtrude.sideFaces.item(0)        
-        patternInput = circularPatterns.createInput(entities, cylFace)
-        numTeethInput = adsk.core.ValueInput.createByString(str(numTeeth))
-        patternInput.quantity = numTeethInput
-        patternInput.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute        
-        pattern = circularPatterns.add(patternInput)        
+        # Create the body of the gear, either from a single tooth that is patterned
+        # around a base cylinder or from one sketch of the whole outline.
+        drawGearBody(newComp, profile, thickness, holeDiam, buildMode)
         
         # Create an extra sketch that contains a circle of the diametral pitch.
-        diametralPitchSketch = sketches.add(xyPlane)
+        instrument.step('pitch_sketch')
+        diametralPitchSketch = newComp.sketches.add(newComp.xYConstructionPlane)
         diametralPitchCircle = diametralPitchSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), pitchDia/2.0)
         diametralPitchCircle.isConstruction = True
         diametralPitchCircle.isFixed = True
         diametralPitchSketch.isVisible = False
         
         # Group everything used to create the gear in the timeline.
+        instrument.step('timeline_group')
         timelineGroups = design.timeline.timelineGroups
         newOccIndex = newOcc.timelineObject.index
         pitchSketchIndex = diametralPitchSketch.timelineObject.index
@@ -266,20 +54,376 @@ def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressur
         timelineGroup = timelineGroups.add(newOccIndex, pitchSketchIndex)
         timelineGroup.name = 'Spur Gear'
         
-        # Add an attribute to the component with all of the input values.  This might 
-        # be used in the future to be able to edit the gear.     
-        gearValues = {}
-        gearValues['diametralPitch'] = str(diametralPitch * 2.54)
-        gearValues['numTeeth'] = str(numTeeth)
-        gearValues['thickness'] = str(thickness)
-        gearValues['rootFilletRad'] = str(rootFilletRad)
-        gearValues['pressureAngle'] = str(pressureAngle)
-        gearValues['holeDiam'] = str(holeDiam)
-        gearValues['backlash'] = str(backlash)
-        attrib = newComp.attributes.add('SpurGear', 'Values',str(gearValues))
+        # Add an attribute to the component with all of the input values, which
+        # the edit command reads to update the gear.
+        instrument.step('attributes')
+        newComp.attributes.add('SpurGear', 'Values', gearAttributeValue(
+            diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam,
+            flankTolerance, buildMode))
         
         newComp.name = 'Spur Gear (' + str(numTeeth) + ' teeth)'
         return newComp
     except Exception as error:
         _ui.messageBox("drawGear Failed : " + str(error)) 
-        return None
\ No newline at end of file
+        return None
+
+
+# The value of the SpurGear attribute that records the input values of a gear.
+def gearAttributeValue(diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, flankTolerance=None, buildMode=None):
+    return params.encode_params(params.GearParams(
+        diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam,
+        flankTolerance, buildMode))
+
+
+# Reads the values a gear component was built from, or returns None if the
+# component is not a gear or its values cannot be read.
+def readGearParams(comp):
+    attrib = comp.attributes.itemByName('SpurGear', 'Values')
+    if attrib is None:
+        return None
+    try:
+        gearParams = params.decode_params(attrib.value)
+    except ValueError:
+        return None
+    # Older gears don't record how their body was built.
+    if gearParams.build_mode is None:
+        patterned = comp.features.circularPatternFeatures.count > 0
+        gearParams = gearParams._replace(build_mode=BUILD_TOOTH_PATTERN if patterned else BUILD_FULL_SKETCH)
+    return gearParams
+
+
+# Updates a gear component built by drawGear to new values in place. Changes
+# of the thickness and of the hole only update the extrusions and the hole
+# circle; anything that changes the tooth profile or the way the body is built
+# replaces the sketches and features of the body. The component, its
+# occurrences and the pitch sketch are kept. Returns the names of the changed
+# values.
+def updateGear(comp, oldParams, newParams, profile=None):
+    changed = params.changed_params(oldParams, newParams)
+    if not changed:
+        return changed
+
+    minHole = _app.pointTolerance * 2
+    holeToggled = (oldParams.hole_diam > minHole) != (newParams.hole_diam > minHole)
+    if changed & (params.PROFILE_FIELDS | {'build_mode'}) or holeToggled:
+        if profile is None:
+            profile = geometry.tooth_profile(newParams.diametral_pitch, newParams.num_teeth, newParams.pressure_angle,
+                                             newParams.backlash, tolerance=newParams.flank_tolerance,
+                                             fillet_radius=newParams.root_fillet_radius)
+        pitchSketch = deleteGearBody(comp)
+        redrawGearBody(comp, pitchSketch, profile, newParams.thickness, newParams.hole_diam, newParams.build_mode)
+        if pitchSketch is not None and changed & {'num_teeth', 'diametral_pitch'}:
+            for circle in pitchSketch.sketchCurves.sketchCircles:
+                circle.isFixed = False
+                circle.radius = profile.dims.pitch_dia / 2.0
+                circle.isFixed = True
+    else:
+        if 'thickness' in changed:
+            distance = adsk.core.ValueInput.createByReal(newParams.thickness)
+            for extrude in comp.features.extrudeFeatures:
+                extrude.setDistanceExtent(False, distance)
+        if 'hole_diam' in changed:
+            holeCircle = findHoleCircle(comp, oldParams.hole_diam / 2.0)
+            if holeCircle is not None:
+                holeCircle.radius = newParams.hole_diam / 2.0
+
+    comp.attributes.add('SpurGear', 'Values', params.encode_params(newParams))
+    comp.name = 'Spur Gear (' + str(newParams.num_teeth) + ' teeth)'
+    clearSourceShapes(comp)
+    return changed
+
+
+# Clears the shape key of the Source attribute on every occurrence of a gear
+# whose values were edited. The key no longer matches the gear, so the next
+# run of the multi gear command builds the occurrences again from its own
+# values rather than keeping them as unchanged.
+def clearSourceShapes(comp):
+    rootComp = comp.parentDesign.rootComponent
+    for occ in rootComp.allOccurrencesByComponent(comp):
+        attrib = occ.attributes.itemByName('SpurGear', 'Source')
+        if attrib is None:
+            continue
+        source = params.decode_source(attrib.value)
+        if source is not None:
+            attrib.value = params.encode_source(source._replace(shape=''))
+
+
+# Deletes the sketches and features that build the body of a gear and returns
+# the pitch sketch, which is the only sketch with nothing but construction
+# geometry.
+def deleteGearBody(comp):
+    foldMoveFeatures(comp)
+    features = comp.features
+    for collection in (features.circularPatternFeatures, features.filletFeatures, features.extrudeFeatures):
+        for feature in reversed(list(collection)):
+            feature.deleteMe()
+    pitchSketch = None
+    for sketch in reversed(list(comp.sketches)):
+        circles = list(sketch.sketchCurves.sketchCircles)
+        if circles and all(circle.isConstruction for circle in circles) and pitchSketch is None:
+            pitchSketch = sketch
+        else:
+            sketch.deleteMe()
+    return pitchSketch
+
+
+# Builds the body of an edited gear again. In a parametric design the new
+# sketches and features are inserted in front of the pitch sketch, which is
+# where drawGear put the old ones, and the 'Spur Gear' timeline group of the
+# gear is made again so it holds them.
+def redrawGearBody(comp, pitchSketch, profile, thickness, holeDiam, buildMode):
+    design = comp.parentDesign
+    if pitchSketch is None or design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        drawGearBody(comp, profile, thickness, holeDiam, buildMode)
+        return
+
+    pitchObject = pitchSketch.timelineObject
+    timelineGroup = pitchObject.parentGroup
+    pitchObject.rollTo(True)
+    try:
+        drawGearBody(comp, profile, thickness, holeDiam, buildMode)
+    finally:
+        design.timeline.moveToEnd()
+
+    if timelineGroup is not None:
+        firstObject = timelineGroup.item(0)
+        timelineGroup.deleteMe(False)
+        timelineGroup = design.timeline.timelineGroups.add(firstObject.index, pitchObject.index)
+        timelineGroup.name = 'Spur Gear'
+
+
+# Gears built by older versions of the add-in were placed by up to three move
+# features of their body instead of by the transform of their occurrence.
+# Folds the combined transform of the move features into every occurrence of
+# the component and deletes them, so a body built again at the origin of the
+# component ends up where the old one was.
+def foldMoveFeatures(comp):
+    moves = list(comp.features.moveFeatures)
+    if not moves:
+        return
+    combined = adsk.core.Matrix3D.create()
+    for move in moves:
+        combined.transformBy(move.transform)
+    for move in reversed(moves):
+        move.deleteMe()
+    design = comp.parentDesign
+    for occ in design.rootComponent.allOccurrencesByComponent(comp):
+        transform = combined.copy()
+        transform.transformBy(occ.transform2)
+        occ.transform2 = transform
+    # Moved occurrences of a parametric design keep their new place only once
+    # it is captured in the timeline.
+    if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        design.snapshots.add()
+
+
+# Finds the circle of the center hole, the one at the origin with the given radius.
+def findHoleCircle(comp, radius):
+    for sketch in comp.sketches:
+        for circle in sketch.sketchCurves.sketchCircles:
+            center = circle.centerSketchPoint.geometry
+            if (not circle.isConstruction and abs(circle.radius - radius) <= _app.pointTolerance
+                    and abs(center.x) <= _app.pointTolerance and abs(center.y) <= _app.pointTolerance):
+                return circle
+    return None
+
+
+# Builds the body of a gear in the given way.
+def drawGearBody(newComp, profile, thickness, holeDiam, buildMode):
+    if buildMode == BUILD_FULL_SKETCH:
+        drawFullGear(newComp, profile, thickness, holeDiam)
+    else:
+        drawPatternedGear(newComp, profile, profile.num_teeth, thickness, holeDiam)
+
+
+# Builds the body of a gear from a base cylinder and a single tooth, which is
+# patterned around the cylinder.
+def drawPatternedGear(newComp, profile, numTeeth, thickness, holeDiam):
+    rootDia = profile.dims.root_dia
+
+    # Create a new sketch.
+    instrument.step('base_sketch')
+    sketches = newComp.sketches
+    xyPlane = newComp.xYConstructionPlane
+    baseSketch = sketches.add(xyPlane)
+
+    # Draw a circle for the base.
+    baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), rootDia/2.0)
+    
+    # Draw a circle for the center hole, if the value is greater than 0.
+    prof = adsk.fusion.Profile.cast(None)
+    if holeDiam - (_app.pointTolerance * 2) > 0:
+        baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), holeDiam/2.0)
+        
+        # Find the profile that uses both circles.
+        for prof in baseSketch.profiles:
+            if prof.profileLoops.count == 2:
+                break
+    else:
+        # Use the single profile.
+        prof = baseSketch.profiles.item(0)
+    
+    #### Extrude the circle to create the base of the gear.
+    instrument.step('base_extrude')
+
+    # Create an extrusion input to be able to define the input needed for an extrusion
+    # while specifying the profile and that a new component is to be created
+    extrudes = newComp.features.extrudeFeatures
+    extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+
+    # Define that the extent is a distance extent of 5 cm.
+    distance = adsk.core.ValueInput.createByReal(thickness)
+    extInput.setDistanceExtent(False, distance)
+
+    # Create the extrusion.
+    baseExtrude = extrudes.add(extInput)
+    
+    # Create a second sketch for the tooth.
+    instrument.step('tooth_sketch')
+    toothSketch = sketches.add(xyPlane)
+
+    toothSketch.isComputeDeferred = True
+
+    # Create the flanks as fixed splines from the precomputed B-splines of the
+    # involute, so there is no spline fit to solve.
+    spline1 = toothSketch.sketchCurves.sketchFixedSplines.addByNurbsCurve(nurbsCurve(profile.spline1))
+    spline2 = toothSketch.sketchCurves.sketchFixedSplines.addByNurbsCurve(nurbsCurve(profile.spline2))
+
+    # Draw the arc for the top of the tooth.
+    midPoint = adsk.core.Point3D.create(profile.tip_mid[0], profile.tip_mid[1], 0)
+    toothSketch.sketchCurves.sketchArcs.addByThreePoints(spline1.endSketchPoint, midPoint, spline2.endSketchPoint)     
+
+    # Check to see if involute goes down to the root or not.  If not, then
+    # create lines to connect the involute to the root.
+    start1 = spline1.startSketchPoint
+    start2 = spline2.startSketchPoint
+    if profile.root1 is not None:
+        rootPoint1 = adsk.core.Point3D.create(profile.root1[0], profile.root1[1], 0)
+        line1 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint1, spline1.startSketchPoint)
+
+        rootPoint2 = adsk.core.Point3D.create(profile.root2[0], profile.root2[1], 0)
+        line2 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint2, spline2.startSketchPoint)
+        start1 = line1.startSketchPoint
+        start2 = line2.startSketchPoint
+        line1.isFixed = True
+        line2.isFixed = True
+
+    # Draw the root fillets, which run from the root circle to the side of the tooth.
+    if profile.fillet1 is not None:
+        filletPoints1 = [adsk.core.Point3D.create(x, y, 0) for x, y in profile.fillet1[:2]]
+        fillet1 = toothSketch.sketchCurves.sketchArcs.addByThreePoints(filletPoints1[0], filletPoints1[1], start1)
+        filletPoints2 = [adsk.core.Point3D.create(x, y, 0) for x, y in profile.fillet2[:2]]
+        fillet2 = toothSketch.sketchCurves.sketchArcs.addByThreePoints(filletPoints2[0], filletPoints2[1], start2)
+        start1 = fillet1.startSketchPoint
+        start2 = fillet2.startSketchPoint
+
+    # Close the tooth across the base.
+    toothSketch.sketchCurves.sketchLines.addByTwoPoints(start1, start2)
+
+    toothSketch.isComputeDeferred = False
+
+    ### Extrude the tooth.
+    instrument.step('tooth_extrude')
+    
+    # Get the profile defined by the tooth.
+    prof = toothSketch.profiles.item(0)
+
+    # Create an extrusion input to be able to define the input needed for an extrusion
+    # while specifying the profile and that a new component is to be created
+    extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.JoinFeatureOperation)
+
+    # Define that the extent is a distance extent of 5 cm.
+    distance = adsk.core.ValueInput.createByReal(thickness)
+    extInput.setDistanceExtent(False, distance)
+
+    # Create the extrusion.
+    toothExtrude = extrudes.add(extInput)
+
+    # Create a pattern of the tooth extrude, which includes the root fillets.
+    instrument.step('pattern')
+    circularPatterns = newComp.features.circularPatternFeatures
+    entities = adsk.core.ObjectCollection.create()
+    entities.add(toothExtrude)
+    cylFace = baseExtrude.sideFaces.item(0)        
+    patternInput = circularPatterns.createInput(entities, cylFace)
+    numTeethInput = adsk.core.ValueInput.createByString(str(numTeeth))
+    patternInput.quantity = numTeethInput
+    patternInput.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute        
+    circularPatterns.add(patternInput)
+
+
+# Builds the body of a gear by extruding a single sketch of its whole outline.
+def drawFullGear(newComp, profile, thickness, holeDiam):
+    instrument.step('outline_sketch')
+    gearSketch = newComp.sketches.add(newComp.xYConstructionPlane)
+    gearSketch.isComputeDeferred = True
+    drawOutline(gearSketch, geometry.gear_outline(profile))
+
+    # Draw a circle for the center hole, if the value is greater than 0.
+    hasHole = holeDiam - (_app.pointTolerance * 2) > 0
+    if hasHole:
+        gearSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), holeDiam/2.0)
+    gearSketch.isComputeDeferred = False
+
+    # Find the profile inside the outline, which goes around the hole if there is one.
+    prof = adsk.fusion.Profile.cast(None)
+    if hasHole:
+        for prof in gearSketch.profiles:
+            if prof.profileLoops.count == 2:
+                break
+    else:
+        prof = gearSketch.profiles.item(0)
+
+    # Extrude the whole gear at once.
+    instrument.step('outline_extrude')
+    extrudes = newComp.features.extrudeFeatures
+    extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    distance = adsk.core.ValueInput.createByReal(thickness)
+    extInput.setDistanceExtent(False, distance)
+    extrudes.add(extInput)
+
+
+# Converts a B-spline of the gear's XY plane into a NurbsCurve3D.
+def nurbsCurve(spline):
+    controlPoints = [adsk.core.Point3D.create(x, y, 0) for x, y in spline.control_points]
+    return adsk.core.NurbsCurve3D.createNonRational(controlPoints, spline.degree, spline.knots, False)
+
+
+# Draws a closed outline of gear_outline segments into a sketch. Every curve
+# starts at the end point of the previous one, so the outline is connected
+# without any constraints.
+def drawOutline(sketch, segments):
+    curves = sketch.sketchCurves
+    firstPoint = None
+    lastPoint = None
+    for index, segment in enumerate(segments):
+        start = lastPoint if lastPoint else adsk.core.Point3D.create(segment.points[0][0], segment.points[0][1], 0)
+        if index == len(segments) - 1 and firstPoint:
+            end = firstPoint
+        else:
+            end = adsk.core.Point3D.create(segment.points[-1][0], segment.points[-1][1], 0)
+
+        if segment.kind == 'line':
+            curve = curves.sketchLines.addByTwoPoints(start, end)
+        elif segment.kind == 'arc':
+            midPoint = adsk.core.Point3D.create(segment.points[1][0], segment.points[1][1], 0)
+            curve = curves.sketchArcs.addByThreePoints(start, midPoint, end)
+        elif segment.spline is not None:
+            # Fixed splines get their own end points, which are merged with
+            # the ones of the neighbouring curves.
+            curve = curves.sketchFixedSplines.addByNurbsCurve(nurbsCurve(segment.spline))
+            if lastPoint:
+                curve.startSketchPoint.merge(lastPoint)
+            if index == len(segments) - 1 and firstPoint:
+                curve.endSketchPoint.merge(firstPoint)
+        else:
+            pointSet = adsk.core.ObjectCollection.create()
+            pointSet.add(start)
+            for x, y in segment.points[1:-1]:
+                pointSet.add(adsk.core.Point3D.create(x, y, 0))
+            pointSet.add(end)
+            curve = curves.sketchFittedSplines.add(pointSet)
+
+        if firstPoint is None:
+            firstPoint = curve.startSketchPoint
+        lastPoint = curve.endSketchPoint
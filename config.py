@@ -18,4 +18,26 @@ ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 COMPANY_NAME = 'GEAR'
 
 # Palettes
-sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
\ No newline at end of file
+sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
+
+# Tooth profile cache
+# Maximum number of distinct tooth profiles kept in memory between runs.
+PROFILE_CACHE_SIZE = 512
+# When True the cache is written to PROFILE_CACHE_FILE so later sessions start
+# with a warm cache. Off by default, so the add-in does not write into its
+# own folder unless asked to.
+PROFILE_CACHE_PERSIST = False
+PROFILE_CACHE_FILE = os.path.join(os.path.dirname(__file__), 'profile_cache.json.gz')
+
+# Run profiling
+# When True every run of the command records the time and the number of API
+# calls of each phase, in total and per gear, and writes a JSON report.
+PROFILE_RUNS = False
+# File the report is written to. When empty it is written to the Text Command
+# window.
+PROFILE_REPORT_FILE = ''
+
+# Latency
+# When True the time it takes to load and start the add-in and to open the
+# command dialog is written to the Text Command window.
+LOG_LATENCY = False
@@ -19,6 +19,10 @@ from .general_utils import handle_error
 # Global Variable to hold Event Handlers
 _handlers = []
 
+# Handler classes made by _define_handler, keyed by handler type, callback and
+# name, so opening a command again does not define its classes again.
+_handler_classes = {}
+
 
 def add_handler(
         event: adsk.core.Event,
@@ -73,6 +77,10 @@ def _create_handler(
 
 
 def _define_handler(handler_type, callback, name: str = None):
+    key = (handler_type, callback, name)
+    handler_class = _handler_classes.get(key)
+    if handler_class is not None:
+        return handler_class
     name = name or handler_type.__name__
 
     class Handler(handler_type):
@@ -85,4 +93,5 @@ def _define_handler(handler_type, callback, name: str = None):
             except:
                 handle_error(name)
 
+    _handler_classes[key] = Handler
     return Handler
@@ -0,0 +1,9 @@
+from .geometry import *
+from .profile_cache import *
+from .train import *
+from .params import *
+from .export import *
+from .table import *
+from .batch import *
+from .parallel import *
+from .analysis import *
@@ -0,0 +1,8 @@
+import sys
+
+from .batch import main
+
+# Worker processes started by spawning import this module again, they must
+# not run the batch themselves.
+if __name__ == '__main__':
+    sys.exit(main())
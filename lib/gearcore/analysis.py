@@ -0,0 +1,178 @@
+"""Checks of meshing gear pairs: contact ratio, undercut, interference and backlash.
+
+The gears are standard involute spur gears with an addendum of one module,
+as built by tooth_profiles. All pairs are checked in one pass over columns
+of per-pair values, so layouts with thousands of meshes can be checked on
+every change of the dialog. Lengths are in centimeters and angles in
+radians.
+"""
+
+import math
+from array import array
+from typing import List, NamedTuple, Sequence, Tuple
+
+from .geometry import gear_dimensions
+
+__all__ = [
+    'MIN_CONTACT_RATIO',
+    'MeshAnalysis',
+    'min_teeth_without_undercut',
+    'analyze_meshes',
+    'analysis_summary',
+    'analysis_warnings',
+]
+
+# Contact ratio below which a pair is reported. Below 1 the next pair of
+# teeth only comes into contact after the last one has left it; below about
+# 1.2 manufacturing errors are enough for that to happen.
+MIN_CONTACT_RATIO = 1.2
+
+# Negative backlash, in centimeters, that is still rounding noise.
+BACKLASH_TOLERANCE = 1e-7
+
+
+class MeshAnalysis(NamedTuple):
+    """The checks of every meshing pair, one value per pair in each column.
+
+    pairs -- The meshing pairs (i, j), as returned by find_meshes.
+    contact_ratio -- The transverse contact ratio at the actual center distance.
+    clearance -- The smallest distance between the tip circle of one gear
+                 and the root circle of the other. Negative when a tip
+                 runs into the root of the other gear.
+    interference -- 1 when the tip of either gear reaches below the base
+                    circle of the other along the line of action, or runs
+                    into its root.
+    backlash -- The circumferential backlash at the pitch circle: the
+                backlash of both gears plus the play from the center
+                distance being larger than the nominal one.
+    min_teeth -- The fewest teeth a gear can have without undercut.
+    """
+    pairs: List[Tuple[int, int]]
+    contact_ratio: array
+    clearance: array
+    interference: array
+    backlash: array
+    min_teeth: int
+
+    def undercut(self, teeth: Sequence[int]) -> List[int]:
+        """Returns the gears of the pairs that have fewer teeth than min_teeth."""
+        gears = set()
+        for i, j in self.pairs:
+            for k in (i, j):
+                if teeth[k] < self.min_teeth:
+                    gears.add(k)
+        return sorted(gears)
+
+
+def min_teeth_without_undercut(pressure_angle: float) -> int:
+    """Returns the fewest teeth of a gear cut by a rack without undercut.
+
+    With an addendum of one module the limit is 2 / sin^2 of the pressure
+    angle, 17.1 teeth at 20 degrees.
+    """
+    s = math.sin(pressure_angle)
+    return math.ceil(2.0 / (s * s) - 1e-9)
+
+
+def analyze_meshes(pairs: Sequence[Tuple[int, int]], teeth: Sequence[int], coords: Sequence[Tuple[float, float]],
+                   diametral_pitch: float, pressure_angle: float, backlash: float = 0.0) -> MeshAnalysis:
+    """Checks every meshing pair.
+
+    Arguments:
+    pairs -- The meshing pairs, as returned by find_meshes.
+    teeth -- The number of teeth of each gear.
+    coords -- The in-plane center of each gear.
+    diametral_pitch -- The diametral pitch in teeth per inch, as drawGear receives it.
+    pressure_angle -- The pressure angle in radians.
+    backlash -- The backlash each gear is built with, see tooth_profiles.
+    """
+    # The radii of each distinct gear, as columns indexed by gear.
+    radii = {}
+    for t in set(teeth):
+        dims = gear_dimensions(diametral_pitch, t, pressure_angle)
+        radii[t] = (dims.pitch_dia / 2.0, dims.root_dia / 2.0, dims.base_dia / 2.0, dims.outside_dia / 2.0)
+    pitch = [radii[t][0] for t in teeth]
+    root = [radii[t][1] for t in teeth]
+    base = [radii[t][2] for t in teeth]
+    tip = [radii[t][3] for t in teeth]
+
+    module = 2.54 / diametral_pitch
+    base_pitch = math.pi * module * math.cos(pressure_angle)
+    tan_alpha = math.tan(pressure_angle)
+    count = len(pairs)
+    contact_ratio = array('d', bytes(8 * count))
+    clearance = array('d', bytes(8 * count))
+    interference = array('b', bytes(count))
+    play = array('d', bytes(8 * count))
+
+    for k, (i, j) in enumerate(pairs):
+        (xi, yi), (xj, yj) = coords[i], coords[j]
+        distance = math.hypot(xi - xj, yi - yj)
+        rbi, rbj = base[i], base[j]
+        rai, raj = tip[i], tip[j]
+
+        # The line of action is the common tangent of the base circles. Its
+        # length between the tangent points is the room for the contact.
+        line = math.sqrt(max(distance * distance - (rbi + rbj) ** 2, 0.0))
+        reach_i = math.sqrt(max(rai * rai - rbi * rbi, 0.0))
+        reach_j = math.sqrt(max(raj * raj - rbj * rbj, 0.0))
+        contact_ratio[k] = (reach_i + reach_j - line) / base_pitch
+
+        clearance[k] = min(distance - rai - root[j], distance - raj - root[i])
+        interference[k] = reach_i > line or reach_j > line or clearance[k] < 0.0
+        play[k] = backlash + 2.0 * (distance - pitch[i] - pitch[j]) * tan_alpha
+
+    return MeshAnalysis(list(pairs), contact_ratio, clearance, interference, play,
+                        min_teeth_without_undercut(pressure_angle))
+
+
+def analysis_summary(analysis: MeshAnalysis, teeth: Sequence[int]) -> List[str]:
+    """Returns lines that summarize the checks, lengths in millimeters."""
+    count = len(analysis.pairs)
+    if not count:
+        return ['No meshing gears']
+    ratios = analysis.contact_ratio
+    low = sum(1 for r in ratios if r < MIN_CONTACT_RATIO)
+    lines = [f'{count} meshes, contact ratio {min(ratios):.2f} to {max(ratios):.2f}'
+             + (f', {low} below {MIN_CONTACT_RATIO}' if low else '')]
+    undercut = analysis.undercut(teeth)
+    if undercut:
+        lines.append(f'{len(undercut)} gears with undercut, fewer than {analysis.min_teeth} teeth')
+    interfering = sum(analysis.interference)
+    if interfering:
+        lines.append(f'{interfering} meshes with tip interference')
+    lines.append(f'Backlash {_mm(min(analysis.backlash))} to {_mm(max(analysis.backlash))} mm')
+    return lines
+
+
+def _mm(value: float) -> str:
+    # Centimeters as millimeters, without printing noise as -0.000.
+    value *= 10.0
+    return f'{value if abs(value) >= 5e-4 else 0.0:.3f}'
+
+
+def analysis_warnings(analysis: MeshAnalysis, teeth: Sequence[int], limit: int = 20) -> List[str]:
+    """Returns a line for each pair that fails a check, at most limit of them.
+
+    Gears are numbered from 1 in the order they were given.
+    """
+    lines = []
+    undercut = set(analysis.undercut(teeth))
+    for k, (i, j) in enumerate(analysis.pairs):
+        problems = []
+        if analysis.contact_ratio[k] < MIN_CONTACT_RATIO:
+            problems.append(f'contact ratio {analysis.contact_ratio[k]:.2f}')
+        if analysis.interference[k]:
+            problems.append('tip interference' if analysis.clearance[k] >= 0.0 else
+                            f'tip runs {_mm(-analysis.clearance[k])} mm into the root')
+        for g in (i, j):
+            if g in undercut:
+                problems.append(f'gear {g + 1} is undercut')
+        if analysis.backlash[k] < -BACKLASH_TOLERANCE:
+            problems.append(f'backlash {_mm(analysis.backlash[k])} mm')
+        if problems:
+            if len(lines) == limit:
+                lines.append('...')
+                break
+            lines.append(f'Gear {i + 1} ({teeth[i]} teeth) and gear {j + 1} ({teeth[j]} teeth): ' + ', '.join(problems))
+    return lines
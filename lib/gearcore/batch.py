@@ -0,0 +1,597 @@
+"""Batch processing of gear trains read from JSON or CSV files, without Fusion 360.
+
+Every train is read, solved and written before the next one is read, so
+files with thousands of trains are processed in constant memory. Solving a
+train does what the command does with the selected pitch circles: the number
+of teeth is rounded from the pitch radius, the meshing gears are found and
+the phase angles are propagated through every gear train.
+
+Files use the units of the dialog: lengths in millimeters and angles in
+degrees. Internally gears are laid out in centimeters like everywhere else
+in gearcore.
+
+JSON input is a sequence of train objects, one per line (JSON Lines) or
+simply one after the other; a top-level list of trains also works but is
+read as a whole. A train object looks like:
+
+    {"name": "A", "module": 1.0, "pressure_angle": 20, "backlash": 0,
+     "root_fillet_radius": 0.5, "hole_diam": 3,
+     "gears": [{"center": [0, 0, 0], "normal": [0, 0, 1], "radius": 6}, ...]}
+
+Only module, the gears, their centers and their radii are required. CSV
+input has one row per gear with the columns train, x, y, z, nx, ny, nz,
+radius, module, pressure_angle, backlash, root_fillet_radius and hole_diam.
+The rows of a train must follow each other and the values of the train are
+taken from its first row.
+
+With more than one worker the trains are solved and formatted in a pool of
+processes and written in the order they were read.
+
+Run it as a script from the lib folder of the add-in:
+
+    python -m gearcore trains.jsonl -o placements.jsonl --dxf outlines.dxf
+"""
+
+import contextlib
+import csv
+import io
+import json
+import math
+import re
+import sys
+import time
+from typing import IO, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .export import MM_PER_CM, DxfWriter
+from .geometry import GearSpec, ToothProfile, outline_polyline
+from .parallel import make_executor, map_ordered
+from .profile_cache import ProfileCache
+from .table import GearTable
+from .train import MeshGraph, find_meshes, gear_order, solve_phases
+
+__all__ = [
+    'TrainRecord',
+    'TrainResult',
+    'read_trains',
+    'train_record',
+    'solve_train',
+    'JsonResultWriter',
+    'CsvResultWriter',
+    'process_train',
+    'run_batch',
+]
+
+Vector = Tuple[float, float, float]
+
+# Fewest teeth a gear of a batch may have, as in the edit command.
+MIN_TEETH = 4
+
+# Chord tolerance of the flanks as a fraction of the module, the 'Normal'
+# accuracy of the dialog.
+DEFAULT_FLANK_TOLERANCE = 1e-3
+
+# Values of the CSV columns that belong to the train rather than the gear.
+_TRAIN_COLUMNS = ('module', 'pressure_angle', 'backlash', 'root_fillet_radius', 'hole_diam')
+
+# Trains sent to a worker process at a time.
+WORKER_CHUNK_SIZE = 16
+
+_READ_SIZE = 1 << 16
+_WHITESPACE = re.compile(r'\s*')
+
+
+class TrainRecord(NamedTuple):
+    """A gear train as read from a file, in centimeters and radians.
+
+    module -- The module in centimeters, as the dialog's module value.
+    gears -- The pitch circles, whose other columns are filled by solve_train.
+    """
+    name: str
+    module: float
+    pressure_angle: float
+    backlash: float
+    root_fillet_radius: float
+    hole_diam: float
+    gears: GearTable
+
+
+class TrainResult(NamedTuple):
+    """The solved layout of a train, in centimeters and radians.
+
+    The number of teeth, plane, in-plane center, phase angle and gear train
+    of each gear are the columns of the gears of the train.
+
+    meshes -- The meshing pairs, see find_meshes.
+    conflicts -- The meshes that cannot be phased, see solve_phases.
+    matrices -- The placement of each gear, see placement_matrix.
+    profiles -- The tooth profile of each distinct number of teeth.
+    """
+    train: TrainRecord
+    meshes: List[Tuple[int, int]]
+    conflicts: List[Tuple[int, int, float]]
+    matrices: List[List[float]]
+    profiles: Dict[int, ToothProfile]
+
+
+def _json_values(stream: IO[str]) -> Iterator:
+    # Decodes JSON values one after the other, reading the stream in chunks.
+    # The items of a top-level list are yielded one by one.
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos < len(buffer):
+            try:
+                value, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                if isinstance(value, list):
+                    yield from value
+                else:
+                    yield value
+                continue
+        elif eof:
+            return
+        # The next value is not complete yet.
+        chunk = stream.read(_READ_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def _csv_trains(stream: IO[str]) -> Iterator[dict]:
+    # Groups the rows of consecutive gears of the same train into train objects.
+    data = None
+    for row in csv.DictReader(stream):
+        name = row.get('train') or ''
+        if data is None or name != data['name']:
+            if data is not None:
+                yield data
+            data = {'name': name}
+            for column in _TRAIN_COLUMNS:
+                if row.get(column):
+                    data[column] = row[column]
+            data['gears'] = []
+        center = [row.get(c) or 0.0 for c in ('x', 'y', 'z')]
+        normal = [row.get(c) or d for c, d in (('nx', 0.0), ('ny', 0.0), ('nz', 1.0))]
+        data['gears'].append({'center': center, 'normal': normal, 'radius': row.get('radius')})
+    if data is not None:
+        yield data
+
+
+def read_trains(stream: IO[str], fmt: str = 'json') -> Iterator[dict]:
+    """Yields the train objects of a file one at a time, see train_record.
+
+    Raises ValueError for a file that is not valid JSON. The values of the
+    trains are only checked by train_record, so a bad train does not stop
+    the ones after it from being read.
+
+    Arguments:
+    stream -- Text stream of the file.
+    fmt -- 'json' for JSON and JSON Lines, or 'csv'.
+    """
+    if fmt == 'csv':
+        return _csv_trains(stream)
+    return _json_values(stream)
+
+
+def _number(data: dict, key: str, default: Optional[float] = None) -> float:
+    value = data.get(key)
+    if value is None or value == '':
+        if default is None:
+            raise ValueError(f'{key} is missing')
+        return default
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} is not a number: {value!r}') from None
+    if not math.isfinite(value):
+        raise ValueError(f'{key} is not finite')
+    return value
+
+
+def _vector(value, default: Sequence[float], key: str) -> Vector:
+    if value is None:
+        value = default
+    if not isinstance(value, (list, tuple)) or not 2 <= len(value) <= 3:
+        raise ValueError(f'{key} is not a list of 2 or 3 numbers: {value!r}')
+    data = dict(zip('xyz', value))
+    try:
+        return tuple(_number(data, c, 0.0) for c in 'xyz')
+    except ValueError as error:
+        raise ValueError(f'{key}: {error}') from None
+
+
+def train_record(data, number: int = 0) -> TrainRecord:
+    """Returns the train of a train object read from a file.
+
+    Raises ValueError if values are missing or out of range.
+
+    Arguments:
+    data -- The train object, as yielded by read_trains.
+    number -- The position of the train in the file, the name of trains without one.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f'Train {number} is not an object')
+    name = str(data.get('name') or number)
+    try:
+        module = _number(data, 'module')
+        pressure_angle = _number(data, 'pressure_angle', 20.0)
+        backlash = _number(data, 'backlash', 0.0)
+        root_fillet_radius = _number(data, 'root_fillet_radius', 0.0)
+        hole_diam = _number(data, 'hole_diam', 0.0)
+        if module <= 0.0:
+            raise ValueError('module must be positive')
+        if not 0.0 < pressure_angle < 45.0:
+            raise ValueError('pressure_angle must be between 0 and 45 degrees')
+        if backlash < 0.0 or root_fillet_radius < 0.0 or hole_diam < 0.0:
+            raise ValueError('backlash, root_fillet_radius and hole_diam must not be negative')
+        items = data.get('gears')
+        if not isinstance(items, list) or not items:
+            raise ValueError('gears is missing or empty')
+
+        gears = GearTable()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise ValueError(f'gear {index + 1} is not an object')
+            center = _vector(item.get('center'), None, f'center of gear {index + 1}')
+            nx, ny, nz = _vector(item.get('normal'), (0.0, 0.0, 1.0), f'normal of gear {index + 1}')
+            length = math.sqrt(nx * nx + ny * ny + nz * nz)
+            if length < 1e-12:
+                raise ValueError(f'normal of gear {index + 1} is zero')
+            radius = _number(item, 'radius')
+            if round(radius * 2.0 / module) < MIN_TEETH:
+                raise ValueError(f'gear {index + 1} is too small for {MIN_TEETH} teeth')
+            gears.append(tuple(c / MM_PER_CM for c in center), (nx / length, ny / length, nz / length),
+                         radius / MM_PER_CM)
+    except ValueError as error:
+        raise ValueError(f'Train {name}: {error}') from None
+
+    return TrainRecord(name, module / MM_PER_CM, math.radians(pressure_angle), backlash / MM_PER_CM,
+                       root_fillet_radius / MM_PER_CM, hole_diam / MM_PER_CM, gears)
+
+
+def solve_train(train: TrainRecord, profile_cache: ProfileCache = None,
+                tolerance: Optional[float] = DEFAULT_FLANK_TOLERANCE) -> TrainResult:
+    """Lays out a train the way the command lays out the selected pitch circles.
+
+    Arguments:
+    train -- The train to solve.
+    profile_cache -- Optional cache the tooth profiles are taken from, which
+                     pays off when many trains share the same gears.
+    tolerance -- The chord tolerance of the flanks, see tooth_profiles.
+    """
+    gears = train.gears
+    ts = gears.count_teeth(train.module)
+    planes = gears.group_planes()
+    meshes = find_meshes(planes, ts, train.module)
+    order = gear_order(planes, ts)
+    graph = MeshGraph(len(ts), meshes, order)
+    phases = solve_phases(graph, ts, planes.coords, order)
+    gears.set_phases(phases)
+
+    teeth = sorted(set(ts))
+    diametral_pitch = 2.54 / train.module
+    specs = [GearSpec(diametral_pitch, t, train.pressure_angle, train.backlash, train.root_fillet_radius)
+             for t in teeth]
+    if profile_cache is None:
+        profile_cache = ProfileCache(len(specs))
+    profiles = dict(zip(teeth, profile_cache.get_many(specs, tolerance=tolerance)))
+
+    matrices = [gears.matrix(i) for i in range(len(gears))]
+    return TrainResult(train, meshes, phases.conflicts, matrices, profiles)
+
+
+def _mm(value: float) -> float:
+    return round(value * MM_PER_CM, 9)
+
+
+def _matrix_mm(matrix: Sequence[float]) -> List[float]:
+    # The translation is a length, the rotation is not.
+    return [_mm(v) if k in (3, 7, 11) else round(v, 12) for k, v in enumerate(matrix)]
+
+
+class JsonResultWriter:
+    """Writes every solved train as one line of JSON.
+
+    A line holds the name of the train, its gears with their number of teeth,
+    center, normal, phase angle, gear train and placement matrix, the meshes,
+    the conflicts and the distinct tooth profiles with their diameters and,
+    with outlines, the closed outline of the whole gear as a polyline. A train
+    that could not be solved is written with its error instead.
+
+    Arguments:
+    stream -- Text stream the lines are written to.
+    outlines -- Whether to write the outlines of the profiles.
+    """
+
+    def __init__(self, stream: IO[str], outlines: bool = True):
+        self.stream = stream
+        self.outlines = outlines
+        self._profiles = {}
+
+    def options(self) -> dict:
+        """Returns the arguments that make a writer of the same output for another stream."""
+        return {'outlines': self.outlines}
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+    def _profile(self, profile: ToothProfile) -> str:
+        # The JSON of each distinct profile is made once, most trains of a
+        # batch share their gears.
+        entry = self._profiles.get(id(profile))
+        if entry is not None and entry[0] is profile:
+            return entry[1]
+        dims = profile.dims
+        data = {
+            'teeth': profile.num_teeth,
+            'pitch_dia': _mm(dims.pitch_dia),
+            'root_dia': _mm(dims.root_dia),
+            'base_dia': _mm(dims.base_dia),
+            'outside_dia': _mm(dims.outside_dia),
+        }
+        if self.outlines:
+            data['outline'] = [[_mm(x), _mm(y)] for x, y in outline_polyline(profile)]
+        text = json.dumps(data, separators=(',', ':'))
+        self._profiles[id(profile)] = (profile, text)
+        return text
+
+    def add(self, result: TrainResult):
+        """Writes one solved train."""
+        table = result.train.gears
+        gears = []
+        for i in range(len(table)):
+            gears.append({
+                'teeth': table.teeth[i],
+                'center': [_mm(c) for c in table.position(i)],
+                'normal': list(table.normal(i)),
+                'plane': table.plane[i],
+                'angle': round(math.degrees(table.angle[i]), 9),
+                'train': table.component[i],
+                'matrix': _matrix_mm(result.matrices[i]),
+            })
+        data = {
+            'name': result.train.name,
+            'gears': gears,
+            'meshes': [list(pair) for pair in result.meshes],
+            'conflicts': [{'gear': i, 'other': j, 'error': math.degrees(error)} for i, j, error in result.conflicts],
+        }
+        profiles = ','.join(self._profile(result.profiles[t]) for t in sorted(result.profiles))
+        self.stream.write(f'{json.dumps(data, separators=(",", ":"))[:-1]},"profiles":[{profiles}]}}\n')
+
+    def add_error(self, name: str, error: str):
+        """Writes a train that could not be solved."""
+        self.stream.write(json.dumps({'name': name, 'error': error}) + '\n')
+
+
+class CsvResultWriter:
+    """Writes one row per gear with its placement and diameters.
+
+    Trains that could not be solved are written as a single row with the error.
+
+    Arguments:
+    stream -- Text stream the rows are written to.
+    """
+
+    COLUMNS = ['train', 'gear', 'teeth', 'x', 'y', 'z', 'nx', 'ny', 'nz', 'plane', 'angle', 'component',
+               'pitch_dia', 'outside_dia', 'root_dia', 'conflict', 'error']
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.writer = csv.writer(stream, lineterminator='\n')
+
+    def options(self) -> dict:
+        """Returns the arguments that make a writer of the same output for another stream."""
+        return {}
+
+    def begin(self):
+        self.writer.writerow(self.COLUMNS)
+
+    def end(self):
+        pass
+
+    def add(self, result: TrainResult):
+        """Writes the gears of one solved train."""
+        conflicting = set()
+        for i, j, error in result.conflicts:
+            conflicting.update((i, j))
+        table = result.train.gears
+        for i in range(len(table)):
+            dims = result.profiles[table.teeth[i]].dims
+            self.writer.writerow([result.train.name, i + 1, table.teeth[i], *(_mm(c) for c in table.position(i)),
+                                  *table.normal(i), table.plane[i], round(math.degrees(table.angle[i]), 9),
+                                  table.component[i], _mm(dims.pitch_dia), _mm(dims.outside_dia),
+                                  _mm(dims.root_dia), int(i in conflicting), ''])
+
+    def add_error(self, name: str, error: str):
+        """Writes a train that could not be solved."""
+        self.writer.writerow([name] + [''] * (len(self.COLUMNS) - 2) + [error])
+
+
+def process_train(data, number: int, writer, dxf: DxfWriter = None, profile_cache: ProfileCache = None,
+                  tolerance: Optional[float] = DEFAULT_FLANK_TOLERANCE) -> dict:
+    """Solves one train object and writes it, and returns its counts for the statistics of the run.
+
+    A train with bad values is written with its error.
+
+    Arguments:
+    data -- The train object, as yielded by read_trains.
+    number -- The position of the train in the file.
+    writer -- A JsonResultWriter or CsvResultWriter.
+    dxf -- Optional DXF writer the outlines of the gears are added to, with a
+           layer per plane of the train.
+    profile_cache -- Cache of the tooth profiles shared by all trains.
+    tolerance -- The chord tolerance of the flanks, see tooth_profiles.
+    """
+    try:
+        result = solve_train(train_record(data, number), profile_cache, tolerance)
+    except ValueError as error:
+        name = data.get('name') if isinstance(data, dict) else None
+        writer.add_error(str(name or number), str(error))
+        return {'gears': 0, 'meshes': 0, 'conflicts': 0, 'errors': 1}
+    writer.add(result)
+    if dxf is not None:
+        for gear in result.train.gears.placed_gears(result.profiles, result.train.hole_diam,
+                                                    f'TRAIN{number}_PLANE{{plane}}'):
+            dxf.add(gear)
+    return {'gears': len(result.train.gears), 'meshes': len(result.meshes), 'conflicts': len(result.conflicts), 'errors': 0}
+
+
+class _Worker:
+    # Processes trains in a worker process. Every train is written to buffers
+    # whose text is sent back, so the main process only writes it out in order
+    # and numbers the DXF entities.
+
+    def __init__(self, writer_type, writer_options, dxf_options, profile_cache, tolerance):
+        self.buffer = io.StringIO()
+        self.dxf_buffer = io.StringIO()
+        self.writer = writer_type(self.buffer, **writer_options)
+        self.dxf = DxfWriter(self.dxf_buffer, handles=False, **dxf_options) if dxf_options is not None else None
+        self.profile_cache = profile_cache
+        self.tolerance = tolerance
+
+    @staticmethod
+    def _take(buffer: io.StringIO) -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    def run(self, chunk):
+        results = []
+        for number, data in chunk:
+            counts = process_train(data, number, self.writer, self.dxf, self.profile_cache, self.tolerance)
+            results.append((counts, self._take(self.buffer), self._take(self.dxf_buffer)))
+        return results
+
+
+# The _Worker of a worker process.
+_worker = None
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = _Worker(*args)
+
+
+def _run_chunk(chunk):
+    return _worker.run(chunk)
+
+
+def run_batch(trains: Iterator, writer, dxf: DxfWriter = None, profile_cache: ProfileCache = None,
+              tolerance: Optional[float] = DEFAULT_FLANK_TOLERANCE, workers: int = 1) -> dict:
+    """Solves and writes the trains one at a time and returns statistics of the run.
+
+    With more than one worker the trains are solved and formatted in a pool
+    of processes, each starting with a copy of the profile cache, and
+    written in the order they were read. Profiles computed by the workers
+    are not added to the given cache.
+
+    Arguments:
+    trains -- The train objects, as yielded by read_trains.
+    writer -- A JsonResultWriter or CsvResultWriter.
+    dxf -- Optional DXF writer, see process_train.
+    profile_cache -- Cache of the tooth profiles shared by all trains.
+    tolerance -- The chord tolerance of the flanks, see tooth_profiles.
+    workers -- The number of worker processes, 0 for one per core.
+    """
+    if profile_cache is None:
+        profile_cache = ProfileCache()
+    stats = {'trains': 0, 'gears': 0, 'meshes': 0, 'conflicts': 0, 'errors': 0}
+    writer.begin()
+    if workers == 1:
+        for number, data in enumerate(trains, 1):
+            stats['trains'] += 1
+            for key, count in process_train(data, number, writer, dxf, profile_cache, tolerance).items():
+                stats[key] += count
+    else:
+        dxf_options = {'splines': dxf.splines, 'scale': dxf.scale} if dxf is not None else None
+        with make_executor(workers, initializer=_init_worker,
+                           initargs=(type(writer), writer.options(), dxf_options, profile_cache, tolerance)) as executor:
+            for counts, text, dxf_text in map_ordered(executor, _run_chunk, enumerate(trains, 1), WORKER_CHUNK_SIZE):
+                stats['trains'] += 1
+                for key, count in counts.items():
+                    stats[key] += count
+                writer.stream.write(text)
+                if dxf is not None:
+                    dxf.copy(dxf_text, counts['gears'])
+    writer.end()
+    stats['profiles'] = profile_cache.stats()
+    return stats
+
+
+def _format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'json'
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """Runs the batch processing from the command line and returns the exit code."""
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m gearcore',
+                                     description='Solves gear trains read from JSON or CSV files.')
+    parser.add_argument('input', help='file of gear trains, - for standard input')
+    parser.add_argument('-o', '--output', default='-', help='file the solved trains are written to')
+    parser.add_argument('--input-format', choices=['json', 'csv'], help='default: from the file name')
+    parser.add_argument('--output-format', choices=['json', 'csv'], help='default: from the file name')
+    parser.add_argument('--dxf', help='also write the outlines of all gears to this DXF file')
+    parser.add_argument('--flank-tolerance', type=float, default=DEFAULT_FLANK_TOLERANCE,
+                        help='chord tolerance of the flanks as a fraction of the module')
+    parser.add_argument('--no-outlines', action='store_true', help='leave the outlines out of JSON output')
+    parser.add_argument('--profile-cache', help='gzipped profile cache file to start from and update')
+    parser.add_argument('--cache-size', type=int, default=4096, help='profiles kept in memory')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes, 0 for one per core, 1 to run in this process')
+    args = parser.parse_args(argv)
+
+    profile_cache = ProfileCache(args.cache_size)
+    if args.profile_cache:
+        profile_cache.load(args.profile_cache)
+
+    start = time.perf_counter()
+    with _open(args.input, 'r') as source, _open(args.output, 'w') as target, \
+            _open(args.dxf, 'w') as dxf_stream:
+        if _format(args.output, args.output_format) == 'csv':
+            writer = CsvResultWriter(target)
+        else:
+            writer = JsonResultWriter(target, not args.no_outlines)
+        dxf = None
+        if dxf_stream is not None:
+            dxf = DxfWriter(dxf_stream, layers=None)
+            dxf.begin()
+        try:
+            stats = run_batch(read_trains(source, _format(args.input, args.input_format)), writer, dxf,
+                              profile_cache, args.flank_tolerance, args.workers)
+        except ValueError as error:
+            print(f'{args.input}: {error}', file=sys.stderr)
+            return 1
+        if dxf is not None:
+            dxf.end()
+
+    if args.profile_cache and profile_cache.is_dirty:
+        profile_cache.save(args.profile_cache)
+    print(f'{stats["trains"]} trains, {stats["gears"]} gears, {stats["meshes"]} meshes, '
+          f'{stats["conflicts"]} conflicts, {stats["errors"]} errors in {time.perf_counter() - start:.2f} s',
+          file=sys.stderr)
+    return 1 if stats['errors'] else 0
+
+
+@contextlib.contextmanager
+def _open(path: Optional[str], mode: str):
+    # Opens a file, standard input or output for -, or nothing for None.
+    if path is None:
+        yield None
+    elif path == '-':
+        yield sys.stdin if 'r' in mode else sys.stdout
+    else:
+        with open(path, mode, newline='', encoding='utf-8') as f:
+            yield f
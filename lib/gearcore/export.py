@@ -0,0 +1,448 @@
+"""Streaming export of placed gear outlines to DXF and SVG.
+
+The writers take the gears one at a time and write each as soon as it is
+given, so the size of the drawing is only limited by the output file. Nothing
+here depends on the Fusion 360 API. Outlines are computed once per distinct
+tooth profile and then only rotated and moved.
+
+Coordinates are written in millimeters by default; gears are laid out in
+centimeters like everywhere else in gearcore.
+"""
+
+import math
+import shutil
+import tempfile
+from bisect import bisect_right
+from typing import IO, Iterable, List, NamedTuple, Optional, Tuple
+
+from .geometry import FlankSpline, ToothProfile, arc_center, gear_outline
+
+__all__ = [
+    'PlacedGear',
+    'DxfWriter',
+    'SvgWriter',
+    'write_dxf',
+    'write_svg',
+    'gear_bounds',
+    'bezier_segments',
+]
+
+Point = Tuple[float, float]
+
+# Centimeters to the millimeters written to the files.
+MM_PER_CM = 10.0
+
+
+class PlacedGear(NamedTuple):
+    """A gear at its place in the plane of its gear train.
+
+    x, y -- The center of the gear in the coordinates of its plane.
+    angle -- The rotation of the gear about its center.
+    layer -- DXF layer, or SVG class, the gear is written to.
+    """
+    profile: ToothProfile
+    x: float
+    y: float
+    angle: float
+    hole_diam: float = 0.0
+    layer: str = '0'
+
+
+def bezier_segments(spline: FlankSpline) -> List[List[Point]]:
+    """Returns the Bezier segments of a clamped B-spline, each as its control points.
+
+    Every interior knot is inserted until its multiplicity equals the degree,
+    which splits the curve into Bezier segments without changing its shape.
+
+    Arguments:
+    spline -- The B-spline to split.
+    """
+    degree = spline.degree
+    knots = list(spline.knots)
+    points = list(spline.control_points)
+    for u in sorted(set(knots[degree + 1:-degree - 1])):
+        while knots.count(u) < degree:
+            k = bisect_right(knots, u) - 1
+            s = knots.count(u)
+            inserted = []
+            for i in range(k - degree + 1, k - s + 1):
+                a = (u - knots[i]) / (knots[i + degree] - knots[i])
+                (x0, y0), (x1, y1) = points[i - 1], points[i]
+                inserted.append((x0 + (x1 - x0) * a, y0 + (y1 - y0) * a))
+            points = points[:k - degree + 1] + inserted + points[k - s:]
+            knots.insert(k + 1, u)
+    return [points[i:i + degree + 1] for i in range(0, len(points) - 1, degree)]
+
+
+def _arc_sweep(start: Point, middle: Point, end: Point) -> Optional[Tuple[Point, float, float]]:
+    # The center, radius and signed sweep angle of the arc through three points.
+    circle = arc_center(start, middle, end)
+    if circle is None:
+        return None
+    (cx, cy), radius = circle
+    a0 = math.atan2(start[1] - cy, start[0] - cx)
+    am = (math.atan2(middle[1] - cy, middle[0] - cx) - a0) % (2.0 * math.pi)
+    a1 = (math.atan2(end[1] - cy, end[0] - cx) - a0) % (2.0 * math.pi)
+    sweep = a1 if am < a1 else a1 - 2.0 * math.pi
+    return (cx, cy), radius, sweep
+
+
+class _OutlineWriter:
+    """Base of the writers: caches outlines and places their points."""
+
+    def __init__(self, stream: IO[str], scale: float):
+        self.stream = stream
+        self.scale = scale
+        self.count = 0
+        self._outlines = {}
+
+    def _outline(self, profile: ToothProfile):
+        # The outline of each distinct profile, with the sweep of its arcs.
+        key = id(profile)
+        entry = self._outlines.get(key)
+        if entry is None or entry[0] is not profile:
+            segments = gear_outline(profile)
+            sweeps = [_arc_sweep(seg.points[0], seg.points[1], seg.points[-1]) if seg.kind == 'arc' else None
+                      for seg in segments]
+            entry = self._outlines[key] = (profile, segments, sweeps)
+        return entry[1], entry[2]
+
+    def _placer(self, gear: PlacedGear):
+        # Maps points of the gear's own plane to drawing coordinates.
+        c, s = math.cos(gear.angle) * self.scale, math.sin(gear.angle) * self.scale
+        ox, oy = gear.x * self.scale, gear.y * self.scale
+        return lambda p: (ox + c * p[0] - s * p[1], oy + s * p[0] + c * p[1])
+
+
+# Handles of the tables, blocks and dictionaries every DXF file has. The
+# entities are numbered from FIRST_HANDLE.
+_TABLE_HANDLES = {'BLOCK_RECORD': 1, 'LAYER': 2, 'STYLE': 3, 'LTYPE': 5, 'VIEW': 6, 'UCS': 7, 'VPORT': 8,
+                  'APPID': 9, 'DIMSTYLE': 0xA}
+_ROOT_DICTIONARY, _GROUP_DICTIONARY = 0xC, 0xD
+_MODEL_SPACE, _PAPER_SPACE = 0x1F, 0x1B
+FIRST_HANDLE = 0x100
+
+# The next free handle written to the header. The header comes before the
+# entities, so it is set above any handle a drawing can reach.
+_HANDSEED = 0x7FFFFFFF
+
+# The handle written by a DxfWriter without numbering, see DxfWriter.copy.
+_NO_HANDLE = '\n5\n*\n'
+
+
+class DxfWriter(_OutlineWriter):
+    """Writes gears as the entities of a DXF file.
+
+    The file is an AutoCAD 2000 (AC1015) drawing, the oldest version with
+    SPLINE and LWPOLYLINE entities. With splines the flanks are written as
+    SPLINE entities and the lines and arcs between them as LWPOLYLINEs with
+    bulges. Without, every gear is one closed LWPOLYLINE through the sampled
+    flank points, which all cutting software reads. Holes are CIRCLEs.
+
+    Arguments:
+    stream -- Text stream the file is written to.
+    splines -- Whether to write the flanks as splines.
+    scale -- Drawing units per centimeter.
+    layers -- The layers listed in the layer table besides 0. Readers add
+              layers used by the gears that are not listed. None lists the
+              layers the gears are written to, which keeps the entities in a
+              temporary file until end, as the table comes before them.
+    handles -- Whether to number the entities. Entities written without
+               numbers are numbered when copied into a numbering writer.
+    """
+
+    def __init__(self, stream: IO[str], splines: bool = True, scale: float = MM_PER_CM,
+                 layers: Optional[Iterable[str]] = (), handles: bool = True):
+        super().__init__(stream, scale)
+        self.splines = splines
+        self.layers = list(layers) if layers is not None else None
+        self.handles = handles
+        self._next_handle = FIRST_HANDLE
+        self._target = None
+        self._used_layers = None
+
+    def _pairs(self, *pairs):
+        self.stream.write(''.join(f'{code}\n{value}\n' for code, value in pairs))
+
+    @staticmethod
+    def _num(value: float) -> str:
+        return f'{value:.6f}'
+
+    def _handle(self) -> str:
+        if not self.handles:
+            return '*'
+        handle = self._next_handle
+        self._next_handle += 1
+        return f'{handle:X}'
+
+    def _entity(self, kind: str, layer: str, subclass: str) -> str:
+        # The common start of an entity in model space.
+        if self._used_layers is not None and layer not in self._used_layers:
+            self._used_layers[layer] = None
+        return (f'0\n{kind}\n5\n{self._handle()}\n330\n{_MODEL_SPACE:X}\n100\nAcDbEntity\n8\n{layer}\n'
+                f'100\n{subclass}\n')
+
+    @staticmethod
+    def _table(name: str, records: List[Tuple[str, list]], handle_code: int = 5) -> list:
+        # A symbol table with its records, each a name, handle and pairs.
+        table = _TABLE_HANDLES[name]
+        pairs = [(0, 'TABLE'), (2, name), (5, f'{table:X}'), (330, 0), (100, 'AcDbSymbolTable'),
+                 (70, len(records))]
+        if name == 'DIMSTYLE':
+            pairs.append((100, 'AcDbDimStyleTable'))
+        subclass = {'BLOCK_RECORD': 'AcDbBlockTableRecord', 'LAYER': 'AcDbLayerTableRecord',
+                    'STYLE': 'AcDbTextStyleTableRecord', 'LTYPE': 'AcDbLinetypeTableRecord',
+                    'APPID': 'AcDbRegAppTableRecord', 'DIMSTYLE': 'AcDbDimStyleTableRecord'}.get(name)
+        for handle, record in records:
+            pairs += [(0, name), (handle_code, f'{handle:X}'), (330, f'{table:X}'), (100, 'AcDbSymbolTableRecord'),
+                      (100, subclass)] + record
+        pairs.append((0, 'ENDTAB'))
+        return pairs
+
+    @staticmethod
+    def _block(name: str, record: int, begin: int, end: int) -> list:
+        # The empty block of a layout, owned by its block record.
+        return [(0, 'BLOCK'), (5, f'{begin:X}'), (330, f'{record:X}'), (100, 'AcDbEntity'), (8, '0'),
+                (100, 'AcDbBlockBegin'), (2, name), (70, 0), (10, '0.0'), (20, '0.0'), (30, '0.0'), (3, name),
+                (1, ''), (0, 'ENDBLK'), (5, f'{end:X}'), (330, f'{record:X}'), (100, 'AcDbEntity'), (8, '0'),
+                (100, 'AcDbBlockEnd')]
+
+    def begin(self):
+        if self.layers is None:
+            self._target = self.stream
+            self.stream = tempfile.TemporaryFile('w+', encoding='utf-8', newline='')
+            self._used_layers = {}
+            self._next_handle = max(self._next_handle, FIRST_HANDLE)
+            return
+        layers = ['0'] + [name for name in dict.fromkeys(self.layers) if name != '0']
+        self._next_handle = max(self._next_handle, 0x20 + len(layers), FIRST_HANDLE)
+        self._head([(0x20 + i, name) for i, name in enumerate(layers)])
+
+    def _head(self, layers: List[Tuple[int, str]]):
+        # The header, tables and blocks up to the entities, with the given
+        # handles and names of the layers.
+        # $INSUNITS 4 is millimeters, 5 centimeters.
+        units = 4 if self.scale == MM_PER_CM else 5 if self.scale == 1.0 else 0
+        linetype = [(70, 0), (3, ''), (72, 65), (73, 0), (40, '0.0')]
+        pairs = [(0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1015'), (9, '$HANDSEED'),
+                 (5, f'{_HANDSEED:X}'), (9, '$INSUNITS'), (70, units), (9, '$MEASUREMENT'), (70, 1 if units else 0),
+                 (0, 'ENDSEC'), (0, 'SECTION'), (2, 'CLASSES'), (0, 'ENDSEC'), (0, 'SECTION'), (2, 'TABLES')]
+        pairs += self._table('VPORT', [])
+        pairs += self._table('LTYPE', [(0x14, [(2, 'ByBlock')] + linetype), (0x15, [(2, 'ByLayer')] + linetype),
+                                       (0x16, [(2, 'Continuous'), (70, 0), (3, 'Solid line'), (72, 65), (73, 0),
+                                               (40, '0.0')])])
+        pairs += self._table('LAYER', [(handle, [(2, name), (70, 0), (62, 7), (6, 'Continuous')])
+                                       for handle, name in layers])
+        pairs += self._table('STYLE', [(0x11, [(2, 'Standard'), (70, 0), (40, '0.0'), (41, '1.0'), (50, '0.0'),
+                                               (71, 0), (42, '2.5'), (3, 'txt'), (4, '')])])
+        pairs += self._table('VIEW', [])
+        pairs += self._table('UCS', [])
+        pairs += self._table('APPID', [(0x12, [(2, 'ACAD'), (70, 0)])])
+        pairs += self._table('DIMSTYLE', [(0x17, [(2, 'Standard'), (70, 0)])], 105)
+        pairs += self._table('BLOCK_RECORD', [(_MODEL_SPACE, [(2, '*Model_Space')]),
+                                              (_PAPER_SPACE, [(2, '*Paper_Space')])])
+        pairs += [(0, 'ENDSEC'), (0, 'SECTION'), (2, 'BLOCKS')]
+        pairs += self._block('*Model_Space', _MODEL_SPACE, 0x1E, 0x1D)
+        pairs += self._block('*Paper_Space', _PAPER_SPACE, 0x1C, 0x1A)
+        pairs += [(0, 'ENDSEC'), (0, 'SECTION'), (2, 'ENTITIES')]
+        self._pairs(*pairs)
+
+    def end(self):
+        if self._target is not None:
+            # The layers are numbered after the entities, which are already numbered.
+            entities, self.stream, self._target = self.stream, self._target, None
+            names = ['0'] + [name for name in self._used_layers if name != '0']
+            self._head([(self._next_handle + i, name) for i, name in enumerate(names)])
+            self._next_handle += len(names)
+            entities.seek(0)
+            shutil.copyfileobj(entities, self.stream)
+            entities.close()
+        self._pairs((0, 'ENDSEC'), (0, 'SECTION'), (2, 'OBJECTS'),
+                    (0, 'DICTIONARY'), (5, f'{_ROOT_DICTIONARY:X}'), (330, 0), (100, 'AcDbDictionary'), (281, 1),
+                    (3, 'ACAD_GROUP'), (350, f'{_GROUP_DICTIONARY:X}'),
+                    (0, 'DICTIONARY'), (5, f'{_GROUP_DICTIONARY:X}'), (330, f'{_ROOT_DICTIONARY:X}'),
+                    (100, 'AcDbDictionary'), (281, 1),
+                    (0, 'ENDSEC'), (0, 'EOF'))
+
+    def copy(self, text: str, count: int):
+        """Writes entities written by a writer without handles, numbering them.
+
+        Arguments:
+        text -- The entities, as written by a DxfWriter with handles=False.
+        count -- The number of gears in them.
+        """
+        parts = text.split(_NO_HANDLE)
+        out = [parts[0]]
+        for part in parts[1:]:
+            out += ['\n5\n', self._handle(), '\n', part]
+            if self._used_layers is not None:
+                # Every entity starts with its owner, subclass and layer.
+                layer = part.split('\n', 6)[5]
+                if layer not in self._used_layers:
+                    self._used_layers[layer] = None
+        self.stream.write(''.join(out))
+        self.count += count
+
+    def _polyline(self, layer: str, vertices, closed: bool):
+        out = [self._entity('LWPOLYLINE', layer, 'AcDbPolyline'), f'90\n{len(vertices)}\n70\n{1 if closed else 0}\n']
+        for (x, y), bulge in vertices:
+            out.append(f'10\n{x:.6f}\n20\n{y:.6f}\n42\n{bulge:.6f}\n' if bulge else f'10\n{x:.6f}\n20\n{y:.6f}\n')
+        self.stream.write(''.join(out))
+
+    def _spline(self, layer: str, spline: FlankSpline, place):
+        points = [place(p) for p in spline.control_points]
+        out = [self._entity('SPLINE', layer, 'AcDbSpline'),
+               f'210\n0.0\n220\n0.0\n230\n1.0\n70\n8\n71\n{spline.degree}\n'
+               f'72\n{len(spline.knots)}\n73\n{len(points)}\n74\n0\n']
+        out += [f'40\n{u:.6f}\n' for u in spline.knots]
+        out += [f'10\n{x:.6f}\n20\n{y:.6f}\n30\n0.0\n' for x, y in points]
+        self.stream.write(''.join(out))
+
+    def add(self, gear: PlacedGear):
+        """Writes one gear."""
+        segments, sweeps = self._outline(gear.profile)
+        place = self._placer(gear)
+        vertices = []
+        for segment, sweep in zip(segments, sweeps):
+            if segment.kind == 'spline' and self.splines and segment.spline is not None:
+                if vertices:
+                    vertices.append((place(segment.points[0]), 0.0))
+                    self._polyline(gear.layer, vertices, False)
+                    vertices = []
+                self._spline(gear.layer, segment.spline, place)
+            elif segment.kind == 'arc' and sweep is not None:
+                vertices.append((place(segment.points[0]), math.tan(sweep[2] / 4.0)))
+            else:
+                vertices.extend((place(p), 0.0) for p in segment.points[:-1])
+        if vertices:
+            if self.splines:
+                vertices.append((place(segments[0].points[0]), 0.0))
+            self._polyline(gear.layer, vertices, not self.splines)
+
+        if gear.hole_diam > 0.0:
+            x, y = place((0.0, 0.0))
+            self.stream.write(self._entity('CIRCLE', gear.layer, 'AcDbCircle'))
+            self._pairs((10, self._num(x)), (20, self._num(y)), (30, '0.0'),
+                        (40, self._num(gear.hole_diam / 2.0 * self.scale)))
+        self.count += 1
+
+
+class SvgWriter(_OutlineWriter):
+    """Writes gears as the paths of an SVG file.
+
+    The flanks are written as cubic Bezier curves and the arcs as arcs, so the
+    outline is exact. SVG's Y axis points down, so the drawing is mirrored to
+    keep the gears' orientation.
+
+    Arguments:
+    stream -- Text stream the file is written to.
+    bounds -- (min_x, min_y, max_x, max_y) of the drawing in centimeters.
+    scale -- Millimeters per centimeter of the gears.
+    stroke -- Line width in millimeters.
+    """
+
+    def __init__(self, stream: IO[str], bounds: Tuple[float, float, float, float], scale: float = MM_PER_CM,
+                 stroke: float = 0.1):
+        super().__init__(stream, scale)
+        self.bounds = bounds
+        self.stroke = stroke
+
+    def begin(self):
+        min_x, min_y, max_x, max_y = (v * self.scale for v in self.bounds)
+        width, height = max_x - min_x, max_y - min_y
+        self.stream.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.6f}mm" height="{height:.6f}mm" '
+            f'viewBox="{min_x:.6f} {-max_y:.6f} {width:.6f} {height:.6f}">\n'
+            f'<g fill="none" stroke="black" stroke-width="{self.stroke}">\n')
+
+    def end(self):
+        self.stream.write('</g>\n</svg>\n')
+
+    def add(self, gear: PlacedGear):
+        """Writes one gear."""
+        segments, sweeps = self._outline(gear.profile)
+        place = self._placer(gear)
+
+        def xy(p):
+            x, y = place(p)
+            return f'{x:.6f},{-y:.6f}'
+
+        path = ['M', xy(segments[0].points[0])]
+        for segment, sweep in zip(segments, sweeps):
+            if segment.kind == 'spline' and segment.spline is not None:
+                for bezier in bezier_segments(segment.spline):
+                    path += ['C', xy(bezier[1]), xy(bezier[2]), xy(bezier[3])]
+            elif segment.kind == 'arc' and sweep is not None:
+                radius = sweep[1] * self.scale
+                large = 1 if abs(sweep[2]) > math.pi else 0
+                # Mirrored, a counter-clockwise arc turns the way SVG sweeps.
+                clockwise = 1 if sweep[2] > 0.0 else 0
+                path += ['A', f'{radius:.6f},{radius:.6f}', '0', str(large), str(clockwise), xy(segment.points[-1])]
+            else:
+                for p in segment.points[1:]:
+                    path += ['L', xy(p)]
+        path.append('Z')
+        out = [f'<path class="{gear.layer}" d="{" ".join(path)}"/>\n']
+        if gear.hole_diam > 0.0:
+            x, y = place((0.0, 0.0))
+            out.append(f'<circle class="{gear.layer}" cx="{x:.6f}" cy="{-y:.6f}" '
+                       f'r="{gear.hole_diam / 2.0 * self.scale:.6f}"/>\n')
+        self.stream.write(''.join(out))
+        self.count += 1
+
+
+def write_dxf(stream: IO[str], gears: Iterable[PlacedGear], splines: bool = True, scale: float = MM_PER_CM,
+              layers: Iterable[str] = ()) -> int:
+    """Writes a DXF file of the given gears and returns how many were written.
+
+    Arguments:
+    stream -- Text stream the file is written to.
+    gears -- The gears, consumed one at a time.
+    splines -- Whether to write the flanks as splines, see DxfWriter.
+    scale -- Drawing units per centimeter.
+    layers -- The layers of the gears, listed in the layer table.
+    """
+    writer = DxfWriter(stream, splines, scale, layers)
+    writer.begin()
+    for gear in gears:
+        writer.add(gear)
+    writer.end()
+    return writer.count
+
+
+def write_svg(stream: IO[str], gears: Iterable[PlacedGear], bounds: Tuple[float, float, float, float] = None,
+              scale: float = MM_PER_CM) -> int:
+    """Writes an SVG file of the given gears and returns how many were written.
+
+    The header of an SVG file needs the size of the drawing. Without bounds,
+    the gears are collected first to find it from their outside diameters.
+
+    Arguments:
+    stream -- Text stream the file is written to.
+    gears -- The gears, consumed one at a time when bounds are given.
+    bounds -- (min_x, min_y, max_x, max_y) of the drawing in centimeters.
+    scale -- Millimeters per centimeter of the gears.
+    """
+    if bounds is None:
+        gears = list(gears)
+        bounds = gear_bounds(gears)
+    writer = SvgWriter(stream, bounds, scale)
+    writer.begin()
+    for gear in gears:
+        writer.add(gear)
+    writer.end()
+    return writer.count
+
+
+def gear_bounds(gears: Iterable[PlacedGear]) -> Tuple[float, float, float, float]:
+    """Returns the box that holds the outside circles of the given gears."""
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for gear in gears:
+        r = gear.profile.dims.outside_dia / 2.0
+        min_x, min_y = min(min_x, gear.x - r), min(min_y, gear.y - r)
+        max_x, max_y = max(max_x, gear.x + r), max(max_y, gear.y + r)
+    if min_x > max_x:
+        return 0.0, 0.0, 0.0, 0.0
+    return min_x, min_y, max_x, max_y
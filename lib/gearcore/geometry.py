@@ -0,0 +1,509 @@
+"""Spur gear tooth geometry that does not depend on the Fusion 360 API.
+
+All lengths are in centimeters and all angles in radians, which are the
+internal units Fusion uses, so the results can be handed straight to the API.
+Points are plain (x, y) tuples in the gear's own XY plane.
+"""
+
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+__all__ = [
+    'GearSpec',
+    'GearDimensions',
+    'FlankSpline',
+    'ToothProfile',
+    'OutlineSegment',
+    'gear_dimensions',
+    'involute_point',
+    'flank_sample_count',
+    'flank_radii',
+    'involute_spline',
+    'tooth_profile',
+    'tooth_profiles',
+    'gear_outline',
+    'arc_center',
+    'outline_polyline',
+    'circle_polyline',
+]
+
+Point = Tuple[float, float]
+
+# Bounds of the number of points sampled along a flank with adaptive sampling.
+MIN_FLANK_POINTS = 4
+MAX_FLANK_POINTS = 64
+
+# Allowed deviation of the flank splines from the involute, as a fraction of
+# the module, when no tolerance is given.
+SPLINE_TOLERANCE = 1e-4
+
+
+class GearSpec(NamedTuple):
+    """The inputs that define the shape of a single tooth."""
+    diametral_pitch: float  # teeth per inch, as drawGear receives it
+    num_teeth: int
+    pressure_angle: float
+    backlash: float = 0.0
+    fillet_radius: float = 0.0
+
+
+class GearDimensions(NamedTuple):
+    pitch_dia: float
+    root_dia: float
+    base_dia: float
+    outside_dia: float
+
+
+class FlankSpline(NamedTuple):
+    """A non-rational, clamped B-spline curve in the gear's XY plane."""
+    degree: int
+    knots: List[float]
+    control_points: List[Point]
+
+
+class ToothProfile(NamedTuple):
+    """The 2D outline of one tooth, centered on the positive X axis.
+
+    flank1 runs from the base circle to the outside circle below the X axis,
+    flank2 is its mirror image. When the base circle is inside of the root
+    circle the flanks start on the root circle instead. root1 and root2 are
+    the points the flanks are connected to on the root circle, or None when
+    the involute starts outside of the root circle. spline1 and spline2 are
+    B-splines of the flanks, which are closer to the involute than splines
+    fitted through the flank points.
+
+    With a root fillet, fillet1 and fillet2 are the start, middle and end
+    point of the fillet arcs, from the root circle to the side of the tooth.
+    The fillet ends either on the radial line to the flank, which then runs
+    from root1 instead of the root circle, or on the flank itself, which is
+    then trimmed to start there and root1 is None.
+    """
+    num_teeth: int
+    dims: GearDimensions
+    flank1: List[Point]
+    flank2: List[Point]
+    tip_mid: Point
+    root1: Optional[Point]
+    root2: Optional[Point]
+    fillet1: Optional[Tuple[Point, Point, Point]] = None
+    fillet2: Optional[Tuple[Point, Point, Point]] = None
+    spline1: Optional[FlankSpline] = None
+    spline2: Optional[FlankSpline] = None
+
+
+class OutlineSegment(NamedTuple):
+    """One curve of a gear outline.
+
+    kind is 'line' with the start and end point, 'arc' with the start, a
+    middle and the end point, or 'spline' with the fit points. Splines also
+    have the B-spline of the flank, if the profile has one.
+    """
+    kind: str
+    points: List[Point]
+    spline: Optional[FlankSpline] = None
+
+
+def gear_dimensions(diametral_pitch: float, num_teeth: int, pressure_angle: float) -> GearDimensions:
+    """Computes the characteristic diameters of a gear.
+
+    Arguments:
+    diametral_pitch -- The diametral pitch in teeth per inch.
+    num_teeth -- The number of teeth.
+    pressure_angle -- The pressure angle in radians.
+    """
+    # The diametral pitch is specified in inches but everthing
+    # here expects all distances to be in centimeters.
+    diametral_pitch = diametral_pitch / 2.54
+    pitch_dia = num_teeth / diametral_pitch
+
+    if diametral_pitch < (20 * (math.pi / 180)) - 0.000001:
+        dedendum = 1.157 / diametral_pitch
+    else:
+        circular_pitch = math.pi / diametral_pitch
+        if circular_pitch >= 20:
+            dedendum = 1.25 / diametral_pitch
+        else:
+            dedendum = (1.2 / diametral_pitch) + (.002 * 2.54)
+
+    return GearDimensions(
+        pitch_dia,
+        pitch_dia - (2 * dedendum),
+        pitch_dia * math.cos(pressure_angle),
+        (num_teeth + 2) / diametral_pitch,
+    )
+
+
+def _involute_angle(base_radius: float, radius: float) -> float:
+    # Length of the involute chord as it comes off of the base circle, divided
+    # by the base radius, minus the pressure angle at the given radius.
+    side = math.sqrt(max(radius * radius - base_radius * base_radius, 0.0))
+    return side / base_radius - math.acos(min(base_radius / radius, 1.0))
+
+
+def involute_point(base_radius: float, radius: float) -> Point:
+    """Returns the point of the involute of the base circle at the given distance from the center."""
+    theta = _involute_angle(base_radius, radius)
+    return (radius * math.cos(theta), radius * math.sin(theta))
+
+
+def _roll_angle(base_radius: float, radius: float) -> float:
+    # The angle the involute's generating line has rolled off the base circle
+    # when it reaches the given radius.
+    return math.sqrt(max(radius * radius / (base_radius * base_radius) - 1.0, 0.0))
+
+
+def flank_sample_count(base_radius: float, outside_radius: float, tolerance: float,
+                       start_radius: Optional[float] = None) -> int:
+    """Returns the number of points needed to sample an involute flank within a chord tolerance.
+
+    The involute's radius of curvature at roll angle t is base_radius * t, so
+    a chord spanning the roll angles t..t+dt deviates from the curve by about
+    base_radius * t * dt**2 / 8. Keeping that deviation equal to the tolerance
+    along the flank takes (2/3) * sqrt(base_radius / (8 * tolerance)) * T**1.5
+    chords up to the roll angle T at the outside circle.
+
+    Arguments:
+    base_radius -- The radius of the base circle.
+    outside_radius -- The radius the flank ends at.
+    tolerance -- The largest allowed distance between a chord and the involute.
+    start_radius -- The radius the flank starts at, the base radius by default.
+    """
+    roll = _roll_angle(base_radius, outside_radius)
+    start_roll = _roll_angle(base_radius, start_radius) if start_radius else 0.0
+    chords = (2.0 / 3.0) * math.sqrt(base_radius / (8.0 * tolerance)) * (roll ** 1.5 - start_roll ** 1.5)
+    return min(max(math.ceil(chords) + 1, MIN_FLANK_POINTS), MAX_FLANK_POINTS)
+
+
+def flank_radii(base_radius: float, outside_radius: float, count: int,
+                start_radius: Optional[float] = None) -> List[float]:
+    """Returns the radii of count points along an involute flank with equal chord deviation.
+
+    The roll angles t of the points are evenly spaced in t ** 1.5, which puts
+    them closer together near the base circle where the involute bends the
+    most. Starting at the base circle this is T * (k / (count - 1)) ** (2/3).
+    """
+    end = _roll_angle(base_radius, outside_radius) ** 1.5
+    start = _roll_angle(base_radius, start_radius) ** 1.5 if start_radius else 0.0
+    radii = [base_radius * math.sqrt(1.0 + (start + (end - start) * k / (count - 1)) ** (4.0 / 3.0))
+             for k in range(count)]
+    radii[0] = start_radius or base_radius
+    radii[-1] = outside_radius
+    return radii
+
+
+def involute_spline(base_radius: float, start_roll: float, end_roll: float, rotate_angle: float,
+                    tolerance: float) -> FlankSpline:
+    """Returns a cubic B-spline within tolerance of an involute between two roll angles.
+
+    The spline is a chain of cubic Hermite pieces that match the involute's
+    points and derivatives at their ends, parameterized by the roll angle t,
+    so it is C1 and its interior knots are double. The error of a piece of
+    length h is at most sqrt(2) * h**4 / 384 times the largest fourth
+    derivative, which for the involute is base_radius * sqrt(9 + t**2).
+
+    Arguments:
+    base_radius -- The radius of the base circle.
+    start_roll, end_roll -- The roll angles the spline starts and ends at.
+    rotate_angle -- The rotation of the involute about the origin.
+    tolerance -- The largest allowed distance between the spline and the involute.
+    """
+    span = end_roll - start_roll
+    fourth = math.sqrt(2.0) * base_radius * math.sqrt(9.0 + end_roll * end_roll)
+    step = (384.0 * tolerance / fourth) ** 0.25
+    count = max(1, math.ceil(span / step))
+    c, s = math.cos(rotate_angle), math.sin(rotate_angle)
+
+    rolls = [start_roll + span * k / count for k in range(count + 1)]
+    points = []
+    tangents = []
+    for t in rolls:
+        ct, st = math.cos(t), math.sin(t)
+        x, y = base_radius * (ct + t * st), base_radius * (st - t * ct)
+        dx, dy = base_radius * t * ct, base_radius * t * st
+        points.append((x * c - y * s, x * s + y * c))
+        tangents.append((dx * c - dy * s, dx * s + dy * c))
+
+    h = span / count / 3.0
+    control_points = [points[0]]
+    for k in range(count):
+        (x0, y0), (dx0, dy0) = points[k], tangents[k]
+        (x1, y1), (dx1, dy1) = points[k + 1], tangents[k + 1]
+        control_points.append((x0 + dx0 * h, y0 + dy0 * h))
+        control_points.append((x1 - dx1 * h, y1 - dy1 * h))
+    control_points.append(points[-1])
+
+    knots = [start_roll] * 4
+    for t in rolls[1:-1]:
+        knots += [t, t]
+    knots += [end_roll] * 4
+    return FlankSpline(3, knots, control_points)
+
+
+def _mirrored_spline(spline: FlankSpline) -> FlankSpline:
+    return FlankSpline(spline.degree, spline.knots, [(x, -y) for x, y in spline.control_points])
+
+
+def _reversed_spline(spline: FlankSpline) -> FlankSpline:
+    first, last = spline.knots[0], spline.knots[-1]
+    return FlankSpline(spline.degree, [first + last - k for k in reversed(spline.knots)],
+                       spline.control_points[::-1])
+
+
+def _root_fillet(base_radius: float, root_radius: float, flank_angle: float, radius: float):
+    # Places a fillet of the given radius between the root circle and the
+    # side of a tooth below the X axis, whose flank leaves the base circle at
+    # flank_angle. Returns the polar angle of the fillet's center, and the
+    # radius, polar angle and roll angle of the point where it touches the
+    # side of the tooth. The roll angle is None when it touches the radial
+    # line below the flank.
+    #
+    # The center is at root_radius + radius from the origin. Offsetting an
+    # involute along its normal gives an involute of the same base circle,
+    # so the center is on the involute rolled radius further, which reaches
+    # that distance at a closed form roll angle. The roll angle is only
+    # positive, and the fillet only touches the flank, when the root circle
+    # is large enough compared to the base circle.
+    distance = root_radius + radius
+    if root_radius * root_radius + 2.0 * root_radius * radius >= base_radius * base_radius:
+        roll = (math.sqrt(distance * distance - base_radius * base_radius) - radius) / base_radius
+        center_angle = flank_angle + roll - math.atan(roll + radius / base_radius)
+        return center_angle, base_radius * math.sqrt(1.0 + roll * roll), flank_angle + roll - math.atan(roll), roll
+
+    center_angle = flank_angle - math.asin(radius / distance)
+    return center_angle, math.sqrt(distance * distance - radius * radius), flank_angle, None
+
+
+def _fillet_points(root_radius: float, radius: float, center_angle: float, side_radius: float,
+                   side_angle: float) -> Tuple[Point, Point, Point]:
+    # The start point on the root circle, a middle point and the end point on
+    # the side of the tooth of a fillet arc.
+    distance = root_radius + radius
+    center = (distance * math.cos(center_angle), distance * math.sin(center_angle))
+    start = (root_radius * math.cos(center_angle), root_radius * math.sin(center_angle))
+    end = (side_radius * math.cos(side_angle), side_radius * math.sin(side_angle))
+    bx = start[0] + end[0] - 2.0 * center[0]
+    by = start[1] + end[1] - 2.0 * center[1]
+    length = math.hypot(bx, by)
+    return start, (center[0] + radius * bx / length, center[1] + radius * by / length), end
+
+
+def tooth_profile(diametral_pitch: float, num_teeth: int, pressure_angle: float, backlash: float = 0.0,
+                  point_count: int = 15, tolerance: Optional[float] = None,
+                  fillet_radius: float = 0.0) -> ToothProfile:
+    """Computes the profile of a single tooth. See tooth_profiles."""
+    spec = GearSpec(diametral_pitch, num_teeth, pressure_angle, backlash, fillet_radius)
+    return tooth_profiles([spec], point_count, tolerance)[0]
+
+
+def tooth_profiles(specs: Sequence[GearSpec], point_count: int = 15,
+                   tolerance: Optional[float] = None) -> List[ToothProfile]:
+    """Computes the tooth profiles of a batch of gears.
+
+    Arguments:
+    specs -- The gears to compute, as GearSpec tuples.
+    point_count -- The number of points sampled along each involute flank,
+                   evenly spaced in radius. Ignored when tolerance is given.
+    tolerance -- The allowed chord deviation of the sampled flanks as a
+                 fraction of the module. When given, the number and spacing
+                 of the points are chosen per gear, see flank_sample_count.
+
+    Root fillets that do not fit into the gap between two teeth are made
+    smaller until they do.
+    """
+    # Without a tolerance the sample positions are the same fraction of the
+    # flank for every gear, so they are only computed once for the whole batch.
+    steps = [i / (point_count - 1) for i in range(point_count)]
+
+    profiles = []
+    for spec in specs:
+        dims = gear_dimensions(spec.diametral_pitch, spec.num_teeth, spec.pressure_angle)
+        module = 2.54 / spec.diametral_pitch
+        base_radius = dims.base_dia / 2.0
+        pitch_radius = dims.pitch_dia / 2.0
+        root_radius = dims.root_dia / 2.0
+        outside_radius = dims.outside_dia / 2.0
+
+        # Rotate the involute so the middle of the tooth lies on the x axis. The
+        # angle is defined by the tooth thickness at the pitch circle, the angle
+        # of the involute at the pitch circle and the backlash.
+        tooth_thickness_angle = math.pi / spec.num_teeth
+        pitch_point_angle = _involute_angle(base_radius, pitch_radius)
+        backlash_angle = (spec.backlash / pitch_radius) * .25
+        rotate_angle = -((tooth_thickness_angle / 2) + pitch_point_angle - backlash_angle)
+
+        root1 = root2 = None
+        fillet1 = fillet2 = None
+        start_radius = base_radius
+        if spec.fillet_radius > 0:
+            # Shrink the fillet until its center is on this side of the middle
+            # of the gap to the next tooth.
+            radius = spec.fillet_radius
+            fillet = _root_fillet(base_radius, root_radius, rotate_angle, radius)
+            if fillet[0] < -tooth_thickness_angle:
+                low, high = 0.0, radius
+                for _ in range(40):
+                    radius = (low + high) / 2.0
+                    if _root_fillet(base_radius, root_radius, rotate_angle, radius)[0] < -tooth_thickness_angle:
+                        high = radius
+                    else:
+                        low = radius
+                radius = low
+                fillet = _root_fillet(base_radius, root_radius, rotate_angle, radius)
+
+            center_angle, side_radius, side_angle, roll = fillet
+            fillet1 = _fillet_points(root_radius, radius, center_angle, side_radius, side_angle)
+            fillet2 = tuple((x, -y) for x, y in fillet1)
+            if roll is None:
+                root1 = fillet1[2]
+            else:
+                start_radius = side_radius
+        elif dims.base_dia >= dims.root_dia:
+            # Connect the involute down to the root circle when it starts outside of it.
+            root1 = ((root_radius - 0.001) * math.cos(rotate_angle), root_radius * math.sin(rotate_angle))
+        else:
+            # Otherwise the flank starts where the involute leaves the root circle.
+            start_radius = root_radius
+        if root1 is not None:
+            root2 = (root1[0], -root1[1])
+
+        if tolerance is None:
+            radii = [start_radius + (outside_radius - start_radius) * s for s in steps]
+        else:
+            count = flank_sample_count(base_radius, outside_radius, tolerance * module, start_radius)
+            radii = flank_radii(base_radius, outside_radius, count, start_radius)
+        angles = [_involute_angle(base_radius, r) + rotate_angle for r in radii]
+        flank1 = [(r * math.cos(a), r * math.sin(a)) for r, a in zip(radii, angles)]
+        if fillet1 is not None and root1 is None:
+            flank1[0] = fillet1[2]
+        flank2 = [(x, -y) for x, y in flank1]
+
+        spline_tolerance = (tolerance if tolerance is not None else SPLINE_TOLERANCE) * module
+        spline1 = involute_spline(base_radius, _roll_angle(base_radius, start_radius),
+                                  _roll_angle(base_radius, outside_radius), rotate_angle, spline_tolerance)
+
+        profiles.append(ToothProfile(
+            spec.num_teeth, dims, flank1, flank2, (dims.outside_dia / 2, 0.0), root1, root2, fillet1, fillet2,
+            spline1, _mirrored_spline(spline1)))
+    return profiles
+
+
+def _rotated(points: Sequence[Point], c: float, s: float) -> List[Point]:
+    return [(x * c - y * s, x * s + y * c) for x, y in points]
+
+
+def gear_outline(profile: ToothProfile) -> List[OutlineSegment]:
+    """Returns the closed outline of the whole gear as lines, arcs and splines.
+
+    Every segment starts where the previous one ends and the last one ends
+    where the first one starts. Flanks that start outside of the root circle
+    are joined to it by radial lines. Root fillets are arcs between the root circle and the side of the
+    tooth. Consecutive teeth are joined by arcs on the root circle.
+
+    Arguments:
+    profile -- The tooth profile of the gear.
+    """
+    root_radius = profile.dims.root_dia / 2.0
+    flank1 = profile.flank1
+    flank2 = profile.flank2
+
+    tooth = []
+    if profile.fillet1 is not None:
+        tooth.append(OutlineSegment('arc', list(profile.fillet1)))
+        side = profile.fillet1[2]
+    elif profile.root1 is not None:
+        angle = math.atan2(flank1[0][1], flank1[0][0])
+        side = (root_radius * math.cos(angle), root_radius * math.sin(angle))
+    else:
+        side = None
+    if profile.root1 is not None:
+        tooth.append(OutlineSegment('line', [side, flank1[0]]))
+    spline2 = _reversed_spline(profile.spline2) if profile.spline2 else None
+    tooth.append(OutlineSegment('spline', flank1, profile.spline1))
+    tooth.append(OutlineSegment('arc', [flank1[-1], profile.tip_mid, flank2[-1]]))
+    tooth.append(OutlineSegment('spline', flank2[::-1], spline2))
+    if profile.root1 is not None:
+        tooth.append(OutlineSegment('line', [flank2[0], (side[0], -side[1])]))
+    if profile.fillet1 is not None:
+        tooth.append(OutlineSegment('arc', [(x, -y) for x, y in reversed(profile.fillet1)]))
+
+    # The root arc runs from the end of this tooth to the start of the next,
+    # unless the root fillets already meet in the middle of the gap.
+    pitch = 2.0 * math.pi / profile.num_teeth
+    first = tooth[0].points[0]
+    start = math.atan2(first[1], first[0])
+    if pitch + 2.0 * start > 1e-9:
+        tooth.append(OutlineSegment('arc', _arc_points(root_radius, -start, pitch + start, 2)))
+        tooth[-1].points.insert(0, tooth[-2].points[-1])
+
+    segments = []
+    for k in range(profile.num_teeth):
+        c, s = math.cos(pitch * k), math.sin(pitch * k)
+        for segment in tooth:
+            spline = segment.spline
+            if spline is not None:
+                spline = FlankSpline(spline.degree, spline.knots, _rotated(spline.control_points, c, s))
+            segments.append(OutlineSegment(segment.kind, _rotated(segment.points, c, s), spline))
+    return segments
+
+
+def _arc_points(radius: float, start: float, end: float, steps: int) -> List[Point]:
+    # Points on an arc about the origin, excluding the start point.
+    return [(radius * math.cos(start + (end - start) * k / steps), radius * math.sin(start + (end - start) * k / steps))
+            for k in range(1, steps + 1)]
+
+
+def arc_center(start: Point, middle: Point, end: Point) -> Optional[Tuple[Point, float]]:
+    """Returns the center and radius of the circle through three points, or None if they are collinear."""
+    ax, ay = start
+    bx, by = middle
+    cx, cy = end
+    d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-15:
+        return None
+    ux = ((ax * ax + ay * ay) * (by - cy) + (bx * bx + by * by) * (cy - ay) + (cx * cx + cy * cy) * (ay - by)) / d
+    uy = ((ax * ax + ay * ay) * (cx - bx) + (bx * bx + by * by) * (ax - cx) + (cx * cx + cy * cy) * (bx - ax)) / d
+    return (ux, uy), math.hypot(ax - ux, ay - uy)
+
+
+def _arc_through(start: Point, middle: Point, end: Point, steps: int) -> List[Point]:
+    # Points on the arc through three points, excluding the start point.
+    circle = arc_center(start, middle, end)
+    if circle is None:
+        return [end]
+    (ux, uy), radius = circle
+    (ax, ay), (bx, by), (cx, cy) = start, middle, end
+    a0 = math.atan2(ay - uy, ax - ux)
+    a1 = math.atan2(by - uy, bx - ux)
+    a2 = math.atan2(cy - uy, cx - ux)
+    # Go around the side that passes through the middle point.
+    sweep = (a2 - a0) % (2.0 * math.pi)
+    if (a1 - a0) % (2.0 * math.pi) > sweep:
+        sweep -= 2.0 * math.pi
+    return [(ux + radius * math.cos(a0 + sweep * k / steps), uy + radius * math.sin(a0 + sweep * k / steps))
+            for k in range(1, steps + 1)]
+
+
+def outline_polyline(profile: ToothProfile, arc_steps: int = 4) -> List[Point]:
+    """Returns the closed outline of the whole gear as a polyline.
+
+    This is gear_outline with the arcs split into line segments and the
+    splines replaced by lines between their fit points. The first point is
+    not repeated at the end.
+
+    Arguments:
+    profile -- The tooth profile of the gear.
+    arc_steps -- The number of line segments used for each arc.
+    """
+    points = []
+    for segment in gear_outline(profile):
+        if segment.kind == 'arc':
+            points += _arc_through(*segment.points, arc_steps)
+        else:
+            points += segment.points[1:]
+    return points[-1:] + points[:-1]
+
+
+def circle_polyline(radius: float, steps: int = 72) -> List[Point]:
+    """Returns a closed circle about the origin as a polyline, without repeating the first point."""
+    return [(radius * math.cos(2.0 * math.pi * k / steps), radius * math.sin(2.0 * math.pi * k / steps))
+            for k in range(steps)]
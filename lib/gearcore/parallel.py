@@ -0,0 +1,122 @@
+"""Runs the computations of gearcore on other processes or threads.
+
+Nothing in gearcore needs the Fusion 360 API, which has to be driven from
+Fusion's main thread. The batch entry point spreads the trains over a pool
+of processes, one per core. The add-in cannot start processes of its own
+interpreter, so it computes the tooth profiles on a worker thread while its
+main thread reads the selection and the design.
+"""
+
+import os
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+__all__ = [
+    'worker_count',
+    'make_executor',
+    'map_ordered',
+    'FutureMap',
+]
+
+
+def worker_count(workers: Optional[int] = None) -> int:
+    """Returns the number of workers to use, one per core when not given."""
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def make_executor(workers: Optional[int] = None, processes: bool = True, initializer: Callable = None,
+                  initargs: tuple = ()) -> Executor:
+    """Returns a pool of worker processes or threads.
+
+    Arguments:
+    workers -- The number of workers, see worker_count.
+    processes -- Whether to use processes, which run on all cores, or threads.
+    initializer, initargs -- Called in every worker before it starts.
+    """
+    workers = worker_count(workers)
+    if processes:
+        # Imported here since it brings in multiprocessing, which the add-in
+        # never needs and should not have to load.
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs)
+    return ThreadPoolExecutor(workers, thread_name_prefix='gearcore', initializer=initializer, initargs=initargs)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_ordered(executor: Executor, function: Callable[[list], list], items: Iterable, chunk_size: int = 1,
+                window: int = None) -> Iterator:
+    """Applies a function to chunks of items in the executor and yields the results in order.
+
+    Only a window of chunks is in flight at any time, so items are consumed
+    and results yielded as the work goes on, without reading all items first.
+
+    Arguments:
+    executor -- The pool to run the chunks in.
+    function -- Takes a list of items and returns the list of their results.
+    items -- The items, consumed as the window has room.
+    chunk_size -- The number of items sent to a worker at a time.
+    window -- The largest number of chunks in flight, by default four per worker.
+    """
+    if window is None:
+        window = 4 * max(getattr(executor, '_max_workers', 1), 1)
+    pending = deque()
+    for chunk in _chunks(items, chunk_size):
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+        pending.append(executor.submit(function, chunk))
+    while pending:
+        yield from pending.popleft().result()
+
+
+class FutureMap(Mapping):
+    """A read-only mapping whose values are computed in an executor.
+
+    The keys are split into chunks in the given order and each chunk is
+    computed as one job. Looking up a value waits for its chunk only, so the
+    first keys can be used while the others are still being computed.
+
+    Arguments:
+    executor -- The pool the chunks are computed in.
+    function -- Takes a list of keys and returns the list of their values.
+    keys -- The keys, in the order they are needed.
+    chunk_size -- The number of keys computed in one job.
+    """
+
+    def __init__(self, executor: Executor, function: Callable[[list], list], keys: Sequence[Hashable],
+                 chunk_size: int = 8):
+        self._entries = {}
+        self._futures: List[Future] = []
+        for chunk in _chunks(dict.fromkeys(keys), chunk_size):
+            future = executor.submit(function, chunk)
+            self._futures.append(future)
+            for index, key in enumerate(chunk):
+                self._entries[key] = (future, index)
+
+    def __getitem__(self, key):
+        future, index = self._entries[key]
+        return future.result()[index]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def wait(self):
+        """Waits until every value is computed and raises the first error of the jobs."""
+        for future in self._futures:
+            future.result()
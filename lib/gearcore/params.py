@@ -0,0 +1,208 @@
+"""The input values of a gear as stored in its SpurGear attribute.
+
+The attribute is a JSON object with a format version, so gears can be found
+and edited again later. Gears created by older versions of the add-in store
+the repr of a dict of strings instead, which is still read.
+
+The occurrences of a gear also record the pitch circle they were built from,
+as a GearSource, so a later run of the command can tell which gears changed.
+"""
+
+import ast
+import hashlib
+import json
+from typing import FrozenSet, NamedTuple, Optional, Sequence
+
+from .geometry import GearSpec
+
+__all__ = [
+    'PARAMS_VERSION',
+    'SOURCE_VERSION',
+    'PROFILE_FIELDS',
+    'GearParams',
+    'encode_params',
+    'decode_params',
+    'changed_params',
+    'GearSource',
+    'values_key',
+    'combined_key',
+    'encode_source',
+    'decode_source',
+]
+
+# Bumped whenever fields are added to GearParams. Values written by newer
+# versions of the add-in are rejected instead of being misread.
+PARAMS_VERSION = 1
+
+# Bumped whenever the fields of GearSource change, independently of
+# PARAMS_VERSION.
+SOURCE_VERSION = 1
+
+# The fields that change the tooth profile, so the body of the gear has to be
+# built again when any of them changes.
+PROFILE_FIELDS = frozenset(['diametral_pitch', 'num_teeth', 'pressure_angle', 'backlash',
+                            'root_fillet_radius', 'flank_tolerance'])
+
+# Attribute keys of the fields, which are the argument names of drawGear.
+_KEYS = {
+    'diametral_pitch': 'diametralPitch',
+    'num_teeth': 'numTeeth',
+    'thickness': 'thickness',
+    'root_fillet_radius': 'rootFilletRad',
+    'pressure_angle': 'pressureAngle',
+    'backlash': 'backlash',
+    'hole_diam': 'holeDiam',
+    'flank_tolerance': 'flankTolerance',
+    'build_mode': 'buildMode',
+}
+
+
+class GearParams(NamedTuple):
+    """The values a gear was built from."""
+    diametral_pitch: float  # teeth per inch, as drawGear receives it
+    num_teeth: int
+    thickness: float
+    root_fillet_radius: float
+    pressure_angle: float
+    backlash: float
+    hole_diam: float
+    flank_tolerance: Optional[float] = None  # None for the fixed 15 point flanks
+    build_mode: Optional[str] = None  # None when the attribute does not say
+
+    @property
+    def spec(self) -> GearSpec:
+        """The part of the values that defines the tooth profile."""
+        return GearSpec(self.diametral_pitch, self.num_teeth, self.pressure_angle, self.backlash,
+                        self.root_fillet_radius)
+
+
+def encode_params(params: GearParams) -> str:
+    """Returns the attribute value that stores the given values.
+
+    Arguments:
+    params -- The values of the gear.
+    """
+    data = {'version': PARAMS_VERSION}
+    for field, value in zip(GearParams._fields, params):
+        data[_KEYS[field]] = value
+    return json.dumps(data, sort_keys=True)
+
+
+def decode_params(text: str) -> GearParams:
+    """Returns the values stored in an attribute value.
+
+    Raises ValueError if the value cannot be read or was written by a newer
+    version of the add-in.
+
+    Arguments:
+    text -- The value of the SpurGear attribute.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # Older versions stored str() of a dict with every value as a string.
+        try:
+            data = ast.literal_eval(text)
+        except (ValueError, SyntaxError) as error:
+            raise ValueError(f'Unreadable gear values: {text!r}') from error
+        version = 0
+    else:
+        version = data.get('version') if isinstance(data, dict) else None
+    if not isinstance(data, dict) or not isinstance(version, int):
+        raise ValueError(f'Unreadable gear values: {text!r}')
+    if version > PARAMS_VERSION:
+        raise ValueError(f'Gear values of version {version} are newer than this add-in supports')
+
+    try:
+        values = {}
+        for field in GearParams._fields:
+            value = data.get(_KEYS[field])
+            if value is None:
+                continue
+            if field == 'num_teeth':
+                value = int(float(value))
+            elif field != 'build_mode':
+                value = float(value)
+            values[field] = value
+        return GearParams(**values)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f'Unreadable gear values: {text!r}') from error
+
+
+def changed_params(old: GearParams, new: GearParams, rel_tol: float = 1e-9) -> FrozenSet[str]:
+    """Returns the names of the fields that differ between two sets of values.
+
+    Arguments:
+    old -- The values the gear was built from.
+    new -- The values it should have.
+    rel_tol -- Relative difference below which numbers count as equal.
+    """
+    changed = set()
+    for field, a, b in zip(GearParams._fields, old, new):
+        if isinstance(a, float) and isinstance(b, float):
+            if abs(a - b) > rel_tol * max(abs(a), abs(b)):
+                changed.add(field)
+        elif a != b:
+            changed.add(field)
+    return frozenset(changed)
+
+
+class GearSource(NamedTuple):
+    """Where an occurrence of a gear came from, see values_key.
+
+    token -- The entity token of the pitch circle.
+    shape -- Key of the values that define the body of the gear.
+    place -- Key of the position and plane of the pitch circle.
+    train -- Key of the gear train the gear was phased in.
+    """
+    token: str
+    shape: str
+    place: str
+    train: str
+
+
+def values_key(values: Sequence) -> str:
+    """Returns a short hash of a sequence of numbers, strings and None.
+
+    Floats are rounded to 9 decimals so values that only differ by conversion
+    noise give the same key.
+
+    Arguments:
+    values -- The values to hash.
+    """
+    text = json.dumps([round(v, 9) if isinstance(v, float) else v for v in values])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def combined_key(keys: Sequence[str]) -> str:
+    """Returns the key of a set of keys, independent of their order.
+
+    Arguments:
+    keys -- The keys to combine.
+    """
+    return values_key(sorted(keys))
+
+
+def encode_source(source: GearSource) -> str:
+    """Returns the attribute value that stores a GearSource."""
+    data = {'version': SOURCE_VERSION}
+    data.update(source._asdict())
+    return json.dumps(data, sort_keys=True)
+
+
+def decode_source(text: str) -> Optional[GearSource]:
+    """Returns the GearSource stored in an attribute value, or None if it cannot be read.
+
+    Values written by newer versions of the add-in are not read.
+
+    Arguments:
+    text -- The value of the SpurGear Source attribute.
+    """
+    try:
+        data = json.loads(text)
+        version = data.get('version')
+        if not isinstance(version, int) or version > SOURCE_VERSION:
+            return None
+        return GearSource(*(str(data[field]) for field in GearSource._fields))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
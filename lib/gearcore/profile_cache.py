@@ -0,0 +1,172 @@
+"""A bounded cache of tooth profiles keyed by the parameters that define them."""
+
+import gzip
+import json
+import os
+from collections import OrderedDict
+from typing import List, Sequence
+
+from .geometry import FlankSpline, GearDimensions, GearSpec, ToothProfile, tooth_profiles
+
+__all__ = [
+    'ProfileCache',
+]
+
+# Bumped whenever the layout of the persisted file or of ToothProfile changes,
+# so stale files from older versions of the add-in are ignored.
+_FILE_VERSION = 4
+
+
+def _profile_key(spec: GearSpec, point_count, tolerance) -> tuple:
+    # Round the floating point inputs so values that only differ by
+    # conversion noise share the same entry.
+    return (round(spec.diametral_pitch, 9), int(spec.num_teeth), round(spec.pressure_angle, 9),
+            round(spec.backlash, 9), round(spec.fillet_radius, 9), point_count, None if tolerance is None else round(tolerance, 12))
+
+
+def _encode(profile: ToothProfile) -> list:
+    return [profile.num_teeth, list(profile.dims), profile.flank1, profile.flank2,
+            profile.tip_mid, profile.root1, profile.root2, profile.fillet1, profile.fillet2,
+            profile.spline1, profile.spline2]
+
+
+def _decode(data: list) -> ToothProfile:
+    num_teeth, dims, flank1, flank2, tip_mid, root1, root2, fillet1, fillet2, spline1, spline2 = data
+    return ToothProfile(
+        num_teeth,
+        GearDimensions(*dims),
+        [tuple(p) for p in flank1],
+        [tuple(p) for p in flank2],
+        tuple(tip_mid),
+        tuple(root1) if root1 is not None else None,
+        tuple(root2) if root2 is not None else None,
+        tuple(tuple(p) for p in fillet1) if fillet1 is not None else None,
+        tuple(tuple(p) for p in fillet2) if fillet2 is not None else None,
+        _decode_spline(spline1),
+        _decode_spline(spline2),
+    )
+
+
+def _decode_spline(data):
+    if data is None:
+        return None
+    degree, knots, control_points = data
+    return FlankSpline(degree, knots, [tuple(p) for p in control_points])
+
+
+class ProfileCache:
+    """Least recently used cache of ToothProfile objects.
+
+    Arguments:
+    max_size -- The maximum number of profiles kept. The least recently used
+                profile is evicted when the cache grows beyond this.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._profiles = OrderedDict()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._profiles)
+
+    @property
+    def is_dirty(self) -> bool:
+        """True if profiles were added since the cache was last loaded or saved."""
+        return self._dirty
+
+    def get_many(self, specs: Sequence[GearSpec], point_count=15, tolerance=None) -> List[ToothProfile]:
+        """Returns the profiles of the given gears, computing all missing ones in a single batch.
+
+        Arguments:
+        specs -- The gears to get the profiles of.
+        point_count -- The sample density of the involute flanks. It is part of the key.
+        tolerance -- The chord tolerance of adaptive sampling, see tooth_profiles.
+                     It is part of the key.
+        """
+        keys = [_profile_key(spec, point_count, tolerance) for spec in specs]
+        missing = {}
+        for key, spec in zip(keys, specs):
+            if key in self._profiles:
+                self._profiles.move_to_end(key)
+                self.hits += 1
+            elif key not in missing:
+                missing[key] = spec
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if missing:
+            computed = tooth_profiles(list(missing.values()), point_count, tolerance)
+            for key, profile in zip(missing, computed):
+                self._profiles[key] = profile
+            self._dirty = True
+
+        # Look everything up before trimming so a batch larger than the cache
+        # still gets all of its profiles.
+        result = [self._profiles[key] for key in keys]
+        self._trim()
+        return result
+
+    def get(self, spec: GearSpec, point_count=15, tolerance=None) -> ToothProfile:
+        """Returns the profile of a single gear. See get_many."""
+        return self.get_many([spec], point_count, tolerance)[0]
+
+    def clear(self):
+        """Removes all profiles and resets the statistics."""
+        self._profiles.clear()
+        self.hits = self.misses = self.evictions = 0
+        self._dirty = True
+
+    def stats(self) -> dict:
+        """Returns the hit/miss statistics of the cache."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._profiles),
+            'max_size': self.max_size,
+        }
+
+    def load(self, path: str) -> bool:
+        """Loads profiles persisted with save. Missing, unreadable or outdated files are ignored.
+
+        Returns True if the file was loaded.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != _FILE_VERSION:
+                return False
+            entries = [(tuple(key), _decode(profile)) for key, profile in data['profiles']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        for key, profile in entries:
+            self._profiles[key] = profile
+            self._profiles.move_to_end(key)
+        self._trim()
+        self._dirty = False
+        return True
+
+    def save(self, path: str):
+        """Writes the cached profiles to a compressed JSON file."""
+        data = {
+            'version': _FILE_VERSION,
+            'profiles': [[list(key), _encode(profile)] for key, profile in self._profiles.items()],
+        }
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+    def _trim(self):
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+            self.evictions += 1
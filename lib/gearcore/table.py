@@ -0,0 +1,139 @@
+"""A columnar table of gears shared by the stages of a layout.
+
+The selection reader or file reader appends the pitch circles, and the later
+stages fill in their columns: the number of teeth, the plane and in-plane
+position, and the phase angle and gear train. Every column is an array
+indexed by gear, which takes a fraction of the memory of a tuple per gear
+and can be handed to the functions of gearcore as a sequence.
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .export import PlacedGear
+from .geometry import ToothProfile
+from .train import PhaseSolution, PlaneGroups, group_by_plane, placement_matrix
+
+__all__ = [
+    'GearTable',
+]
+
+Vector = Tuple[float, float, float]
+
+
+class GearTable:
+    """The gears of a layout as columns.
+
+    tokens -- The entity token of the pitch circle of each gear, or ''.
+    px, py, pz -- The world center of each gear.
+    nx, ny, nz -- The normal of the plane of each gear.
+    radius -- The pitch radius of each gear.
+    teeth -- The number of teeth, see count_teeth.
+    plane, u, v -- The plane and the center in its coordinates, see group_planes.
+    angle, component -- The phase angle and the gear train, see set_phases.
+    """
+
+    __slots__ = ('tokens', 'px', 'py', 'pz', 'nx', 'ny', 'nz', 'radius', 'teeth', 'plane', 'u', 'v', 'angle',
+                 'component')
+
+    def __init__(self):
+        self.tokens = []
+        for name in ('px', 'py', 'pz', 'nx', 'ny', 'nz', 'radius', 'u', 'v', 'angle'):
+            setattr(self, name, array('d'))
+        for name in ('teeth', 'plane', 'component'):
+            setattr(self, name, array('i'))
+
+    def __len__(self):
+        return len(self.radius)
+
+    def append(self, position: Vector, normal: Vector, radius: float, token: str = ''):
+        """Adds a pitch circle. Its derived columns are filled by the later stages."""
+        self.tokens.append(token)
+        self.px.append(position[0])
+        self.py.append(position[1])
+        self.pz.append(position[2])
+        self.nx.append(normal[0])
+        self.ny.append(normal[1])
+        self.nz.append(normal[2])
+        self.radius.append(radius)
+
+    def take(self, rows: Sequence[int]) -> 'GearTable':
+        """Returns a table of the pitch circles of the given rows, in their order."""
+        table = GearTable()
+        table.tokens = [self.tokens[i] for i in rows]
+        for name in ('px', 'py', 'pz', 'nx', 'ny', 'nz', 'radius'):
+            column = getattr(self, name)
+            setattr(table, name, array('d', (column[i] for i in rows)))
+        return table
+
+    def position(self, i: int) -> Vector:
+        return self.px[i], self.py[i], self.pz[i]
+
+    def normal(self, i: int) -> Vector:
+        return self.nx[i], self.ny[i], self.nz[i]
+
+    def positions(self) -> List[Vector]:
+        return list(zip(self.px, self.py, self.pz))
+
+    def normals(self) -> List[Vector]:
+        return list(zip(self.nx, self.ny, self.nz))
+
+    def coords(self) -> List[Tuple[float, float]]:
+        """Returns the in-plane centers, see group_planes."""
+        return list(zip(self.u, self.v))
+
+    def count_teeth(self, module: float) -> array:
+        """Sets the number of teeth of every gear from its pitch radius.
+
+        Arguments:
+        module -- The module, in the same length unit as the radii.
+        """
+        self.teeth = array('i', (round(r * 2.0 / module) for r in self.radius))
+        return self.teeth
+
+    def group_planes(self) -> PlaneGroups:
+        """Sets the plane and in-plane center of every gear, see group_by_plane."""
+        planes = group_by_plane(self.positions(), self.normals())
+        self.plane = array('i', planes.group)
+        self.u = array('d', (x for x, _ in planes.coords))
+        self.v = array('d', (y for _, y in planes.coords))
+        return planes
+
+    def set_phases(self, phases: PhaseSolution):
+        """Sets the phase angle and gear train of every gear, see solve_phases."""
+        self.angle = array('d', phases.angles)
+        self.component = array('i', phases.component)
+
+    def matrix(self, i: int) -> Optional[List[float]]:
+        """Returns the placement of a gear, or None if its train was not phased."""
+        if self.component[i] == -1:
+            return None
+        return placement_matrix(self.angle[i], self.normal(i), self.position(i))
+
+    def bounds(self, profiles: Dict[int, ToothProfile]) -> Tuple[float, float, float, float]:
+        """Returns the box that holds the outside circles of the gears in their planes, see gear_bounds.
+
+        Arguments:
+        profiles -- The tooth profile of each number of teeth.
+        """
+        radii = {teeth: profile.dims.outside_dia / 2.0 for teeth, profile in profiles.items()}
+        if not len(self):
+            return 0.0, 0.0, 0.0, 0.0
+        return (min(u - radii[t] for u, t in zip(self.u, self.teeth)),
+                min(v - radii[t] for v, t in zip(self.v, self.teeth)),
+                max(u + radii[t] for u, t in zip(self.u, self.teeth)),
+                max(v + radii[t] for v, t in zip(self.v, self.teeth)))
+
+    def placed_gears(self, profiles: Dict[int, ToothProfile], hole_diam: float = 0.0,
+                     layer: str = 'PLANE{plane}') -> Iterator[PlacedGear]:
+        """Yields the gears placed in their planes, for the writers of export.
+
+        Arguments:
+        profiles -- The tooth profile of each number of teeth.
+        hole_diam -- The diameter of the hole of every gear.
+        layer -- The layer of each gear, {plane} is replaced by the number of
+                 its plane, counted from 1.
+        """
+        for i in range(len(self)):
+            yield PlacedGear(profiles[self.teeth[i]], self.u[i], self.v[i], self.angle[i], hole_diam,
+                             layer.format(plane=self.plane[i] + 1))
@@ -0,0 +1,368 @@
+"""Detection of meshing gears and the layout of gear trains.
+
+Gears are described by their center in world coordinates, the normal of the
+plane they lie on, and their number of teeth. Nothing here depends on the
+Fusion 360 API.
+"""
+
+import math
+from array import array
+from collections import defaultdict, deque
+from typing import Dict, List, Sequence, Tuple
+
+__all__ = [
+    'plane_basis',
+    'PlaneGroups',
+    'group_by_plane',
+    'find_meshes',
+    'placement_matrix',
+    'gear_order',
+    'MeshGraph',
+    'train_components',
+    'PhaseSolution',
+    'mesh_angle',
+    'solve_phases',
+]
+
+Vector = Tuple[float, float, float]
+
+# Largest angular error, in radians, for which a loop in a gear train is still
+# considered consistent.
+PHASE_TOLERANCE = 1e-4
+
+# Normals are compared with an absolute tolerance on each component and plane
+# offsets with a distance tolerance in centimeters.
+NORMAL_TOLERANCE = 1e-6
+DISTANCE_TOLERANCE = 1e-4
+
+
+def plane_basis(normal: Vector) -> Tuple[Vector, Vector]:
+    """Returns the in-plane X and Y axes of a plane.
+
+    The axes are the world X and Y axes rotated by the smallest rotation that
+    takes the world Z axis onto the normal, so a gear built on the XY plane and
+    rotated onto the plane has its X axis along the returned X axis.
+    """
+    nx, ny, nz = normal
+    if 1.0 + nz < 1e-12:
+        # Turned upside down, rotate half a turn about the X axis.
+        return (1.0, 0.0, 0.0), (0.0, -1.0, 0.0)
+    k = 1.0 / (1.0 + nz)
+    return (1.0 - nx * nx * k, -nx * ny * k, -nx), (-nx * ny * k, 1.0 - ny * ny * k, -ny)
+
+
+def placement_matrix(angle: float, normal: Vector, position: Vector) -> List[float]:
+    """Returns the transform that places a gear built on the XY plane at the origin.
+
+    It rotates the gear by angle about its axis, turns it onto the plane with
+    the given normal and moves it to position. The result is the 16 values of
+    a 4x4 matrix in row-major order, as expected by Matrix3D.setWithArray.
+    """
+    (ux, uy, uz), (vx, vy, vz) = plane_basis(normal)
+    nx, ny, nz = normal
+    px, py, pz = position
+    c, s = math.cos(angle), math.sin(angle)
+    return [
+        ux * c + vx * s, vx * c - ux * s, nx, px,
+        uy * c + vy * s, vy * c - uy * s, ny, py,
+        uz * c + vz * s, vz * c - uz * s, nz, pz,
+        0.0, 0.0, 0.0, 1.0,
+    ]
+
+
+class PlaneGroups:
+    """Gears grouped by the plane they lie on.
+
+    group -- The index of the plane of each gear.
+    normals -- The normal of each plane.
+    coords -- The (x, y) position of each gear in the coordinate system of its plane.
+    """
+
+    def __init__(self, group: List[int], normals: List[Vector], coords: List[Tuple[float, float]]):
+        self.group = group
+        self.normals = normals
+        self.coords = coords
+
+    def members(self) -> List[List[int]]:
+        """Returns the indices of the gears on each plane."""
+        members = [[] for _ in self.normals]
+        for i, g in enumerate(self.group):
+            members[g].append(i)
+        return members
+
+
+def group_by_plane(centers: Sequence[Vector], normals: Sequence[Vector]) -> PlaneGroups:
+    """Buckets gears by quantized plane normal and plane offset.
+
+    Normals that only differ by rounding noise end up on the same plane.
+    """
+    keys: Dict[tuple, int] = {}
+    group = []
+    plane_normals = []
+    bases = []
+    coords = []
+    for (px, py, pz), (nx, ny, nz) in zip(centers, normals):
+        offset = px * nx + py * ny + pz * nz
+        key = (round(nx / NORMAL_TOLERANCE), round(ny / NORMAL_TOLERANCE), round(nz / NORMAL_TOLERANCE),
+               round(offset / DISTANCE_TOLERANCE))
+        g = keys.get(key)
+        if g is None:
+            g = keys[key] = len(plane_normals)
+            plane_normals.append((nx, ny, nz))
+            bases.append(plane_basis((nx, ny, nz)))
+        (ux, uy, uz), (vx, vy, vz) = bases[g]
+        group.append(g)
+        coords.append((px * ux + py * uy + pz * uz, px * vx + py * vy + pz * vz))
+    return PlaneGroups(group, plane_normals, coords)
+
+
+def find_meshes(planes: PlaneGroups, teeth: Sequence[int], module: float) -> List[Tuple[int, int]]:
+    """Returns all pairs of meshing gears as (i, j) tuples with j < i, sorted.
+
+    Two gears on the same plane mesh when their center distance, measured in
+    half modules, rounds to the sum of their numbers of teeth.
+
+    Arguments:
+    planes -- The gears grouped by plane, see group_by_plane.
+    teeth -- The number of teeth of each gear.
+    module -- The module, in the same length unit as the gear centers.
+    """
+    meshes = []
+    for members in planes.members():
+        if len(members) < 2:
+            continue
+
+        # Bucket the centers in a grid with cells as large as the largest
+        # possible center distance, so only neighboring cells need checking.
+        max_teeth = max(teeth[i] for i in members)
+        cell = (2 * max_teeth + 0.5) * module / 2.0
+        grid = defaultdict(list)
+        for i in members:
+            x, y = planes.coords[i]
+            grid[(math.floor(x / cell), math.floor(y / cell))].append(i)
+
+        for i in members:
+            xi, yi = planes.coords[i]
+            cx, cy = math.floor(xi / cell), math.floor(yi / cell)
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    for j in grid.get((gx, gy), ()):
+                        if j >= i:
+                            continue
+                        xj, yj = planes.coords[j]
+                        d = math.hypot(xi - xj, yi - yj)
+                        if round(d / module * 2.0) == teeth[i] + teeth[j]:
+                            meshes.append((i, j))
+    meshes.sort()
+    return meshes
+
+
+def gear_order(planes: PlaneGroups, teeth: Sequence[int]) -> List[int]:
+    """Returns the gears sorted by a key that only depends on the layout.
+
+    Larger gears come first, ties are broken by plane and position. Used as
+    the root preference and neighbor order of the mesh graph so the phasing
+    does not depend on the order the gears were selected in.
+    """
+    def key(i):
+        x, y = planes.coords[i]
+        normal = planes.normals[planes.group[i]]
+        return (-teeth[i], tuple(round(c / NORMAL_TOLERANCE) for c in normal),
+                round(x / DISTANCE_TOLERANCE), round(y / DISTANCE_TOLERANCE))
+    return sorted(range(len(teeth)), key=key)
+
+
+class MeshGraph:
+    """The gear train as an undirected graph with a node per gear and an edge per mesh.
+
+    The adjacency is stored in compressed form: the neighbors of gear i are
+    neighbors[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, count: int, meshes: Sequence[Tuple[int, int]], order: Sequence[int] = None):
+        """Builds the graph.
+
+        Arguments:
+        count -- The number of gears.
+        meshes -- The meshing pairs, as returned by find_meshes.
+        order -- Optional ranking of the gears. Neighbors are stored by
+                 ascending rank, which makes traversals independent of the
+                 order the gears were given in.
+        """
+        degree = [0] * (count + 1)
+        for i, j in meshes:
+            degree[i + 1] += 1
+            degree[j + 1] += 1
+        for i in range(count):
+            degree[i + 1] += degree[i]
+        self.offsets = array('i', degree)
+
+        fill = list(degree[:count])
+        neighbors = array('i', bytes(4 * len(meshes) * 2))
+        for i, j in meshes:
+            neighbors[fill[i]] = j
+            fill[i] += 1
+            neighbors[fill[j]] = i
+            fill[j] += 1
+        if order is not None:
+            rank = [0] * count
+            for r, i in enumerate(order):
+                rank[i] = r
+            for i in range(count):
+                a, b = degree[i], degree[i + 1]
+                neighbors[a:b] = array('i', sorted(neighbors[a:b], key=rank.__getitem__))
+        self.neighbors = neighbors
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def adjacent(self, i: int):
+        """Returns the gears meshing with gear i."""
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+
+    def degree(self, i: int) -> int:
+        return self.offsets[i + 1] - self.offsets[i]
+
+
+def train_components(graph: MeshGraph) -> array:
+    """Returns the index of the connected gear train of each gear.
+
+    Trains are numbered in the order of their first gear.
+    """
+    count = len(graph)
+    component = array('i', [-1] * count)
+    offsets, neighbors = graph.offsets, graph.neighbors
+    c = 0
+    for root in range(count):
+        if component[root] != -1:
+            continue
+        component[root] = c
+        stack = [root]
+        while stack:
+            j = stack.pop()
+            for k in range(offsets[j], offsets[j + 1]):
+                i = neighbors[k]
+                if component[i] == -1:
+                    component[i] = c
+                    stack.append(i)
+        c += 1
+    return component
+
+
+class PhaseSolution:
+    """The result of solve_phases.
+
+    angles -- The rotation of each gear about its own axis, in radians.
+    component -- The index of the connected gear train each gear belongs to,
+                 or -1 for gears of trains that were not phased.
+    roots -- The gear each train was phased from.
+    conflicts -- (i, j, error) for each mesh that closes a loop the gears
+                 cannot be phased consistently around. error is the angle,
+                 in radians, gear i is off from meshing with gear j.
+    """
+
+    def __init__(self, angles, component, roots, conflicts):
+        self.angles = angles
+        self.component = component
+        self.roots = roots
+        self.conflicts = conflicts
+
+
+def mesh_angle(angle_j: float, teeth_i: int, teeth_j: int, xi: float, yi: float, xj: float, yj: float) -> float:
+    """Returns the rotation of gear i that meshes it with gear j.
+
+    Arguments:
+    angle_j -- The rotation of gear j.
+    teeth_i, teeth_j -- The number of teeth of both gears.
+    xi, yi, xj, yj -- The in-plane centers of both gears.
+    """
+    base_angle = -(angle_j - math.pi / 2.0 / teeth_j) * teeth_j / teeth_i + math.pi / 2.0 / teeth_i
+    delta_angle = math.atan2(yi - yj, xi - xj)
+    rot_angle = delta_angle * (1 + teeth_j / teeth_i)
+    return math.pi + base_angle + rot_angle
+
+
+def _pitch_error(angle: float, expected: float, teeth: int) -> float:
+    # A gear looks the same after turning by one tooth, so only the offset
+    # within a tooth pitch matters.
+    pitch = 2.0 * math.pi / teeth
+    error = math.fmod(expected - angle, pitch)
+    if error > pitch / 2.0:
+        error -= pitch
+    elif error < -pitch / 2.0:
+        error += pitch
+    return error
+
+
+def solve_phases(graph: MeshGraph, teeth: Sequence[int], coords: Sequence[Tuple[float, float]],
+                 roots: Sequence[int] = None, tolerance: float = PHASE_TOLERANCE,
+                 active: Sequence[bool] = None) -> PhaseSolution:
+    """Propagates phase angles through every connected gear train.
+
+    Each train is traversed breadth first from its root, which keeps the
+    rotation of a tooth gap on its X axis. Every gear is meshed with the gear
+    it was reached from, and the remaining meshes are checked afterwards.
+
+    Arguments:
+    graph -- The mesh graph.
+    teeth -- The number of teeth of each gear.
+    coords -- The in-plane center of each gear.
+    roots -- Optional candidates for the train roots, in order of preference.
+             Defaults to the graph order; every gear not reached from an
+             earlier root starts a new train.
+    tolerance -- The largest angular error, in radians, of a consistent loop.
+    active -- Optional flag per gear. Only the trains with an active gear are
+              phased; the other gears keep an angle of 0 and are not checked
+              for conflicts. The phased trains get the same angles as without
+              the flags, since a train is always phased from the same root.
+    """
+    count = len(graph)
+    angles = [0.0] * count
+    component = array('i', [-1] * count)
+    parent = array('i', [-1] * count)
+    train_roots = []
+    offsets, neighbors = graph.offsets, graph.neighbors
+
+    skip = None
+    if active is not None:
+        trains = train_components(graph)
+        phased = set(trains[i] for i in range(count) if active[i])
+        skip = [trains[i] not in phased for i in range(count)]
+
+    for root in (roots if roots is not None else range(count)):
+        if component[root] != -1 or (skip is not None and skip[root]):
+            continue
+        c = len(train_roots)
+        train_roots.append(root)
+        component[root] = c
+        angles[root] = math.pi / 2.0 / teeth[root]
+        queue = deque([root])
+        while queue:
+            j = queue.popleft()
+            xj, yj = coords[j]
+            for k in range(offsets[j], offsets[j + 1]):
+                i = neighbors[k]
+                if component[i] != -1:
+                    continue
+                component[i] = c
+                parent[i] = j
+                xi, yi = coords[i]
+                angles[i] = mesh_angle(angles[j], teeth[i], teeth[j], xi, yi, xj, yj)
+                queue.append(i)
+
+    conflicts = []
+    for i in range(count):
+        if component[i] == -1:
+            continue
+        xi, yi = coords[i]
+        for k in range(offsets[i], offsets[i + 1]):
+            j = neighbors[k]
+            if j > i or parent[i] == j or parent[j] == i:
+                continue
+            xj, yj = coords[j]
+            error = _pitch_error(angles[i], mesh_angle(angles[j], teeth[i], teeth[j], xi, yi, xj, yj), teeth[i])
+            if abs(error) > tolerance:
+                conflicts.append((i, j, error))
+
+    return PhaseSolution(angles, component, train_roots, conflicts)
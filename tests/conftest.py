@@ -0,0 +1,5 @@
+import os
+import sys
+
+# gearcore is imported from the lib folder, as python -m gearcore does.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
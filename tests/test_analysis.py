@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+from gearcore import analysis
+
+PRESSURE_ANGLE = math.radians(20.0)
+# Module 1 mm, so the gears are laid out in tenths of a centimeter.
+DIAMETRAL_PITCH = 25.4
+MODULE = 0.1
+
+
+def contact_ratio(t1, t2, distance):
+    # The transverse contact ratio of two standard gears from the textbook formula.
+    rb1, rb2 = (t * MODULE / 2.0 * math.cos(PRESSURE_ANGLE) for t in (t1, t2))
+    ra1, ra2 = ((t + 2) * MODULE / 2.0 for t in (t1, t2))
+    working_angle = math.acos((rb1 + rb2) / distance)
+    return ((math.sqrt(ra1 ** 2 - rb1 ** 2) + math.sqrt(ra2 ** 2 - rb2 ** 2) - distance * math.sin(working_angle))
+            / (math.pi * MODULE * math.cos(PRESSURE_ANGLE)))
+
+
+@pytest.mark.parametrize('degrees, teeth', [(14.5, 32), (20.0, 18), (25.0, 12)])
+def test_min_teeth_without_undercut(degrees, teeth):
+    assert analysis.min_teeth_without_undercut(math.radians(degrees)) == teeth
+
+
+@pytest.mark.parametrize('spread', [0.0, 0.01])
+def test_contact_ratio_and_backlash_of_a_pair(spread):
+    distance = 20 * MODULE + spread
+    result = analysis.analyze_meshes([(0, 1)], [20, 20], [(0.0, 0.0), (0.0, distance)], DIAMETRAL_PITCH,
+                                     PRESSURE_ANGLE, 0.001)
+    assert result.contact_ratio[0] == pytest.approx(contact_ratio(20, 20, distance), abs=1e-12)
+    if not spread:
+        assert result.contact_ratio[0] == pytest.approx(1.557, abs=1e-3)
+    # Moving the gears apart opens the play by twice the spread times the tangent of the pressure angle.
+    assert result.backlash[0] == pytest.approx(0.001 + 2.0 * spread * math.tan(PRESSURE_ANGLE), abs=1e-12)
+    # The clearance is the dedendum less the addendum.
+    dedendum = 1.2 * MODULE + 0.002 * 2.54
+    assert result.clearance[0] == pytest.approx(dedendum - MODULE + spread, abs=1e-12)
+    assert not result.interference[0]
+    assert result.undercut([20, 20]) == []
+
+
+def test_small_pinion_interferes_and_is_undercut():
+    teeth = [20, 12, 200]
+    coords = [(0.0, 0.0), (16 * MODULE, 0.0), (122 * MODULE, 0.0)]
+    result = analysis.analyze_meshes([(0, 1), (1, 2)], teeth, coords, DIAMETRAL_PITCH, PRESSURE_ANGLE)
+    assert list(result.interference) == [1, 1]
+    assert result.undercut(teeth) == [1]
+    assert analysis.analysis_summary(result, teeth) == [
+        '2 meshes, contact ratio 1.49 to 1.67', '1 gears with undercut, fewer than 18 teeth',
+        '2 meshes with tip interference', 'Backlash 0.000 to 0.000 mm']
+    assert analysis.analysis_warnings(result, teeth) == [
+        'Gear 1 (20 teeth) and gear 2 (12 teeth): tip interference, gear 2 is undercut',
+        'Gear 2 (12 teeth) and gear 3 (200 teeth): tip interference, gear 2 is undercut']
+
+
+def test_gears_too_close_run_into_the_root_and_lose_their_backlash():
+    squeeze = 0.03
+    coords = [(0.0, 0.0), (20 * MODULE - squeeze, 0.0)]
+    result = analysis.analyze_meshes([(0, 1)], [20, 20], coords, DIAMETRAL_PITCH, PRESSURE_ANGLE)
+    assert result.clearance[0] < 0.0 and result.interference[0]
+    assert result.backlash[0] == pytest.approx(-2.0 * squeeze * math.tan(PRESSURE_ANGLE), abs=1e-12)
+    (warning,) = analysis.analysis_warnings(result, [20, 20])
+    assert 'tip runs 0.049 mm into the root' in warning and 'backlash -0.218 mm' in warning
+
+
+def test_warnings_are_limited():
+    pairs = [(k, k + 1) for k in range(30)]
+    coords = [(k * 12 * MODULE, 0.0) for k in range(31)]
+    result = analysis.analyze_meshes(pairs, [12] * 31, coords, DIAMETRAL_PITCH, PRESSURE_ANGLE)
+    warnings = analysis.analysis_warnings(result, [12] * 31, limit=5)
+    assert len(warnings) == 6 and warnings[-1] == '...'
+    assert analysis.analysis_summary(analysis.analyze_meshes([], [], [], DIAMETRAL_PITCH, PRESSURE_ANGLE),
+                                     []) == ['No meshing gears']
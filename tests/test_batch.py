@@ -0,0 +1,122 @@
+import io
+import json
+
+import pytest
+
+from gearcore import batch
+
+
+# A train of three meshing gears with 12, 18 and 12 teeth, module 1 mm.
+def make_train(name, x=0.0):
+    return {'name': name, 'module': 1.0, 'root_fillet_radius': 0.2, 'hole_diam': 2.0,
+            'gears': [{'center': [x, 0, 0], 'radius': 6},
+                      {'center': [x + 15, 0, 0], 'radius': 9},
+                      {'center': [x + 30, 0, 0], 'normal': [0, 0, 1], 'radius': 6}]}
+
+
+def run(trains, fmt='json', workers=1, writer_type=batch.JsonResultWriter):
+    output = io.StringIO()
+    writer = writer_type(output)
+    stats = batch.run_batch(batch.read_trains(io.StringIO(trains), fmt), writer, workers=workers)
+    return stats, output.getvalue()
+
+
+def lines(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_json_lines_list_and_concatenated_values_give_the_same_trains():
+    trains = [make_train('A'), make_train('B', 100.0)]
+    jsonl = ''.join(json.dumps(t) + '\n' for t in trains)
+    listed = json.dumps(trains, indent=2)
+    concatenated = '\n'.join(json.dumps(t, indent=2) for t in trains)
+    assert list(batch.read_trains(io.StringIO(jsonl))) == trains
+    assert list(batch.read_trains(io.StringIO(listed))) == trains
+    assert list(batch.read_trains(io.StringIO(concatenated))) == trains
+
+
+def test_json_values_split_across_reads(monkeypatch):
+    monkeypatch.setattr(batch, '_READ_SIZE', 7)
+    trains = [make_train(str(n), n * 100.0) for n in range(5)]
+    text = ' \n'.join(json.dumps(t) for t in trains)
+    assert list(batch.read_trains(io.StringIO(text))) == trains
+
+
+def test_invalid_json_raises_value_error():
+    with pytest.raises(ValueError):
+        list(batch.read_trains(io.StringIO(json.dumps(make_train('A')) + '\n{"name": ')))
+
+
+def test_solved_train():
+    stats, text = run(json.dumps(make_train('A')))
+    assert stats['trains'] == 1 and stats['gears'] == 3 and stats['meshes'] == 2 and stats['errors'] == 0
+    (result,) = lines(text)
+    assert [g['teeth'] for g in result['gears']] == [12, 18, 12]
+    assert sorted(sorted(pair) for pair in result['meshes']) == [[0, 1], [1, 2]]
+    assert result['conflicts'] == []
+    assert [p['teeth'] for p in result['profiles']] == [12, 18]
+
+
+@pytest.mark.parametrize('train, error', [
+    ({'name': 'no module', 'gears': [{'center': [0, 0, 0], 'radius': 6}]}, 'module is missing'),
+    ({'name': 'no gears', 'module': 1}, 'gears is missing'),
+    ({'name': 'small', 'module': 1, 'gears': [{'center': [0, 0, 0], 'radius': 1}]}, 'too small'),
+    ({'name': 'angle', 'module': 1, 'pressure_angle': 50, 'gears': [{'center': [0, 0], 'radius': 6}]},
+     'pressure_angle'),
+    ({'name': 'normal', 'module': 1, 'gears': [{'center': [0, 0, 0], 'normal': [0, 0, 0], 'radius': 6}]},
+     'normal of gear 1 is zero'),
+    ({'name': 'center', 'module': 1, 'gears': [{'center': 'origin', 'radius': 6}]}, 'center of gear 1'),
+    ('gear', 'not an object'),
+])
+def test_bad_train_is_written_with_its_error(train, error):
+    text = '\n'.join(json.dumps(t) for t in (make_train('before'), train, make_train('after')))
+    stats, output = run(text)
+    assert stats['trains'] == 3 and stats['errors'] == 1
+    before, bad, after = lines(output)
+    assert before['name'] == 'before' and after['name'] == 'after'
+    assert error in bad['error']
+    assert 'gears' not in bad
+
+
+def test_csv_rows_are_grouped_into_trains():
+    text = ('train,x,y,z,nx,ny,nz,radius,module,pressure_angle,backlash,root_fillet_radius,hole_diam\n'
+            'A,0,0,0,,,,6,1,20,0,0.2,2\n'
+            'A,15,0,0,,,,9,,,,,\n'
+            'B,0,0,0,0,1,0,6,2,,,,\n'
+            'B,0,0,15,0,1,0,9,,,,,\n'
+            'B,0,0,30,0,1,0,6,,,,,\n'
+            'A,100,0,0,,,,6,1,,,,\n')
+    trains = list(batch.read_trains(io.StringIO(text), 'csv'))
+    assert [t['name'] for t in trains] == ['A', 'B', 'A']
+    assert [len(t['gears']) for t in trains] == [2, 3, 1]
+    assert trains[0]['module'] == '1' and trains[0]['hole_diam'] == '2'
+    assert 'pressure_angle' not in trains[1]
+    assert trains[1]['gears'][0]['normal'] == ['0', '1', '0']
+    assert trains[0]['gears'][1]['normal'] == [0.0, 0.0, 1.0]
+
+    stats, output = run(text, 'csv', writer_type=batch.CsvResultWriter)
+    rows = output.splitlines()
+    assert rows[0].split(',') == batch.CsvResultWriter.COLUMNS
+    assert [row.split(',')[:3] for row in rows[1:]] == [
+        ['A', '1', '12'], ['A', '2', '18'], ['B', '1', '6'], ['B', '2', '9'], ['B', '3', '6'], ['A', '1', '12']]
+    assert stats['meshes'] == 3
+
+
+def test_output_is_the_same_with_one_and_two_workers(tmp_path):
+    trains = tmp_path / 'trains.jsonl'
+    with open(trains, 'w') as f:
+        for n in range(40):
+            f.write(json.dumps(make_train(f'T{n}', n * 100.0)) + '\n')
+        f.write(json.dumps({'name': 'bad', 'module': 1}) + '\n')
+    outputs = []
+    for workers in (1, 2):
+        output, dxf = tmp_path / f'out{workers}.jsonl', tmp_path / f'out{workers}.dxf'
+        code = batch.main([str(trains), '-o', str(output), '--dxf', str(dxf), '--workers', str(workers)])
+        assert code == 1
+        outputs.append((output.read_bytes(), dxf.read_bytes()))
+    assert outputs[0] == outputs[1]
+    assert outputs[0][0].count(b'\n') == 41
+    # Every train is on one plane, whose layer is listed in the layer table.
+    lines = outputs[0][1].decode().split('\n')
+    layers = [lines[k + 2] for k, line in enumerate(lines) if line == 'AcDbLayerTableRecord']
+    assert layers == ['0'] + [f'TRAIN{n}_PLANE1' for n in range(1, 41)]
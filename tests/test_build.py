@@ -0,0 +1,102 @@
+import importlib
+import math
+import os
+import sys
+
+import pytest
+
+# The command is run against the adsk stand-in of the bench folder.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import adsk  # noqa: E402
+import adsk.core  # noqa: E402
+import adsk.fusion  # noqa: E402
+import run_benchmarks as bench  # noqa: E402
+
+
+def new_design():
+    design = adsk.fusion.Design()
+    adsk.core.Application.get().activeProduct = design
+    return design
+
+
+def built_occurrences(entry, design, circles):
+    # The occurrence built from each circle, found by its Source attribute.
+    by_token = {}
+    for attrib in design.findAttributes('SpurGear', 'Source'):
+        by_token[entry.gearcore.decode_source(attrib.value).token] = attrib.parent
+    return [by_token.get(circle.entityToken) for circle in circles]
+
+
+def test_clean_gear_deleted_during_a_chunked_build_is_built_again(monkeypatch):
+    entry = bench.load_addin()
+    monkeypatch.setattr(entry, 'CHUNKED_BUILD_GEARS', 50)
+    design = new_design()
+    circles = bench.make_circles(design, 60)
+    bench.execute(entry, circles, False, None)
+    first = built_occurrences(entry, design, circles)
+    # Gear 30 is in another train than gear 0, so its train is not phased again.
+    placed = first[30].transform2.asArray()
+
+    circles[0].centerSketchPoint.geometry.x += bench.MODULE * 0.01
+    build = entry.ComponentBuilder.build
+
+    def build_after_delete(builder, i):
+        if first[30].isValid:
+            first[30].deleteMe()
+        build(builder, i)
+
+    monkeypatch.setattr(entry.ComponentBuilder, 'build', build_after_delete)
+    bench.execute(entry, circles, False, None)
+
+    second = built_occurrences(entry, design, circles)
+    assert None not in second
+    assert len(design.rootComponent.occurrences) == 60
+    assert second[30] is not first[30]
+    assert second[30].transform2.asArray() == placed
+    assert second[31] is first[31]
+
+
+@pytest.mark.parametrize('module, count', [(0.0, 4), (1.0, 0)])
+def test_preview_redraw_skips_invalid_inputs(module, count):
+    entry = bench.load_addin()
+    design = new_design()
+    circles = bench.make_circles(design, 4)
+    command = adsk.core.Command()
+    entry.command_created(adsk.core.CommandCreatedEventArgs(command))
+    inputs = command.commandInputs
+    for circle in circles[:count]:
+        inputs.itemById('circles_select').addSelection(circle)
+    inputs.itemById('module').value = module
+    command.inputChanged._fire(adsk.core.InputChangedEventArgs(inputs.itemById('module'), inputs))
+    # The debounce delay has passed when the redraw event arrives.
+    entry.gear_preview._last_request = 0.0
+    try:
+        entry.command_preview_redraw(adsk.core.CustomEventArgs())
+        assert not entry.gear_preview._groups
+    finally:
+        entry.command_destroy(adsk.core.CommandEventArgs(command))
+
+
+def test_edited_gear_keeps_its_body_in_its_timeline_group():
+    entry = bench.load_addin()
+    entry.load_modules()
+    spur_gear = importlib.import_module(entry.__package__ + '.spur_gear')
+    design = new_design()
+    comps = [spur_gear.drawGear(design, 25.4, teeth, 0.5, 0.02, math.radians(20.0), 0.0, 0.3)
+             for teeth in (12, 18)]
+    old = spur_gear.readGearParams(comps[0])
+    spur_gear.updateGear(comps[0], old, old._replace(num_teeth=16))
+
+    timeline = design.timeline
+    assert timeline.markerPosition == timeline.count
+    groups = list(timeline.timelineGroups)
+    assert [group.name for group in groups] == ['Spur Gear', 'Spur Gear']
+    for comp in comps:
+        entities = [s for s in comp.sketches] + [f for f in comp.features.extrudeFeatures]
+        entities += [f for f in comp.features.circularPatternFeatures]
+        (group,) = [g for g in groups if entities[0].timelineObject in list(g)]
+        indices = [o.index for o in group]
+        assert indices == list(range(indices[0], indices[0] + len(indices)))
+        assert all(e.timelineObject in list(group) for e in entities)
+        assert group.item(group.count - 1).entity.sketchCurves.sketchCircles.item(0).isConstruction
@@ -0,0 +1,137 @@
+import io
+import math
+import re
+from bisect import bisect_right
+
+import pytest
+
+from gearcore import export, geometry
+from gearcore.geometry import FlankSpline
+
+
+# Evaluates a clamped B-spline at u with de Boor's algorithm.
+def de_boor(spline, u):
+    p, knots = spline.degree, spline.knots
+    k = min(bisect_right(knots, u) - 1, len(knots) - p - 2)
+    d = [spline.control_points[j + k - p] for j in range(p + 1)]
+    for r in range(1, p + 1):
+        for j in range(p, r - 1, -1):
+            i = j + k - p
+            a = (u - knots[i]) / (knots[i + p + 1 - r] - knots[i])
+            d[j] = tuple((1.0 - a) * c0 + a * c1 for c0, c1 in zip(d[j - 1], d[j]))
+    return d[p]
+
+
+# Evaluates a Bezier curve at t with de Casteljau's algorithm.
+def de_casteljau(points, t):
+    points = list(points)
+    while len(points) > 1:
+        points = [tuple((1.0 - t) * a + t * b for a, b in zip(p0, p1)) for p0, p1 in zip(points, points[1:])]
+    return points[0]
+
+
+def assert_same_curve(spline, segments):
+    # Every segment spans the next distinct knot interval of the spline.
+    spans = sorted(set(spline.knots))
+    assert len(segments) == len(spans) - 1
+    for bezier, u0, u1 in zip(segments, spans, spans[1:]):
+        assert len(bezier) == spline.degree + 1
+        for t in (0.0, 0.25, 0.5, 0.9, 1.0):
+            assert de_casteljau(bezier, t) == pytest.approx(de_boor(spline, u0 + (u1 - u0) * t), abs=1e-12)
+
+
+@pytest.mark.parametrize('spline', [
+    FlankSpline(3, [0, 0, 0, 0, 1, 1, 1, 1], [(0, 0), (1, 2), (3, 2), (4, 0)]),
+    FlankSpline(3, [0, 0, 0, 0, 0.3, 0.5, 1, 1, 1, 1], [(0, 0), (1, 2), (2, 3), (3, 1), (4, 0), (5, 1)]),
+    FlankSpline(3, [0, 0, 0, 0, 0.5, 0.5, 1, 1, 1, 1], [(0, 0), (1, 2), (2, 3), (3, 1), (4, 0), (5, 1)]),
+    FlankSpline(2, [0, 0, 0, 0.2, 0.7, 1, 1, 1], [(0, 0), (1, 1), (2, 0), (3, 1), (4, 0)]),
+])
+def test_bezier_segments_keep_the_curve(spline):
+    assert_same_curve(spline, export.bezier_segments(spline))
+
+
+def test_bezier_segments_of_a_tooth_flank():
+    profile = geometry.tooth_profile(25.4, 20, math.radians(20.0), tolerance=1e-4)
+    for spline in (profile.spline1, profile.spline2):
+        assert len(set(spline.knots)) > 2
+        assert_same_curve(spline, export.bezier_segments(spline))
+
+
+def placed_gears():
+    profile = geometry.tooth_profile(25.4, 12, math.radians(20.0), tolerance=1e-3, fillet_radius=0.02)
+    return [export.PlacedGear(profile, 0.0, 0.0, 0.1, 0.2, 'PLANE1'),
+            export.PlacedGear(profile, 1.2, 0.0, 0.3, 0.2, 'PLANE2')]
+
+
+def dxf_pairs(text):
+    lines = text.split('\n')
+    assert lines[-1] == ''
+    return list(zip(lines[:-1:2], lines[1::2]))
+
+
+def entities(text):
+    return text[text.index('ENTITIES'):text.index('OBJECTS')]
+
+
+def layer_names(pairs):
+    return [pairs[k + 1][1] for k, pair in enumerate(pairs) if pair == ('100', 'AcDbLayerTableRecord')]
+
+
+@pytest.mark.parametrize('splines', [True, False])
+def test_dxf_is_an_ac1015_drawing_with_unique_handles(splines):
+    stream = io.StringIO()
+    assert export.write_dxf(stream, placed_gears(), splines=splines, layers=['PLANE1', 'PLANE2']) == 2
+    pairs = dxf_pairs(stream.getvalue())
+    assert pairs[:6] == [('0', 'SECTION'), ('2', 'HEADER'), ('9', '$ACADVER'), ('1', 'AC1015'),
+                         ('9', '$HANDSEED'), ('5', pairs[5][1])]
+    assert pairs[-1] == ('0', 'EOF')
+    handles = [int(value, 16) for code, value in pairs[6:] if code in ('5', '105')]
+    assert len(handles) == len(set(handles))
+    assert max(handles) < int(pairs[5][1], 16)
+    assert layer_names(pairs) == ['0', 'PLANE1', 'PLANE2']
+    kinds = {value for code, value in pairs if code == '0'}
+    assert ('SPLINE' in kinds) == splines and {'LWPOLYLINE', 'CIRCLE'} <= kinds
+
+
+@pytest.mark.parametrize('copied', [False, True])
+def test_dxf_without_layers_lists_the_layers_of_its_gears(copied):
+    listed, collected = io.StringIO(), io.StringIO()
+    export.write_dxf(listed, placed_gears(), layers=['PLANE1', 'PLANE2'])
+    writer = export.DxfWriter(collected, layers=None)
+    writer.begin()
+    for gear in placed_gears():
+        if copied:
+            unnumbered = io.StringIO()
+            export.DxfWriter(unnumbered, handles=False).add(gear)
+            writer.copy(unnumbered.getvalue(), 1)
+        else:
+            writer.add(gear)
+    writer.end()
+    pairs = dxf_pairs(collected.getvalue())
+    assert layer_names(pairs) == ['0', 'PLANE1', 'PLANE2']
+    handles = [int(value, 16) for code, value in pairs[6:] if code in ('5', '105')]
+    assert len(handles) == len(set(handles))
+    assert max(handles) < int(pairs[5][1], 16)
+    assert entities(collected.getvalue()) == entities(listed.getvalue())
+
+
+def test_dxf_entities_written_without_handles_are_numbered_when_copied():
+    numbered, unnumbered, copied = io.StringIO(), io.StringIO(), io.StringIO()
+    export.write_dxf(numbered, placed_gears())
+    export.DxfWriter(unnumbered, handles=False).add(placed_gears()[0])
+    export.DxfWriter(unnumbered, handles=False).add(placed_gears()[1])
+    assert re.search(r'\n5\n[0-9A-F]+\n', unnumbered.getvalue()) is None
+    writer = export.DxfWriter(copied)
+    writer.begin()
+    writer.copy(unnumbered.getvalue(), 2)
+    writer.end()
+    assert writer.count == 2
+    assert copied.getvalue() == numbered.getvalue()
+
+
+def test_svg_with_bounds_is_written_the_same_as_without():
+    gears = placed_gears()
+    collected, streamed = io.StringIO(), io.StringIO()
+    export.write_svg(collected, gears)
+    export.write_svg(streamed, iter(gears), export.gear_bounds(gears))
+    assert streamed.getvalue() == collected.getvalue()
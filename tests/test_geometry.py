@@ -0,0 +1,173 @@
+import math
+
+import pytest
+
+from gearcore import geometry
+from test_export import de_boor
+
+
+PRESSURE_ANGLE = math.radians(20.0)
+
+
+def polar(point):
+    return math.hypot(*point), math.atan2(point[1], point[0])
+
+
+def involute_direction(base_radius, point):
+    # The direction of the involute of the base circle through the point,
+    # away from the base circle.
+    radius, angle = polar(point)
+    roll = math.sqrt(radius * radius / (base_radius * base_radius) - 1.0)
+    return angle + math.atan(roll)
+
+
+# Gears with 12 and 20 teeth have their fillets end on the radial line below
+# the flank, gears with 40 and 80 teeth on the flank. Fillets of 0.2 do not
+# fit into the gap and are made smaller.
+@pytest.mark.parametrize('teeth', [12, 20, 40, 80])
+@pytest.mark.parametrize('fillet_radius', [0.01, 0.03, 0.2])
+def test_root_fillet_is_tangent_to_the_root_circle_and_the_side_of_the_tooth(teeth, fillet_radius):
+    profile = geometry.tooth_profile(25.4, teeth, PRESSURE_ANGLE, tolerance=1e-3, fillet_radius=fillet_radius)
+    root_radius = profile.dims.root_dia / 2.0
+    base_radius = profile.dims.base_dia / 2.0
+    start, middle, end = profile.fillet1
+    (cx, cy), radius = geometry.arc_center(start, middle, end)
+    if fillet_radius < 0.2:
+        assert radius == pytest.approx(fillet_radius, abs=1e-11)
+    else:
+        assert radius < fillet_radius
+
+    # The center is on the line through the start point, just outside of the root circle.
+    assert polar(start)[0] == pytest.approx(root_radius, abs=1e-12)
+    assert polar((cx, cy))[0] == pytest.approx(root_radius + radius, abs=1e-12)
+    assert polar((cx, cy))[1] == pytest.approx(polar(start)[1], abs=1e-12)
+    # It stays on this side of the middle of the gap to the next tooth.
+    assert polar((cx, cy))[1] >= -math.pi / teeth - 1e-12
+
+    # The side of the tooth is square to the radius of the arc at the end.
+    if profile.root1 is None:
+        assert end == profile.flank1[0]
+        assert polar(end)[0] > base_radius
+        direction = involute_direction(base_radius, end)
+    else:
+        assert end == profile.root1
+        direction = polar(profile.flank1[0])[1]
+        assert polar(end)[1] == pytest.approx(direction, abs=1e-12)
+    assert (end[0] - cx) * math.cos(direction) + (end[1] - cy) * math.sin(direction) == pytest.approx(0.0, abs=1e-12)
+    assert profile.fillet2 == tuple((x, -y) for x, y in profile.fillet1)
+
+
+def close(a, b, tolerance=1e-12):
+    return math.hypot(a[0] - b[0], a[1] - b[1]) <= tolerance
+
+
+# 8 and 12 teeth have their base circle outside of the root circle, 40 and
+# 200 inside.
+@pytest.mark.parametrize('teeth', [8, 12, 40, 200])
+@pytest.mark.parametrize('fillet_radius', [0.0, 0.02])
+@pytest.mark.parametrize('tolerance', [None, 1e-3])
+def test_outline_is_closed(teeth, fillet_radius, tolerance):
+    profile = geometry.tooth_profile(25.4, teeth, PRESSURE_ANGLE, tolerance=tolerance, fillet_radius=fillet_radius)
+    segments = geometry.gear_outline(profile)
+    assert len(segments) % teeth == 0
+    for segment, following in zip(segments, segments[1:] + segments[:1]):
+        assert close(segment.points[-1], following.points[0])
+        if segment.spline is not None:
+            assert close(segment.spline.control_points[0], segment.points[0], 1e-9)
+            assert close(segment.spline.control_points[-1], segment.points[-1], 1e-9)
+
+    points = geometry.outline_polyline(profile)
+    assert not close(points[0], points[-1])
+    assert all(not close(p, q) for p, q in zip(points, points[1:]))
+
+
+@pytest.mark.parametrize('teeth', [8, 12, 40, 200])
+def test_flanks_are_mirrored_involutes_a_tooth_thick_at_the_pitch_circle(teeth):
+    profile = geometry.tooth_profile(25.4, teeth, PRESSURE_ANGLE, point_count=9)
+    base_radius = profile.dims.base_dia / 2.0
+    pitch_radius = profile.dims.pitch_dia / 2.0
+    # Every point is the involute turned by the same angle, which puts the
+    # flank half a tooth from the middle of the tooth at the pitch circle.
+    turn = -math.pi / (2.0 * teeth) - polar(geometry.involute_point(base_radius, pitch_radius))[1]
+    for point in profile.flank1:
+        radius, angle = polar(point)
+        assert angle - polar(geometry.involute_point(base_radius, radius))[1] == pytest.approx(turn, abs=1e-12)
+    assert profile.flank2 == [(x, -y) for x, y in profile.flank1]
+    assert polar(profile.flank1[-1])[0] == pytest.approx(profile.dims.outside_dia / 2.0, abs=1e-12)
+    assert profile.tip_mid == (profile.dims.outside_dia / 2.0, 0.0)
+
+
+def test_batch_gives_the_profiles_of_single_gears():
+    specs = [geometry.GearSpec(25.4, teeth, PRESSURE_ANGLE, 0.01, 0.02) for teeth in (12, 40, 12)]
+    assert geometry.tooth_profiles(specs, tolerance=1e-3) == [
+        geometry.tooth_profile(25.4, teeth, PRESSURE_ANGLE, 0.01, tolerance=1e-3, fillet_radius=0.02)
+        for teeth in (12, 40, 12)]
+
+
+def chord_deviation(profile, steps=50):
+    # The largest distance between the chords of the sampled flank and the
+    # involute between their ends.
+    base_radius = profile.dims.base_dia / 2.0
+    flank = profile.flank1
+    radius, angle = polar(flank[0])
+    turn = angle - polar(geometry.involute_point(base_radius, radius))[1]
+    c, s = math.cos(turn), math.sin(turn)
+    worst = 0.0
+    for (x0, y0), (x1, y1) in zip(flank, flank[1:]):
+        r0, r1 = math.hypot(x0, y0), math.hypot(x1, y1)
+        length = math.hypot(x1 - x0, y1 - y0)
+        for k in range(1, steps):
+            x, y = geometry.involute_point(base_radius, r0 + (r1 - r0) * k / steps)
+            x, y = x * c - y * s, x * s + y * c
+            worst = max(worst, abs((x - x0) * (y1 - y0) - (y - y0) * (x1 - x0)) / length)
+    return worst
+
+
+# Modules of 0.5, 1, 5 and 10 mm.
+@pytest.mark.parametrize('diametral_pitch, teeth', [(50.8, 10), (25.4, 20), (5.08, 200), (2.54, 60)])
+@pytest.mark.parametrize('tolerance', [1e-2, 1e-3, 1e-4])
+def test_sampled_flank_is_within_the_tolerance(diametral_pitch, teeth, tolerance):
+    profile = geometry.tooth_profile(diametral_pitch, teeth, PRESSURE_ANGLE, tolerance=tolerance)
+    assert chord_deviation(profile) <= tolerance * 2.54 / diametral_pitch
+
+
+def test_sample_count_follows_the_tolerance_and_the_curvature_of_the_flank():
+    def count(diametral_pitch, teeth, tolerance=1e-3):
+        return len(geometry.tooth_profile(diametral_pitch, teeth, PRESSURE_ANGLE, tolerance=tolerance).flank1)
+
+    # The tolerance is relative to the module, so the count does not change
+    # with the size of the gear, but the flanks of gears with fewer teeth bend
+    # more and need more points.
+    assert count(50.8, 20) == count(25.4, 20) == count(2.54, 20)
+    assert count(25.4, 10) > count(25.4, 200)
+    assert count(25.4, 20, 1e-2) < count(25.4, 20, 1e-3) < count(25.4, 20, 1e-4)
+    assert geometry.flank_sample_count(1.0, 1.0001, 1e-3) == geometry.MIN_FLANK_POINTS
+    assert geometry.flank_sample_count(10.0, 20.0, 1e-9) == geometry.MAX_FLANK_POINTS
+
+
+@pytest.mark.parametrize('diametral_pitch, teeth', [(50.8, 10), (25.4, 20), (25.4, 40), (2.54, 200)])
+@pytest.mark.parametrize('tolerance', [None, 1e-2, 1e-4])
+def test_flank_spline_is_within_the_tolerance_of_the_involute(diametral_pitch, teeth, tolerance):
+    profile = geometry.tooth_profile(diametral_pitch, teeth, PRESSURE_ANGLE, tolerance=tolerance)
+    allowed = (tolerance or geometry.SPLINE_TOLERANCE) * 2.54 / diametral_pitch
+    base_radius = profile.dims.base_dia / 2.0
+    radius, angle = polar(profile.flank1[0])
+    turn = angle - polar(geometry.involute_point(base_radius, radius))[1]
+    c, s = math.cos(turn), math.sin(turn)
+
+    # The spline is parameterized by the roll angle of the involute, so each
+    # of its points is compared with the point of the involute at that angle.
+    spline = profile.spline1
+    knots = sorted(set(spline.knots))
+    worst = 0.0
+    for t0, t1 in zip(knots, knots[1:]):
+        for k in range(21):
+            t = t0 + (t1 - t0) * k / 20
+            x = base_radius * (math.cos(t) + t * math.sin(t))
+            y = base_radius * (math.sin(t) - t * math.cos(t))
+            px, py = de_boor(spline, t)
+            worst = max(worst, math.hypot(px - (x * c - y * s), py - (x * s + y * c)))
+    assert worst <= allowed
+    assert close(spline.control_points[0], profile.flank1[0], 1e-9)
+    assert close(spline.control_points[-1], profile.flank1[-1], 1e-9)
+    assert profile.spline2.control_points == [(x, -y) for x, y in spline.control_points]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from gearcore import FutureMap, make_executor, map_ordered, worker_count
+
+
+def squares(chunk):
+    # Later chunks finish first.
+    time.sleep(0.001 * max(10 - chunk[0], 0))
+    return [n * n for n in chunk]
+
+
+def test_worker_count():
+    assert worker_count(3) == 3
+    assert worker_count(None) == worker_count(0) >= 1
+
+
+def test_map_ordered_yields_the_results_in_order():
+    with make_executor(4, processes=False) as executor:
+        assert list(map_ordered(executor, squares, range(10), chunk_size=2)) == [n * n for n in range(10)]
+
+
+def test_map_ordered_only_reads_a_window_of_items_ahead():
+    read = []
+
+    def items():
+        for n in range(100):
+            read.append(n)
+            yield n
+
+    with make_executor(2, processes=False) as executor:
+        results = map_ordered(executor, squares, items(), chunk_size=3, window=2)
+        assert next(results) == 0
+        # Two chunks in flight and the one that was waiting for room.
+        assert len(read) == 9
+        assert list(results) == [n * n for n in range(1, 100)]
+
+
+def test_map_ordered_raises_the_error_of_a_chunk_after_the_results_before_it():
+    def fail_on_five(chunk):
+        if 5 in chunk:
+            raise ValueError('five')
+        return chunk
+
+    with make_executor(2, processes=False) as executor:
+        results = map_ordered(executor, fail_on_five, range(10), chunk_size=2)
+        assert [next(results) for _ in range(4)] == [0, 1, 2, 3]
+        with pytest.raises(ValueError, match='five'):
+            next(results)
+
+
+def test_future_map_waits_for_the_chunk_of_a_key_only():
+    release = threading.Event()
+
+    def compute(chunk):
+        if 'c' in chunk:
+            release.wait(5)
+        return [key.upper() for key in chunk]
+
+    with make_executor(2, processes=False) as executor:
+        values = FutureMap(executor, compute, ['a', 'b', 'a', 'c', 'd'], chunk_size=2)
+        assert list(values) == ['a', 'b', 'c', 'd']
+        assert len(values) == 4
+        assert values['b'] == 'B'
+        release.set()
+        assert dict(values) == {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'}
+        with pytest.raises(KeyError):
+            values['e']
+
+
+def test_future_map_raises_the_error_of_a_chunk_for_its_keys():
+    def compute(chunk):
+        if 'c' in chunk:
+            raise ValueError('c')
+        return [key.upper() for key in chunk]
+
+    with make_executor(2, processes=False) as executor:
+        values = FutureMap(executor, compute, ['a', 'b', 'c', 'd'], chunk_size=2)
+        assert values['a'] == 'A'
+        with pytest.raises(ValueError):
+            values['d']
+        with pytest.raises(ValueError):
+            values.wait()
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from gearcore import params
+from gearcore.params import GearParams, GearSource
+
+
+def make_params(**values):
+    data = dict(diametral_pitch=25.4, num_teeth=20, thickness=0.5, root_fillet_radius=0.05, pressure_angle=0.349,
+                backlash=0.0, hole_diam=0.3, flank_tolerance=1e-4, build_mode='Single sketch')
+    data.update(values)
+    return GearParams(**data)
+
+
+@pytest.mark.parametrize('values', [make_params(), make_params(flank_tolerance=None, build_mode=None)])
+def test_params_round_trip(values):
+    assert params.decode_params(params.encode_params(values)) == values
+
+
+def test_params_of_older_versions_are_read():
+    old = str({'diametralPitch': '25.4', 'numTeeth': '20', 'thickness': '0.5', 'rootFilletRad': '0.05',
+               'pressureAngle': '0.349', 'backlash': '0', 'holeDiam': '0.3'})
+    assert params.decode_params(old) == make_params(flank_tolerance=None, build_mode=None)
+
+
+@pytest.mark.parametrize('text', ['', 'not a value', '[1, 2]', json.dumps({'numTeeth': 'x', 'version': 1}),
+                                  json.dumps({'version': params.PARAMS_VERSION + 1})])
+def test_unreadable_params_raise_value_error(text):
+    with pytest.raises(ValueError):
+        params.decode_params(text)
+
+
+def test_changed_params():
+    old = make_params()
+    assert params.changed_params(old, old._replace(thickness=0.5 + 1e-12)) == frozenset()
+    assert params.changed_params(old, old._replace(num_teeth=24, build_mode=None)) == {'num_teeth', 'build_mode'}
+
+
+def test_source_round_trip():
+    source = GearSource('token', params.values_key([20, 0.1, None, 'mode']), params.values_key([1.0, 2.0]),
+                        params.combined_key(['b', 'a']))
+    assert params.decode_source(params.encode_source(source)) == source
+
+
+def test_sources_of_older_versions_are_read_and_newer_ones_are_not():
+    data = {'version': 0, 'token': 't', 'shape': 's', 'place': 'p', 'train': 'r'}
+    assert params.decode_source(json.dumps(data)) == GearSource('t', 's', 'p', 'r')
+    data['version'] = params.SOURCE_VERSION + 1
+    assert params.decode_source(json.dumps(data)) is None
+    assert params.decode_source('not json') is None
+    assert params.decode_source(json.dumps({'version': 1, 'token': 't'})) is None
+
+
+def test_keys_ignore_conversion_noise_and_order():
+    assert params.values_key([0.1 + 0.2, 'a']) == params.values_key([0.3, 'a'])
+    assert params.values_key([0.3]) != params.values_key([0.31])
+    assert params.combined_key(['x', 'y', 'z']) == params.combined_key(['z', 'x', 'y'])
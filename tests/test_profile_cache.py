@@ -0,0 +1,64 @@
+import gzip
+import json
+import math
+
+from gearcore import GearSpec, ProfileCache, tooth_profiles
+
+
+def spec(teeth):
+    return GearSpec(25.4, teeth, math.radians(20.0), 0.0, 0.02)
+
+
+def test_least_recently_used_profile_is_evicted():
+    cache = ProfileCache(2)
+    first = cache.get(spec(12))
+    cache.get(spec(18))
+    assert cache.get(spec(12)) is first
+    cache.get(spec(24))
+    assert len(cache) == 2
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'max_size': 2}
+    assert cache.get(spec(12)) is first
+    cache.get(spec(18))
+    assert cache.misses == 4 and cache.evictions == 2
+
+
+def test_batch_is_computed_once_and_returned_whole_when_larger_than_the_cache():
+    cache = ProfileCache(2)
+    specs = [spec(12), spec(18), spec(12), spec(24), spec(30)]
+    profiles = cache.get_many(specs)
+    assert [p.num_teeth for p in profiles] == [12, 18, 12, 24, 30]
+    assert profiles[0] is profiles[2]
+    assert profiles == tooth_profiles(specs)
+    assert cache.stats() == {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2, 'max_size': 2}
+
+
+def test_saved_profiles_are_loaded_in_a_later_session(tmp_path):
+    path = str(tmp_path / 'profiles.json.gz')
+    cache = ProfileCache()
+    profiles = cache.get_many([spec(12), spec(18)], tolerance=1e-3)
+    assert cache.is_dirty
+    cache.save(path)
+    assert not cache.is_dirty
+
+    loaded = ProfileCache()
+    assert loaded.load(path)
+    assert not loaded.is_dirty
+    assert loaded.get_many([spec(12), spec(18)], tolerance=1e-3) == profiles
+    assert loaded.misses == 0 and not loaded.is_dirty
+
+    small = ProfileCache(1)
+    assert small.load(path)
+    assert len(small) == 1 and small.get(spec(18), tolerance=1e-3) == profiles[1]
+
+
+def test_missing_outdated_and_broken_files_are_ignored(tmp_path):
+    cache = ProfileCache()
+    assert not cache.load(str(tmp_path / 'missing.json.gz'))
+    outdated = tmp_path / 'outdated.json.gz'
+    with gzip.open(outdated, 'wt') as f:
+        json.dump({'version': 0, 'profiles': []}, f)
+    assert not cache.load(str(outdated))
+    broken = tmp_path / 'broken.json.gz'
+    broken.write_bytes(b'not gzip')
+    assert not cache.load(str(broken))
+    assert len(cache) == 0
@@ -0,0 +1,125 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# The session is run against the adsk stand-in of the bench folder.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import adsk  # noqa: E402
+import adsk.core  # noqa: E402
+import adsk.fusion  # noqa: E402
+import run_benchmarks as bench  # noqa: E402
+
+
+@pytest.fixture
+def dialog():
+    entry = bench.load_addin()
+    entry.load_modules()
+    design = adsk.fusion.Design()
+    adsk.core.Application.get().activeProduct = design
+    circles = bench.make_circles(design, 6)
+    command = adsk.core.Command()
+    entry.command_created(adsk.core.CommandCreatedEventArgs(command))
+    inputs = command.commandInputs
+    session = entry.GearSession(inputs)
+    yield session, inputs.itemById('circles_select'), circles
+    entry.command_destroy(adsk.core.CommandEventArgs(command))
+
+
+def select(selection, circles):
+    selection.clearSelection()
+    for circle in circles:
+        selection.addSelection(circle)
+
+
+def radii(session):
+    return list(session.table().radius)
+
+
+def test_circles_are_read_once(dialog):
+    session, selection, circles = dialog
+    select(selection, circles[:3])
+    session.sync_selection(selection)
+    assert radii(session) == [c.radius for c in circles[:3]]
+    version = session.version
+    session.sync_selection(selection)
+    assert session.version == version
+
+    select(selection, circles[1:5])
+    session.sync_selection(selection)
+    assert radii(session) == [c.radius for c in circles[1:5]]
+    assert len(session.circles) == 5
+    select(selection, circles[:2])
+    session.sync_selection(selection)
+    assert len(session.circles) == 5
+
+
+def test_swapped_circle_with_the_same_count_is_synced(dialog):
+    session, selection, circles = dialog
+    select(selection, circles[:3])
+    session.sync_selection(selection)
+    trains = session.trains(bench.MODULE)
+    select(selection, [circles[0], circles[4], circles[2]])
+    session.sync_selection(selection)
+    assert session.tokens == [circles[k].entityToken for k in (0, 4, 2)]
+    assert list(session.table().px) == [c.centerSketchPoint.geometry.x for c in (circles[0], circles[4], circles[2])]
+    assert session.trains(bench.MODULE) is not trains
+
+
+def test_reordered_selection_is_synced(dialog):
+    session, selection, circles = dialog
+    select(selection, circles[:4])
+    session.sync_selection(selection)
+    select(selection, circles[3::-1])
+    session.sync_selection(selection)
+    assert session.tokens == [c.entityToken for c in circles[3::-1]]
+    assert radii(session) == [c.radius for c in circles[3::-1]]
+    assert len(session.circles) == 4
+
+
+def test_trains_are_kept_until_the_selection_or_module_changes(dialog):
+    session, selection, circles = dialog
+    select(selection, circles)
+    session.sync_selection(selection)
+    trains = session.trains(bench.MODULE)
+    session.sync_selection(selection)
+    assert session.trains(bench.MODULE) is trains
+    assert list(trains.table.teeth) == [12, 18, 24, 30, 18, 12]
+    assert sorted(tuple(sorted(m)) for m in trains.meshes) == [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)]
+    assert session.trains(bench.MODULE * 2) is not trains
+
+
+def test_circles_are_placed_by_the_frame_of_their_sketch_read_once(monkeypatch):
+    entry = bench.load_addin()
+    entry.load_modules()
+    session = importlib.import_module(entry.__package__ + '.session')
+    design = adsk.fusion.Design()
+    # A sketch on the YZ plane moved to (1, 2, 3), and a sketch on the XY plane
+    # reached through an occurrence turned a quarter about Z and moved to (10, 0, 0).
+    moved = bench.make_sketch(design, (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 2.0, 3.0))
+    nested = bench.make_sketch(design, (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+    transform = adsk.core.Matrix3D.create()
+    transform.setWithArray([0.0, -1.0, 0.0, 10.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0])
+    nested.assemblyContext = design.rootComponent.occurrences.addNewComponent(transform)
+    circles = [moved.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0.5, 0.25, 0.0), 1.0),
+               nested.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(1.0, 0.0, 0.0), 2.0),
+               moved.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0.0, 1.0, 0.0), 3.0)]
+
+    read = []
+    read_sketch = session.read_sketch
+    monkeypatch.setattr(session, 'read_sketch', lambda sketch: read.append(sketch) or read_sketch(sketch))
+    table, frames = entry.gearcore.GearTable(), {}
+    session.read_circles(circles, ['a', 'b', 'c'], table, frames)
+
+    assert read == [moved, nested]
+    assert sorted(frames) == sorted([moved.entityToken, nested.entityToken])
+    assert table.tokens == ['a', 'b', 'c']
+    for i, position in enumerate([(1.0, 2.5, 3.25), (10.0, 1.0, 0.0), (1.0, 2.0, 4.0)]):
+        assert table.position(i) == pytest.approx(position, abs=1e-12)
+    for i, normal in enumerate([(1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 0.0)]):
+        assert table.normal(i) == pytest.approx(normal, abs=1e-12)
+    assert list(table.radius) == [1.0, 2.0, 3.0]
+    # The occurrence only moves the frame, not the sketch.
+    assert nested.transform.asArray() == adsk.core.Matrix3D.create().asArray()
@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from gearcore import GearTable, gear_bounds, geometry, train
+
+
+def make_table():
+    # Three gears of module 0.1 cm, the last one on a plane of its own.
+    table = GearTable()
+    table.append((0.0, 0.0, 0.0), (0.0, 0.0, 1.0), 1.0, 'a')
+    table.append((1.6, 0.0, 0.0), (0.0, 0.0, 1.0), 0.6, 'b')
+    table.append((0.0, 0.0, 5.0), (0.0, 1.0, 0.0), 0.9, 'c')
+    return table
+
+
+def transform(m, point):
+    x, y, z = point
+    return tuple(m[4 * r] * x + m[4 * r + 1] * y + m[4 * r + 2] * z + m[4 * r + 3] for r in range(3))
+
+
+def test_take_copies_the_pitch_circles_of_the_rows_in_their_order():
+    table = make_table()
+    table.count_teeth(0.1)
+    table.group_planes()
+    taken = table.take([2, 0, 2])
+    assert len(taken) == 3
+    assert taken.tokens == ['c', 'a', 'c']
+    assert taken.positions() == [(0.0, 0.0, 5.0), (0.0, 0.0, 0.0), (0.0, 0.0, 5.0)]
+    assert taken.normals() == [(0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (0.0, 1.0, 0.0)]
+    assert list(taken.radius) == [0.9, 1.0, 0.9]
+    # The derived columns are filled again by the stages.
+    assert len(taken.teeth) == len(taken.plane) == len(taken.angle) == 0
+    assert list(taken.count_teeth(0.1)) == [18, 20, 18]
+    assert list(table.teeth) == [20, 12, 18]
+    taken.radius[0] = 2.0
+    assert table.radius[2] == 0.9
+
+
+def test_matrix_places_phased_gears_only():
+    table = make_table()
+    teeth = table.count_teeth(0.1)
+    planes = table.group_planes()
+    meshes = train.find_meshes(planes, teeth, 0.1)
+    order = train.gear_order(planes, teeth)
+    graph = train.MeshGraph(len(table), meshes, order)
+    table.set_phases(train.solve_phases(graph, teeth, planes.coords, order, active=[True, False, False]))
+    assert list(table.component[:2]) != [-1, -1] and table.component[2] == -1
+    assert table.matrix(2) is None
+
+    for i in range(2):
+        m = table.matrix(i)
+        assert m == train.placement_matrix(table.angle[i], table.normal(i), table.position(i))
+        # The origin goes to the center of the gear and its axis along the normal.
+        assert transform(m, (0.0, 0.0, 0.0)) == pytest.approx(table.position(i), abs=1e-12)
+        axis = [a - b for a, b in zip(transform(m, (0.0, 0.0, 1.0)), table.position(i))]
+        assert axis == pytest.approx(list(table.normal(i)), abs=1e-12)
+        # It turns the gear by its phase angle within its plane.
+        x = [a - b for a, b in zip(transform(m, (1.0, 0.0, 0.0)), table.position(i))]
+        y = [a - b for a, b in zip(transform(m, (0.0, 1.0, 0.0)), table.position(i))]
+        u, v = train.plane_basis(table.normal(i))
+        assert sum(a * b for a, b in zip(x, u)) == pytest.approx(math.cos(table.angle[i]), abs=1e-12)
+        assert sum(a * b for a, b in zip(x, v)) == pytest.approx(math.sin(table.angle[i]), abs=1e-12)
+        assert sum(a * b for a, b in zip(x, y)) == pytest.approx(0.0, abs=1e-12)
+
+
+def test_placed_gears_and_bounds():
+    table = make_table()
+    table.count_teeth(0.1)
+    table.group_planes()
+    table.set_phases(train.PhaseSolution([0.1, 0.2, 0.3], [0, 0, 1], [0, 2], []))
+    profiles = {t: geometry.tooth_profile(25.4, t, math.radians(20.0)) for t in set(table.teeth)}
+    gears = list(table.placed_gears(profiles, 0.2, 'T_{plane}'))
+    assert [(g.profile.num_teeth, g.angle, g.hole_diam) for g in gears] == [(20, 0.1, 0.2), (12, 0.2, 0.2),
+                                                                          (18, 0.3, 0.2)]
+    assert [g.layer for g in gears] == ['T_{}'.format(p + 1) for p in table.plane]
+    assert table.bounds(profiles) == pytest.approx(gear_bounds(gears), abs=1e-12)
+    assert GearTable().bounds(profiles) == (0.0, 0.0, 0.0, 0.0)
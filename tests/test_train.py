@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from gearcore import train
+
+
+# Two trains on the XY plane, the first with a loop of three gears, module 0.1 cm.
+def make_layout():
+    module = 0.1
+    teeth = [20, 20, 20, 12, 18, 12]
+    centers = [(0.0, 0.0, 0.0), (2.0, 0.0, 0.0), (1.0, math.sqrt(3.0), 0.0),
+               (10.0, 0.0, 0.0), (11.5, 0.0, 0.0), (13.0, 0.0, 0.0)]
+    planes = train.group_by_plane(centers, [(0.0, 0.0, 1.0)] * len(centers))
+    meshes = train.find_meshes(planes, teeth, module)
+    order = train.gear_order(planes, teeth)
+    return teeth, planes, train.MeshGraph(len(teeth), meshes, order), order
+
+
+def test_meshes_and_trains():
+    teeth, planes, graph, order = make_layout()
+    assert [sorted(graph.adjacent(i)) for i in range(len(graph))] == [[1, 2], [0, 2], [0, 1], [4], [3, 5], [4]]
+    trains = list(train.train_components(graph))
+    assert trains[0] == trains[1] == trains[2] != trains[3] == trains[4] == trains[5]
+
+
+def test_only_trains_with_an_active_gear_are_phased():
+    teeth, planes, graph, order = make_layout()
+    full = train.solve_phases(graph, teeth, planes.coords, order)
+    partial = train.solve_phases(graph, teeth, planes.coords, order,
+                                 active=[False, False, False, False, True, False])
+    assert list(partial.component[:3]) == [-1, -1, -1]
+    assert partial.angles[:3] == [0.0, 0.0, 0.0]
+    assert min(partial.component[3:]) >= 0
+    assert partial.angles[3:] == pytest.approx(full.angles[3:], abs=1e-15)
+    assert all(i >= 3 and j >= 3 for i, j, _ in partial.conflicts)
+
+
+def test_phased_gears_mesh():
+    teeth, planes, graph, order = make_layout()
+    phases = train.solve_phases(graph, teeth, planes.coords, order)
+    (xi, yi), (xj, yj) = planes.coords[4], planes.coords[3]
+    expected = train.mesh_angle(phases.angles[3], teeth[4], teeth[3], xi, yi, xj, yj)
+    error = (phases.angles[4] - expected) % (2.0 * math.pi / teeth[4])
+    assert min(error, 2.0 * math.pi / teeth[4] - error) < 1e-9